@@ -1,8 +1,9 @@
 from fastapi import APIRouter
 
-from . import predictor, menu, chat
+from . import predictor, menu, chat, diagnostics
 
 router = APIRouter()
 router.include_router(predictor.router, tags=["predictor"], prefix="/v1")
 router.include_router(menu.router, tags=["menu"])
-router.include_router(chat.router, tags=["chat"]) 
+router.include_router(chat.router, tags=["chat"])
+router.include_router(diagnostics.router, tags=["diagnostics"], prefix="/v1")
@@ -1,9 +1,22 @@
+import json
+from datetime import datetime
+from functools import partial
 from typing import Optional, Dict, Any, List
-from fastapi import APIRouter, Body, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Body, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from loguru import logger
 from pydantic import BaseModel
 from ...services.gemini_chat import gemini_chat
 from ...services.personas import get_preset
-from ...services.conversations import create_conversation, get_conversation_messages, append_message
+from ...services.conversations import (
+    create_conversation,
+    get_conversation_messages,
+    append_messages,
+    build_chat_context,
+    fold_chat_context,
+    trim_history,
+)
 
 router = APIRouter()
 
@@ -23,12 +36,8 @@ class ChatResponse(BaseModel):
     conversation_token: Optional[str] = None
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(payload: ChatRequest = Body(...)):
-    """Endpoint to proxy a question to Gemini chat with optional user profile and system prompt."""
-    if not gemini_chat.is_available():
-        return {"reply": "Chat unavailable (Gemini API key not configured)."}
-
+def _build_persona(payload: ChatRequest):
+    """Resolve the user profile and system prompt for a chat request."""
     user_profile = payload.user_profile or {}
     if payload.as_persona and payload.persona_preset:
         preset = get_preset(payload.persona_preset)
@@ -60,28 +69,115 @@ async def chat_endpoint(payload: ChatRequest = Body(...)):
 
         system_prompt = " ".join([p for p in parts if p])
 
-    conv_token = payload.conversation_token
-    history = payload.conversation or []
-    if conv_token:
-        history = get_conversation_messages(conv_token)
+    return user_profile, system_prompt
 
-    if conv_token:
-        append_message(conv_token, 'user', payload.question)
 
-    result = gemini_chat.chat(
+async def _load_context(payload: ChatRequest):
+    """
+    Bounded prompt history and rolling summary for a chat request, plus the
+    summary fold to run once the reply is out (None when there is none).
+    """
+    if payload.conversation_token:
+        context = await build_chat_context(payload.conversation_token, question=payload.question)
+        fold = None
+        if context.pending is not None:
+            fold = partial(
+                fold_chat_context, payload.conversation_token, context, gemini_chat.summarize_async
+            )
+        return context.messages, context.summary, fold
+    return trim_history(payload.conversation or [], payload.question), None, None
+
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(background_tasks: BackgroundTasks, payload: ChatRequest = Body(...)):
+    """Endpoint to proxy a question to Gemini chat with optional user profile and system prompt."""
+    if not gemini_chat.is_available():
+        return {"reply": "Chat unavailable (Gemini API key not configured)."}
+
+    user_profile, system_prompt = _build_persona(payload)
+
+    conv_token = payload.conversation_token
+    history, summary, fold = await _load_context(payload)
+    asked_at = datetime.utcnow()
+
+    result = await gemini_chat.chat_async(
         question=payload.question,
         user_profile=user_profile,
         system_prompt=system_prompt,
         conversation=history,
+        summary=summary,
     )
 
     reply_text = result.get("reply", "")
 
     if conv_token:
-        append_message(conv_token, 'assistant', reply_text)
+        await append_messages(conv_token, [
+            {"role": "user", "content": payload.question, "created_at": asked_at},
+            {"role": "assistant", "content": reply_text},
+        ])
+    if fold is not None:
+        background_tasks.add_task(fold)
     return {"reply": reply_text, "conversation_token": conv_token}
 
 
+def _sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(payload: ChatRequest = Body(...)):
+    """Stream the Gemini reply as Server-Sent Events.
+
+    Emits `delta` frames with text as it is generated, then a `done` event
+    (or an `error` event). The turn is persisted once the stream completes;
+    on error only the question is.
+    """
+    conv_token = payload.conversation_token
+
+    if not gemini_chat.is_available():
+        async def unavailable():
+            yield _sse({"delta": "Chat unavailable (Gemini API key not configured)."})
+            yield _sse({"conversation_token": conv_token}, event="done")
+
+        return StreamingResponse(unavailable(), media_type="text/event-stream")
+
+    user_profile, system_prompt = _build_persona(payload)
+
+    history, summary, fold = await _load_context(payload)
+    question = {"role": "user", "content": payload.question, "created_at": datetime.utcnow()}
+
+    async def events():
+        parts = []
+        try:
+            async for delta in gemini_chat.chat_stream(
+                question=payload.question,
+                user_profile=user_profile,
+                system_prompt=system_prompt,
+                conversation=history,
+                summary=summary,
+            ):
+                parts.append(delta)
+                yield _sse({"delta": delta})
+        except Exception:
+            logger.exception("Gemini chat stream failed")
+            if conv_token:
+                await append_messages(conv_token, [question])
+            yield _sse({"error": "Terjadi kesalahan saat menghubungi model."}, event="error")
+            return
+
+        if conv_token:
+            await append_messages(conv_token, [question, {"role": "assistant", "content": "".join(parts)}])
+        yield _sse({"conversation_token": conv_token}, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(fold) if fold is not None else None,
+    )
+
+
 
 class ConversationCreateResponse(BaseModel):
     token: str
@@ -89,13 +185,27 @@ class ConversationCreateResponse(BaseModel):
 
 @router.post("/conversations", response_model=ConversationCreateResponse)
 async def create_conversation_endpoint():
-    token = create_conversation()
+    token = await create_conversation()
     return {"token": token}
 
 
 @router.get("/conversations/{token}")
-async def get_conversation_endpoint(token: str):
-    msgs = get_conversation_messages(token)
+async def get_conversation_endpoint(
+    token: str,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Maximum number of messages to return; all when omitted"),
+    before_id: Optional[int] = Query(None, ge=1, description="Only return messages older than this message id"),
+):
+    """Return the newest `limit` messages (oldest first); page back with `next_before_id`."""
+    msgs = await get_conversation_messages(
+        token, limit=limit + 1 if limit is not None else None, before_id=before_id
+    )
     if msgs is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    return {"messages": msgs}
+    has_more = limit is not None and len(msgs) > limit
+    if has_more:
+        msgs = msgs[1:]
+    return {
+        "messages": msgs,
+        "has_more": has_more,
+        "next_before_id": msgs[0]["id"] if has_more else None,
+    }
@@ -0,0 +1,50 @@
+from fastapi import APIRouter
+
+from ...core.pool import get_pool_stats
+from ...db import async_engine, engine
+from ...services.conversation_cache import conversation_cache
+from ...services.conversations import message_buffer
+from ...services.gemini_search import gemini_service
+from ...services.menu_cache import menu_response_cache
+from ...services.prediction_cache import prediction_cache
+
+router = APIRouter()
+
+
+@router.get("/diagnostics/pool", name="diagnostics:pool")
+async def pool_diagnostics():
+    """Connection pool usage for this worker, to help size pools per worker."""
+    return {
+        "sync": get_pool_stats(engine),
+        "async": get_pool_stats(async_engine.sync_engine),
+    }
+
+
+@router.get("/diagnostics/search-cache", name="diagnostics:search-cache")
+async def search_cache_diagnostics():
+    """Hit/miss counters of the Gemini search query cache."""
+    return gemini_service.cache_stats()
+
+
+@router.get("/diagnostics/conversation-writes", name="diagnostics:conversation-writes")
+async def conversation_write_diagnostics():
+    """Counters of the conversation message write-behind buffer."""
+    return message_buffer.stats()
+
+
+@router.get("/diagnostics/conversation-cache", name="diagnostics:conversation-cache")
+async def conversation_cache_diagnostics():
+    """Size and hit rate of the hot-conversation cache."""
+    return conversation_cache.stats()
+
+
+@router.get("/diagnostics/menu-cache", name="diagnostics:menu-cache")
+async def menu_cache_diagnostics():
+    """Menu version and hit rate of the menu response cache."""
+    return menu_response_cache.stats()
+
+
+@router.get("/diagnostics/prediction-cache", name="diagnostics:prediction-cache")
+async def prediction_cache_diagnostics():
+    """Size, hit rate and invalidations of the /predict result cache."""
+    return prediction_cache.stats()
@@ -1,9 +1,23 @@
+import io
+import sqlite3
+import tempfile
+from datetime import datetime
 from typing import Optional, Literal
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import JSONResponse
-from sqlalchemy import or_, and_, func, String
-from sqlalchemy.orm import Session
-from ...db import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import or_, and_, cast, func, select, text, tuple_, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from ...core.config import (
+    MENU_BULK_BATCH_SIZE,
+    MENU_BULK_SPOOL_BYTES,
+    MENU_INDEX_MAX_IDS,
+    MENU_SEARCH_BACKEND,
+    MENU_STREAM_CHUNK_SIZE,
+)
+from ...core.paginator import decode_cursor, encode_cursor
+from ...db import get_async_db
 from ...models.menu import (
     Menu,
     MenuCreate,
@@ -17,38 +31,257 @@ from ...models.menu import (
     MenuGroupByCategoryList,
 )
 from ...services.gemini_search import gemini_service
+from ...services.menu_fts import menu_fts
+from ...services.menu_bulk import detect_format, export_chunks, import_menus, iter_records
+from ...services.menu_cache import etag_matches, menu_response_cache
+from ...services.menu_index import menu_index
 from loguru import logger
 
 router = APIRouter()
 
+# columns usable as keyset sort keys: non-null, so (col, id) seeks are total
+CURSOR_SORT_FIELDS = ("id", "name", "category", "calories", "price", "created_at", "updated_at")
+
+
+def _is_unfiltered(query) -> bool:
+    """True for a plain listing of the whole menus table (no filter, search join)."""
+    return query.whereclause is None and list(query.get_final_froms()) == [Menu.__table__]
+
+
+async def _estimate_total(db: AsyncSession) -> int:
+    """Cheap table-level row estimate; only valid for unfiltered listings."""
+    if db.bind.dialect.name == "postgresql":
+        estimate = await db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+            {"table": Menu.__tablename__},
+        )
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    return await db.scalar(select(func.max(Menu.id))) or 0
+
+
+async def _count_total(db: AsyncSession, query, count_mode: str):
+    if count_mode == "false":
+        return None
+    # a table-level estimate says nothing about a filtered set: count those
+    if count_mode == "estimate" and _is_unfiltered(query):
+        return await _estimate_total(db)
+    return await db.scalar(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    )
 
-def get_db():
-    db = SessionLocal()
+
+def _as_number(value):
     try:
-        yield db
-    finally:
-        db.close()
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _search_conditions(filters):
+    """Compile parsed search filters into SQL WHERE conditions."""
+    conditions = []
+    
+    if filters.get("category"):
+        conditions.append(Menu.category == str(filters["category"]))
+    
+    min_price = _as_number(filters.get("min_price"))
+    if min_price is not None:
+        conditions.append(Menu.price >= min_price)
+    
+    max_price = _as_number(filters.get("max_price"))
+    if max_price is not None:
+        conditions.append(Menu.price <= max_price)
+    
+    max_calories = _as_number(filters.get("max_calories"))
+    if max_calories is not None:
+        conditions.append(Menu.calories <= max_calories)
+    
+    return conditions
+
+
+def _search_keywords(filters):
+    keywords = filters.get("keywords") or []
+    if isinstance(keywords, str):
+        keywords = [keywords]
+    return [str(kw).lower() for kw in keywords if str(kw).strip()]
+
+
+def _keyword_condition(keywords):
+    """Substring match of any keyword in name, description or ingredients."""
+    searchable = (
+        func.lower(Menu.name),
+        func.lower(func.coalesce(Menu.description, "")),
+        func.lower(func.coalesce(cast(Menu.ingredients, String), "")),
+    )
+    return or_(*[
+        column.contains(kw, autoescape=True)
+        for kw in keywords
+        for column in searchable
+    ])
+
+
+async def _apply_keywords(db: AsyncSession, query, keywords, ranked=True):
+    """Filter by keywords through the full-text index when available.
+
+    Returns the query and whether it is already ordered by relevance.
+    """
+    if not keywords:
+        return query, False
+    if MENU_SEARCH_BACKEND == "memory" and menu_index.ready:
+        ids = menu_index.search(keywords)
+        # a short prefix on a large catalogue matches too many rows to bind
+        if len(ids) <= MENU_INDEX_MAX_IDS:
+            return query.where(Menu.id.in_(ids)), False
+    if await menu_fts.is_ready(db):
+        text_query = menu_fts.apply(query, db.bind.dialect.name, keywords, ranked=ranked)
+        if text_query is not None:
+            return text_query, ranked
+    return query.where(_keyword_condition(keywords)), False
+
+
+async def _cached_response(request: Request, endpoint: str, params, build):
+    """
+    Serve a menu read from the response cache.
+
+    `build()` produces the payload on a miss; a Response it returns (e.g. a
+    404) is passed through uncached. Responses carry a strong ETag, and a
+    matching `If-None-Match` gets an empty 304.
+    """
+    key = menu_response_cache.key(endpoint, params)
+    cached = menu_response_cache.get(key)
+    if cached is None:
+        payload = await build()
+        if isinstance(payload, Response):
+            return payload
+        body = JSONResponse(content=jsonable_encoder(payload)).body
+        etag = menu_response_cache.set(key, body)
+    else:
+        body, etag = cached
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _apply_sort(query, sort):
+    """Order by a `field:order` sort spec; invalid specs are ignored."""
+    if sort:
+        try:
+            field, order = sort.split(":")
+            if hasattr(Menu, field):
+                column = getattr(Menu, field)
+                if order.lower() == "desc":
+                    query = query.order_by(column.desc())
+                else:
+                    query = query.order_by(column.asc())
+        except ValueError:
+            pass  # Invalid sort format, skip sorting
+    return query
+
+
+def _wants_ndjson(request: Request) -> bool:
+    return "application/x-ndjson" in request.headers.get("accept", "")
+
+
+def _stream_menus(db: AsyncSession, query, fmt: str, headers=None) -> StreamingResponse:
+    """
+    Stream the rows of `query` as NDJSON or CSV straight off a server-side
+    cursor, `MENU_STREAM_CHUNK_SIZE` rows per fetch, so memory stays
+    constant whatever the result size.
+    """
+    async def body():
+        try:
+            menus = await db.stream_scalars(query.execution_options(yield_per=MENU_STREAM_CHUNK_SIZE))
+            async for chunk in export_chunks(menus, fmt, MENU_STREAM_CHUNK_SIZE):
+                yield chunk
+        finally:
+            # the response outlives the request's dependency scope
+            await db.close()
+
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+
+def _pagination_total_pages(total, per_page_num):
+    if total is None:
+        return None
+    return (total + per_page_num - 1) // per_page_num
 
 
 @router.post("/menu", response_model=MenuCreateResponse, status_code=201)
-async def create_menu(menu: MenuCreate):
+async def create_menu(menu: MenuCreate, db: AsyncSession = Depends(get_async_db)):
     try:
-        with SessionLocal() as db:
-            db_menu = Menu(**menu.model_dump())
-            db.add(db_menu)
-            db.commit()
-            db.refresh(db_menu)
-            return MenuCreateResponse(
-                message="Menu created successfully",
-                data=MenuResponse.model_validate(db_menu)
-            )
+        db_menu = Menu(**menu.model_dump())
+        db.add(db_menu)
+        await db.commit()
+        await db.refresh(db_menu)
+        menu_index.add(db_menu)
+        menu_response_cache.bump()
+        return MenuCreateResponse(
+            message="Menu created successfully",
+            data=MenuResponse.model_validate(db_menu)
+        )
     except Exception as e:
         logger.exception("Failed to create menu")
         raise HTTPException(status_code=500, detail=f"Failed to create menu: {str(e)}")
 
 
+@router.post("/menu/bulk")
+async def bulk_import_menu(
+    request: Request,
+    format: Optional[str] = Query(None, description="json, ndjson or csv (defaults to the Content-Type)"),
+    batch_size: int = Query(MENU_BULK_BATCH_SIZE, ge=1, le=10000, description="Rows per transaction"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Import menus from a JSON array, NDJSON or CSV body.
+
+    Invalid rows are skipped and listed in the report; valid rows are
+    inserted `batch_size` at a time, one transaction per batch. The upload
+    is spooled to a temporary file rather than held in memory.
+    """
+    fmt = detect_format(request.headers.get("content-type"), format)
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Unsupported import format; send JSON, NDJSON or CSV")
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=MENU_BULK_SPOOL_BYTES) as spool:
+            async for chunk in request.stream():
+                spool.write(chunk)
+            spool.seek(0)
+            stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+            try:
+                report = await import_menus(db, iter_records(stream, fmt), batch_size)
+            except (ValueError, UnicodeDecodeError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid {fmt} body: {str(e)}")
+            finally:
+                stream.detach()
+        return {"message": f"Imported {report['inserted']} menus", **report}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Failed to import menus")
+        raise HTTPException(status_code=500, detail=f"Failed to import menus: {str(e)}")
+
+
+@router.get("/menu/export")
+async def export_menu(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Export format: ndjson or csv"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Stream every menu, in id order, without loading the table into memory."""
+    return _stream_menus(
+        db,
+        select(Menu).order_by(Menu.id),
+        format,
+        headers={"Content-Disposition": f'attachment; filename="menus.{format}"'},
+    )
+
+
 @router.get("/menu")
 async def list_menu(
+    request: Request,
     q: Optional[str] = Query(None, description="Search query for name, description, or ingredients"),
     category: Optional[str] = Query(None, description="Filter by category"),
     min_price: Optional[str] = Query(None, description="Minimum price"),
@@ -57,6 +290,9 @@ async def list_menu(
     page: Optional[str] = Query("1", description="Page number"),
     per_page: Optional[str] = Query("10", description="Items per page"),
     sort: Optional[str] = Query(None, description="Sort by field:order (e.g., price:asc, name:desc)"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination token; pass an empty value for the first page"),
+    count: Optional[str] = Query("true", description="Total count: true, false or estimate"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
         # Convert and validate parameters
@@ -100,43 +336,61 @@ async def list_menu(
         except ValueError:
             per_page_num = 10
         
-        with SessionLocal() as db:
-            query = db.query(Menu)
-            
-            if category:
-                query = query.filter(Menu.category == category)
-            
-            if min_price_val is not None:
-                query = query.filter(Menu.price >= min_price_val)
-            
-            if max_price_val is not None:
-                query = query.filter(Menu.price <= max_price_val)
+        count_mode = count.strip().lower() if count and count.strip() else "true"
+        if count_mode not in ("true", "false", "estimate"):
+            count_mode = "true"
+        
+        query = select(Menu)
+        
+        if category:
+            query = query.where(Menu.category == category)
+        
+        if min_price_val is not None:
+            query = query.where(Menu.price >= min_price_val)
+        
+        if max_price_val is not None:
+            query = query.where(Menu.price <= max_price_val)
+        
+        if max_cal_val is not None:
+            query = query.where(Menu.calories <= max_cal_val)
+        
+        # NDJSON clients get every matching row, streamed; no paging or count
+        if _wants_ndjson(request):
+            ranked = False
+            if q:
+                query, ranked = await _apply_keywords(db, query, [q], ranked=not sort)
+            query = _apply_sort(query, sort)
+            if not sort and not ranked:
+                query = query.order_by(Menu.id)
+            return _stream_menus(db, query, "ndjson")
+        
+        params = {
+            "q": q, "category": category, "min_price": min_price_val, "max_price": max_price_val,
+            "max_cal": max_cal_val, "page": page_num, "per_page": per_page_num, "sort": sort,
+            "cursor": cursor, "count": count_mode,
+        }
+        
+        async def build():
+            nonlocal query
+            if cursor is not None:
+                if q:
+                    query, _ = await _apply_keywords(db, query, [q], ranked=False)
+                return await _list_menu_keyset(db, query, sort, cursor, per_page_num, count_mode)
             
-            if max_cal_val is not None:
-                query = query.filter(Menu.calories <= max_cal_val)
+            # Without an explicit sort, text matches come back by relevance
+            if q:
+                query, _ = await _apply_keywords(db, query, [q], ranked=not sort)
             
             # Apply sorting
-            if sort:
-                try:
-                    field, order = sort.split(":")
-                    if hasattr(Menu, field):
-                        column = getattr(Menu, field)
-                        if order.lower() == "desc":
-                            query = query.order_by(column.desc())
-                        else:
-                            query = query.order_by(column.asc())
-                except ValueError:
-                    pass  # Invalid sort format, skip sorting
+            query = _apply_sort(query, sort)
             
             # Get total count
-            total = query.count()
+            total = await _count_total(db, query, count_mode)
             
-            # Apply pagination
+            # Apply pagination; one extra row tells us whether a next page exists
             offset = (page_num - 1) * per_page_num
-            items = query.offset(offset).limit(per_page_num).all()
-            
-            # Calculate pagination info
-            total_pages = (total + per_page_num - 1) // per_page_num
+            rows = (await db.scalars(query.offset(offset).limit(per_page_num + 1))).all()
+            items = rows[:per_page_num]
             
             return {
                 "data": [MenuResponse.model_validate(item).model_dump() for item in items],
@@ -144,41 +398,166 @@ async def list_menu(
                     "total": total,
                     "page": page_num,
                     "per_page": per_page_num,
-                    "total_pages": total_pages
+                    "total_pages": _pagination_total_pages(total, per_page_num),
+                    "has_more": len(rows) > per_page_num,
                 }
             }
+        
+        return await _cached_response(request, "list", params, build)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Failed to list menu")
         raise HTTPException(status_code=500, detail=f"Failed to list menu: {str(e)}")
 
 
+async def _list_menu_keyset(db, query, sort, cursor, per_page_num, count_mode):
+    """Seek past the last (sort key, id) seen instead of scanning an OFFSET."""
+    sort_field, sort_order = "id", "asc"
+    if sort:
+        try:
+            field, order = sort.split(":")
+            if field in CURSOR_SORT_FIELDS:
+                sort_field = field
+                sort_order = "desc" if order.lower() == "desc" else "asc"
+        except ValueError:
+            pass  # Invalid sort format, keep id order
+    sort_key = f"{sort_field}:{sort_order}"
+    column = getattr(Menu, sort_field)
+    descending = sort_order == "desc"
+    
+    total = await _count_total(db, query, count_mode)
+    
+    if cursor.strip():
+        try:
+            position = decode_cursor(cursor.strip())
+            if position.get("s") != sort_key:
+                raise ValueError("cursor was issued for a different sort order")
+            last_id = int(position["id"])
+            last_value = position["v"]
+            if sort_field in ("created_at", "updated_at"):
+                last_value = datetime.fromisoformat(last_value)
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+        
+        if sort_field == "id":
+            seek = Menu.id < last_id if descending else Menu.id > last_id
+        elif descending:
+            seek = tuple_(column, Menu.id) < tuple_(last_value, last_id)
+        else:
+            seek = tuple_(column, Menu.id) > tuple_(last_value, last_id)
+        query = query.where(seek)
+    
+    if descending:
+        query = query.order_by(column.desc(), Menu.id.desc())
+    else:
+        query = query.order_by(column.asc(), Menu.id.asc())
+    
+    rows = (await db.scalars(query.limit(per_page_num + 1))).all()
+    items = rows[:per_page_num]
+    has_more = len(rows) > per_page_num
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        next_cursor = encode_cursor({"s": sort_key, "v": getattr(last, sort_field), "id": last.id})
+    
+    return {
+        "data": [MenuResponse.model_validate(item).model_dump() for item in items],
+        "pagination": {
+            "total": total,
+            "per_page": per_page_num,
+            "total_pages": _pagination_total_pages(total, per_page_num),
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+    }
+
+
+def _parse_category_sort(sort):
+    """(field, descending) for ordering items inside a category; id:asc by default."""
+    if sort and sort.strip():
+        try:
+            field, order = sort.strip().split(":")
+            if field in CURSOR_SORT_FIELDS:
+                return field, order.lower() == "desc"
+        except ValueError:
+            pass  # Invalid sort format, keep id order
+    return "id", False
+
+
+def _top_per_category_query(db: AsyncSession, per_category: int, sort_field: str, descending: bool):
+    """
+    One query returning the first `per_category` menus of every category,
+    ordered by category and then by `sort_field` (id breaks ties).
+
+    Uses ROW_NUMBER() OVER (PARTITION BY category ...); SQLite builds older
+    than 3.25 lack window functions and get a correlated LIMIT subquery
+    instead, which is still a single statement.
+    """
+    def order_by(model):
+        column = getattr(model, sort_field)
+        if descending:
+            return [column.desc(), model.id.desc()]
+        return [column.asc(), model.id.asc()]
+
+    if db.bind.dialect.name == "sqlite" and sqlite3.sqlite_version_info < (3, 25, 0):
+        inner = aliased(Menu)
+        top_ids = (
+            select(inner.id)
+            .where(inner.category == Menu.category)
+            .order_by(*order_by(inner))
+            .limit(per_category)
+        )
+        return select(Menu).where(Menu.id.in_(top_ids)).order_by(Menu.category, *order_by(Menu))
+
+    ranked = select(
+        Menu.id,
+        func.row_number().over(partition_by=Menu.category, order_by=order_by(Menu)).label("rn"),
+    ).subquery()
+    return (
+        select(Menu)
+        .join(ranked, Menu.id == ranked.c.id)
+        .where(ranked.c.rn <= per_category)
+        .order_by(Menu.category, ranked.c.rn)
+    )
+
+
 @router.get("/menu/group-by-category")
 async def group_by_category(
+    request: Request,
     mode: Literal["count", "list"] = Query("count", description="Mode: count or list"),
     per_category: int = Query(5, ge=1, le=100, description="Items per category (only for list mode)"),
+    sort: Optional[str] = Query(None, description="Order within each category, field:order (e.g., price:asc; only for list mode)"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
-        with SessionLocal() as db:
+        async def build():
             if mode == "count":
                 # Return count of items per category
-                result = db.query(
-                    Menu.category,
-                    func.count(Menu.id).label("count")
-                ).group_by(Menu.category).all()
-                
+                result = (await db.execute(
+                    select(
+                        Menu.category,
+                        func.count(Menu.id).label("count")
+                    ).group_by(Menu.category)
+                )).all()
+            
                 data = {row.category: row.count for row in result}
                 return {"data": data}
             
             else:  # mode == "list"
-                # Return list of items per category
-                categories = db.query(Menu.category).distinct().all()
+                # Return the first items per category in one query
+                query = _top_per_category_query(db, per_category, sort_field, descending)
                 data = {}
-                
-                for (cat,) in categories:
-                    items = db.query(Menu).filter(Menu.category == cat).limit(per_category).all()
-                    data[cat] = [MenuResponse.model_validate(item).model_dump() for item in items]
-                
+                for item in (await db.scalars(query)).all():
+                    data.setdefault(item.category, []).append(
+                        MenuResponse.model_validate(item).model_dump()
+                    )
+            
                 return {"data": data}
+        
+        sort_field, descending = _parse_category_sort(sort)
+        params = {"mode": mode, "per_category": per_category, "sort": f"{sort_field}:{descending}"}
+        return await _cached_response(request, "group-by-category", params, build)
     
     except Exception as e:
         logger.exception("Failed to group by category")
@@ -190,6 +569,7 @@ async def search_menu(
     q: str = Query(..., description="Search query"),
     page: Optional[str] = Query("1", description="Page number"),
     per_page: Optional[str] = Query("10", description="Items per page"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
         # Parse pagination
@@ -205,36 +585,28 @@ async def search_menu(
         except ValueError:
             per_page_num = 10
         
-        # Get all menu items
-        with SessionLocal() as db:
-            all_items = db.query(Menu).all()
-            menu_items = [MenuResponse.model_validate(item).model_dump() for item in all_items]
-        
         # If Gemini is available, use it for semantic search
         if gemini_service.is_available():
             # Parse query with Gemini
-            filters = gemini_service.parse_search_query(q, menu_items)
-            
-            # Apply filters
-            filtered_items = gemini_service.filter_menu_items(menu_items, filters)
+            filters = await gemini_service.parse_search_query_async(q)
         else:
             # Fallback to simple keyword search
-            q_lower = q.lower()
-            filtered_items = [
-                item for item in menu_items
-                if q_lower in item.get("name", "").lower()
-                or q_lower in item.get("description", "").lower()
-                or q_lower in " ".join(item.get("ingredients", [])).lower()
-            ]
+            filters = {"keywords": [q.lower()]}
         
-        # Apply pagination
-        total = len(filtered_items)
+        # Filter and paginate in SQL so only the requested page is loaded
+        query = select(Menu).where(*_search_conditions(filters))
+        query, ranked = await _apply_keywords(db, query, _search_keywords(filters))
+        if not ranked:
+            query = query.order_by(Menu.id)
+        total = await db.scalar(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
         offset = (page_num - 1) * per_page_num
-        paginated_items = filtered_items[offset:offset + per_page_num]
+        items = (await db.scalars(query.offset(offset).limit(per_page_num))).all()
         total_pages = (total + per_page_num - 1) // per_page_num
         
         return {
-            "data": paginated_items,
+            "data": [MenuResponse.model_validate(item).model_dump() for item in items],
             "pagination": {
                 "total": total,
                 "page": page_num,
@@ -249,40 +621,43 @@ async def search_menu(
 
 
 @router.get("/menu/{menu_id}")
-async def get_menu(menu_id: int):
+async def get_menu(menu_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        menu = await db.get(Menu, menu_id)
+        if not menu:
+            return JSONResponse(
+                status_code=404,
+                content={"message": f"Menu with id {menu_id} not found"}
+            )
+        return {"data": MenuResponse.model_validate(menu).model_dump()}
+
     try:
-        with SessionLocal() as db:
-            menu = db.query(Menu).filter(Menu.id == menu_id).first()
-            if not menu:
-                return JSONResponse(
-                    status_code=404,
-                    content={"message": f"Menu with id {menu_id} not found"}
-                )
-            return {"data": MenuResponse.model_validate(menu).model_dump()}
+        return await _cached_response(request, "get", {"id": menu_id}, build)
     except Exception as e:
         logger.exception("Failed to get menu")
         raise HTTPException(status_code=500, detail=f"Failed to get menu: {str(e)}")
 
 
 @router.put("/menu/{menu_id}", response_model=MenuUpdateResponse)
-async def update_menu(menu_id: int, menu: MenuUpdate):
+async def update_menu(menu_id: int, menu: MenuUpdate, db: AsyncSession = Depends(get_async_db)):
     try:
-        with SessionLocal() as db:
-            db_menu = db.query(Menu).filter(Menu.id == menu_id).first()
-            if not db_menu:
-                raise HTTPException(status_code=404, detail=f"Menu with id {menu_id} not found")
-            
-            # Update all fields
-            for key, value in menu.model_dump().items():
-                setattr(db_menu, key, value)
-            
-            db.commit()
-            db.refresh(db_menu)
-            
-            return MenuUpdateResponse(
-                message="Menu updated successfully",
-                data=MenuResponse.model_validate(db_menu)
-            )
+        db_menu = await db.get(Menu, menu_id)
+        if not db_menu:
+            raise HTTPException(status_code=404, detail=f"Menu with id {menu_id} not found")
+        
+        # Update all fields
+        for key, value in menu.model_dump().items():
+            setattr(db_menu, key, value)
+        
+        await db.commit()
+        await db.refresh(db_menu)
+        menu_index.update(db_menu)
+        menu_response_cache.bump()
+        
+        return MenuUpdateResponse(
+            message="Menu updated successfully",
+            data=MenuResponse.model_validate(db_menu)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -291,17 +666,18 @@ async def update_menu(menu_id: int, menu: MenuUpdate):
 
 
 @router.delete("/menu/{menu_id}", response_model=MenuDeleteResponse)
-async def delete_menu(menu_id: int):
+async def delete_menu(menu_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        with SessionLocal() as db:
-            db_menu = db.query(Menu).filter(Menu.id == menu_id).first()
-            if not db_menu:
-                raise HTTPException(status_code=404, detail=f"Menu with id {menu_id} not found")
-            
-            db.delete(db_menu)
-            db.commit()
-            
-            return MenuDeleteResponse(message=f"Menu with id {menu_id} deleted successfully")
+        db_menu = await db.get(Menu, menu_id)
+        if not db_menu:
+            raise HTTPException(status_code=404, detail=f"Menu with id {menu_id} not found")
+        
+        await db.delete(db_menu)
+        await db.commit()
+        menu_index.remove(menu_id)
+        menu_response_cache.bump()
+        
+        return MenuDeleteResponse(message=f"Menu with id {menu_id} deleted successfully")
     except HTTPException:
         raise
     except Exception as e:
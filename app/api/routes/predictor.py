@@ -1,25 +1,65 @@
-import json
-from pathlib import Path
+from typing import List, Optional, Union
 
-import joblib
-from ...core.config import INPUT_EXAMPLE
-from fastapi import APIRouter, HTTPException
+import numpy as np
+from ...core.config import (
+    INPUT_EXAMPLE,
+    PREDICT_BATCH_MAX_ROWS,
+    PREDICT_CACHE_LOG_HITS,
+    PREDICT_MICRO_BATCH_MAX_SIZE,
+    PREDICT_MICRO_BATCH_MAX_WAIT_MS,
+    PREDICT_MICRO_BATCHING,
+)
+from fastapi import APIRouter, Body, HTTPException, Query, Response
 from fastapi.concurrency import run_in_threadpool
-from loguru import logger
-from ...db import SessionLocal
-from ...models.log import RequestLog
+from ...core.errors import ModelNotFoundException, PredictException
 from ...models.prediction import (
     HealthResponse,
+    MachineLearningBatchResponse,
+    MachineLearningBatcherMetrics,
+    MachineLearningColumnarInput,
     MachineLearningDataInput,
     MachineLearningResponse,
+    ModelRegistryStatus,
+    ReadinessResponse,
+    rows_to_np_array,
 )
-from ...services.predict import MachineLearningModelHandlerScore as model
+from ...services.batching import MicroBatcher
+from ...services.health import load_example, readiness
+from ...services.model_registry import model_registry
+from ...services.prediction_cache import prediction_cache
+from ...services.request_log import request_log_writer
 
 router = APIRouter()
 
+VERSION_QUERY = Query(None, description="Model version to score with (defaults to the active one)")
+
+
+def get_prediction(data_point, model_version=None):
+    if model_version is None:
+        model_version = model_registry.get()
+    return model_version.predict(data_point, method="predict")
 
-def get_prediction(data_point):
-    return model.predict(data_point, load_wrapper=joblib.load, method="predict")
+
+async def resolve_model(version: Optional[str] = None):
+    """Pin the model version for a request; 404 if it does not exist."""
+    if version is None:
+        active = model_registry.active
+        if active is not None:
+            return active
+    # a pinned or not yet loaded version may need loading from disk
+    try:
+        return await run_in_threadpool(model_registry.get, version)
+    except ModelNotFoundException as err:
+        raise HTTPException(status_code=404, detail=str(err)) from err
+
+
+# looked up at call time so the batcher always uses the current get_prediction;
+# rows are batched per model version
+batcher = MicroBatcher(
+    lambda data_points, model_version=None: get_prediction(data_points, model_version),
+    max_batch_size=PREDICT_MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=PREDICT_MICRO_BATCH_MAX_WAIT_MS,
+)
 
 
 def get_prediction_label(prediction):
@@ -28,55 +68,159 @@ def get_prediction_label(prediction):
     return "label nok"
 
 
+def get_prediction_labels(predictions):
+    return np.where(predictions == 1, "label ok", "label nok").tolist()
+
+
+async def log_request(request, response):
+    await request_log_writer.log(request, response)
+
+
 @router.post(
     "/predict",
     response_model=MachineLearningResponse,
     name="predict:get-data",
 )
-async def predict(data_input: MachineLearningDataInput):
+async def predict(data_input: MachineLearningDataInput, version: Optional[str] = VERSION_QUERY):
     if not data_input:
         raise HTTPException(status_code=404, detail="'data_input' argument invalid!")
+    model_version = await resolve_model(version)
     try:
         data_point = data_input.get_np_array()
-        prediction = await run_in_threadpool(get_prediction, data_point)
-        try:
-            prediction = float(prediction[0])
-        except (TypeError, IndexError, KeyError):
-            prediction = float(prediction)
+        cache_key = prediction_cache.key(data_point, model_version)
+        prediction = prediction_cache.get(cache_key)
+        cached = prediction is not None
+        if not cached:
+            if PREDICT_MICRO_BATCHING:
+                prediction = await batcher.submit(data_point, key=model_version)
+            else:
+                prediction = await run_in_threadpool(get_prediction, data_point, model_version)
+            try:
+                prediction = float(prediction[0])
+            except (TypeError, IndexError, KeyError):
+                prediction = float(prediction)
+            prediction_cache.set(cache_key, prediction)
         prediction_label = get_prediction_label(prediction)
-    except Exception as err:
+    except (Exception, PredictException) as err:
         raise HTTPException(status_code=500, detail=f"Exception: {err}") from err
 
     response = MachineLearningResponse(
-        prediction=prediction, prediction_label=prediction_label
+        prediction=prediction,
+        prediction_label=prediction_label,
+        model_version=model_version.version,
     )
 
+    if not cached or PREDICT_CACHE_LOG_HITS:
+        await log_request(data_input.model_dump(), response.model_dump())
+
+    return response
+
+
+@router.post(
+    "/predict/batch",
+    response_model=MachineLearningBatchResponse,
+    name="predict:get-batch",
+)
+async def predict_batch(
+    data_input: Union[List[MachineLearningDataInput], MachineLearningColumnarInput] = Body(...),
+    version: Optional[str] = VERSION_QUERY,
+):
+    """Score many rows with a single model call.
+
+    Accepts either a JSON array of rows or an object of equal-length feature
+    columns, e.g. ``{"feature1": [...], ..., "feature5": [...]}``.
+    """
+    size = len(data_input)
+    if size == 0:
+        raise HTTPException(status_code=422, detail="'data_input' must not be empty!")
+    if size > PREDICT_BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {size} rows exceeds limit of {PREDICT_BATCH_MAX_ROWS}",
+        )
+    model_version = await resolve_model(version)
     try:
-        with SessionLocal() as db:
-            db.add(
-                RequestLog(
-                    request=json.dumps(data_input.model_dump()),
-                    response=json.dumps(response.model_dump()),
-                )
+        if isinstance(data_input, MachineLearningColumnarInput):
+            data_points = data_input.get_np_array()
+        else:
+            data_points = rows_to_np_array(data_input)
+        predictions = await run_in_threadpool(get_prediction, data_points, model_version)
+        predictions = np.asarray(predictions, dtype=float).reshape(-1)
+        if predictions.shape[0] != size:
+            raise PredictException(
+                f"model returned {predictions.shape[0]} predictions for {size} rows"
             )
-            db.commit()
-    except Exception:
-        logger.exception("failed to log request")
+        prediction_labels = get_prediction_labels(predictions)
+    except (Exception, PredictException) as err:
+        raise HTTPException(status_code=500, detail=f"Exception: {err}") from err
+
+    response = MachineLearningBatchResponse(
+        predictions=predictions.tolist(),
+        prediction_labels=prediction_labels,
+        model_version=model_version.version,
+    )
+
+    await log_request({"rows": data_points.tolist()}, response.model_dump())
 
     return response
 
 
+@router.get(
+    "/predict/metrics",
+    response_model=MachineLearningBatcherMetrics,
+    name="predict:get-metrics",
+)
+async def predict_metrics():
+    return MachineLearningBatcherMetrics(enabled=PREDICT_MICRO_BATCHING, **batcher.stats())
+
+
 @router.get(
     "/health",
     response_model=HealthResponse,
     name="health:get-data",
 )
 async def health():
+    """Deep check, for on-demand use: scores the example input and refreshes readiness."""
     try:
-        content = await run_in_threadpool(Path(INPUT_EXAMPLE).read_text)
-        test_input = MachineLearningDataInput(**json.loads(content))
-        test_point = test_input.get_np_array()
-        await run_in_threadpool(get_prediction, test_point)
-        return HealthResponse(status=True)
-    except Exception:
+        model_version = await run_in_threadpool(model_registry.get)
+        test_point = await run_in_threadpool(load_example, INPUT_EXAMPLE)
+        await run_in_threadpool(get_prediction, test_point, model_version)
+        ready = await readiness.get(refresh=True)
+    except (Exception, ModelNotFoundException, PredictException):
+        raise HTTPException(status_code=404, detail="Unhealthy")
+    if not ready["status"]:
         raise HTTPException(status_code=404, detail="Unhealthy")
+    return HealthResponse(status=True, model_version=model_version.version)
+
+
+@router.get(
+    "/health/live",
+    response_model=HealthResponse,
+    name="health:get-live",
+)
+async def health_live():
+    """Liveness: the worker is serving requests. Touches nothing else."""
+    return HealthResponse(status=True)
+
+
+@router.get(
+    "/health/ready",
+    response_model=ReadinessResponse,
+    name="health:get-ready",
+)
+async def health_ready(response: Response):
+    """Readiness: model loaded, database reachable, pool not exhausted (cached briefly)."""
+    result = await readiness.get()
+    if not result["status"]:
+        response.status_code = 503
+    return ReadinessResponse(**result)
+
+
+@router.get(
+    "/models",
+    response_model=ModelRegistryStatus,
+    name="models:get-status",
+)
+async def models_status():
+    """Active, loaded, available and rejected model versions."""
+    return ModelRegistryStatus(**await run_in_threadpool(model_registry.stats))
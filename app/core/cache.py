@@ -0,0 +1,202 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUCache(object):
+    """Thread-safe LRU cache with a size bound and a per-entry TTL.
+
+    ``ttl`` is in seconds; ``None`` or ``0`` keeps entries until evicted.
+    Expiry uses wall-clock time so entries can be persisted with ``dump``.
+    With ``maxbytes``, ``sizeof(value)`` weighs each entry and the least
+    recently used ones are evicted until the total fits.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        maxbytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl or None
+        self.maxbytes = maxbytes or None
+        self.sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry
+                if expires is None or expires > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._discard(key)
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = ttl or self.ttl
+        expires = time.time() + ttl if ttl else None
+        with self._lock:
+            self._discard(key)
+            self._data[key] = (value, expires)
+            if self.maxbytes:
+                size = self.sizeof(value) if self.sizeof else 0
+                self._sizes[key] = size
+                self.nbytes += size
+            self._evict()
+
+    def _discard(self, key: Hashable) -> Any:
+        entry = self._data.pop(key, _MISSING)
+        self.nbytes -= self._sizes.pop(key, 0)
+        return entry
+
+    def _evict(self) -> None:
+        while self._data and (
+            len(self._data) > self.maxsize
+            or (self.maxbytes and self.nbytes > self.maxbytes)
+        ):
+            key = next(iter(self._data))
+            self._discard(key)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._discard(key)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "bytes": self.nbytes,
+                "maxbytes": self.maxbytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def dump(self, path: str) -> None:
+        """Write unexpired entries (string keys, JSON values) to ``path``."""
+        now = time.time()
+        with self._lock:
+            entries = [
+                [key, value, expires]
+                for key, (value, expires) in self._data.items()
+                if expires is None or expires > now
+            ]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """Load entries written by ``dump``; returns how many were kept."""
+        if not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            entries = json.load(f)
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            for key, value, expires in entries:
+                if expires is None or expires > now:
+                    self._discard(key)
+                    self._data[key] = (value, expires)
+                    if self.maxbytes:
+                        size = self.sizeof(value) if self.sizeof else 0
+                        self._sizes[key] = size
+                        self.nbytes += size
+                    loaded += 1
+            self._evict()
+        return loaded
+
+
+class _Call(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Collapse concurrent calls for the same key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except Exception as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+class AsyncSingleFlight(object):
+    """asyncio counterpart of SingleFlight for coroutine functions."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future"] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is not None and future.get_loop() is asyncio.get_running_loop():
+            self.shared += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(fn())
+        self._calls[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
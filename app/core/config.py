@@ -13,9 +13,17 @@ VERSION = "0.1.0"
 DEBUG: bool = config("DEBUG", cast=bool, default=False)
 MAX_CONNECTIONS_COUNT: int = config("MAX_CONNECTIONS_COUNT", cast=int, default=10)
 MIN_CONNECTIONS_COUNT: int = config("MIN_CONNECTIONS_COUNT", cast=int, default=10)
+# -1 derives overflow from MAX_CONNECTIONS_COUNT - MIN_CONNECTIONS_COUNT
+DB_POOL_MAX_OVERFLOW: int = config("DB_POOL_MAX_OVERFLOW", cast=int, default=-1)
+DB_POOL_TIMEOUT: float = config("DB_POOL_TIMEOUT", cast=float, default=30.0)
+DB_POOL_RECYCLE: int = config("DB_POOL_RECYCLE", cast=int, default=1800)
+DB_POOL_PRE_PING: bool = config("DB_POOL_PRE_PING", cast=bool, default=True)
+DB_SQLITE_WAL: bool = config("DB_SQLITE_WAL", cast=bool, default=True)
 SECRET_KEY: Secret = config("SECRET_KEY", cast=Secret, default="")
 MEMOIZATION_FLAG: bool = config("MEMOIZATION_FLAG", cast=bool, default=True)
 DATABASE_URL: str = config("DATABASE_URL", default="sqlite:///./app.db")
+# derived from DATABASE_URL (asyncpg / aiosqlite) when left empty
+ASYNC_DATABASE_URL: str = config("ASYNC_DATABASE_URL", default="")
 
 PROJECT_NAME: str = config("PROJECT_NAME", default="Penugasan-GDGoC-BE")
 
@@ -26,8 +34,107 @@ logging.basicConfig(
 )
 logger.configure(handlers=[{"sink": sys.stderr, "level": LOGGING_LEVEL}])
 
+REQUEST_LOG_QUEUE_SIZE: int = config("REQUEST_LOG_QUEUE_SIZE", cast=int, default=10000)
+REQUEST_LOG_FLUSH_SIZE: int = config("REQUEST_LOG_FLUSH_SIZE", cast=int, default=500)
+REQUEST_LOG_FLUSH_INTERVAL: float = config(
+    "REQUEST_LOG_FLUSH_INTERVAL", cast=float, default=1.0
+)
+# what to do when the log queue is full: "drop" or "block"
+REQUEST_LOG_FULL_POLICY: str = config("REQUEST_LOG_FULL_POLICY", default="drop")
+
+# keyword search backend for menus: "fts" (database full-text index) or
+# "memory" (in-process inverted index built at startup)
+MENU_SEARCH_BACKEND: str = config("MENU_SEARCH_BACKEND", default="fts")
+# the memory backend filters SQL with `id IN (...)`; above this many matches
+# the database search is used instead, keeping statements small
+MENU_INDEX_MAX_IDS: int = config("MENU_INDEX_MAX_IDS", cast=int, default=500)
+
 MODEL_PATH = config("MODEL_PATH", default="./ml/model/")
 MODEL_NAME = config("MODEL_NAME", default="model.pkl")
 INPUT_EXAMPLE = config("INPUT_EXAMPLE", default="./ml/model/examples/example.json")
+# every *.pkl / *.joblib file in MODEL_PATH is a model version named after its
+# file stem; the directory is polled every MODEL_WATCH_INTERVAL seconds (0
+# disables hot reload) and at most MODEL_MAX_LOADED versions stay in memory
+MODEL_WATCH_INTERVAL: float = config("MODEL_WATCH_INTERVAL", cast=float, default=5.0)
+MODEL_MAX_LOADED: int = config("MODEL_MAX_LOADED", cast=int, default=3)
+# "memory" loads a private copy per worker; "mmap" maps the model's arrays
+# read-only so all workers share them through the page cache. mmap needs an
+# uncompressed joblib dump; set MODEL_MMAP_DIR to convert other files there once
+MODEL_LOAD_MODE: str = config("MODEL_LOAD_MODE", default="memory")
+MODEL_MMAP_DIR: str = config("MODEL_MMAP_DIR", default="")
+# inference backend: "sklearn" calls the unpickled model, "onnx" runs it on
+# ONNX Runtime (needs the `onnx` extra) if it matches sklearn's outputs within
+# INFERENCE_ATOL on the example input, otherwise sklearn is kept
+INFERENCE_BACKEND: str = config("INFERENCE_BACKEND", default="sklearn")
+INFERENCE_ATOL: float = config("INFERENCE_ATOL", cast=float, default=1e-5)
+INFERENCE_THREADS: int = config("INFERENCE_THREADS", cast=int, default=1)
+# /health/ready reuses its last result for HEALTH_READY_TTL seconds; the
+# database ping gives up after HEALTH_DB_TIMEOUT seconds, and the pool counts
+# as unhealthy for HEALTH_POOL_TIMEOUT_WINDOW seconds after a checkout timeout
+HEALTH_READY_TTL: float = config("HEALTH_READY_TTL", cast=float, default=2.0)
+HEALTH_DB_TIMEOUT: float = config("HEALTH_DB_TIMEOUT", cast=float, default=1.0)
+HEALTH_POOL_TIMEOUT_WINDOW: float = config("HEALTH_POOL_TIMEOUT_WINDOW", cast=float, default=30.0)
+PREDICT_BATCH_MAX_ROWS: int = config("PREDICT_BATCH_MAX_ROWS", cast=int, default=10000)
+PREDICT_MICRO_BATCHING: bool = config("PREDICT_MICRO_BATCHING", cast=bool, default=True)
+PREDICT_MICRO_BATCH_MAX_SIZE: int = config("PREDICT_MICRO_BATCH_MAX_SIZE", cast=int, default=64)
+PREDICT_MICRO_BATCH_MAX_WAIT_MS: float = config(
+    "PREDICT_MICRO_BATCH_MAX_WAIT_MS", cast=float, default=2.0
+)
+# cache of /predict results keyed by the rounded feature vector and model
+# version; cleared whenever the active model changes. Cache hits are still
+# written to the request log unless PREDICT_CACHE_LOG_HITS is off
+PREDICT_CACHE_ENABLED: bool = config("PREDICT_CACHE_ENABLED", cast=bool, default=False)
+PREDICT_CACHE_SIZE: int = config("PREDICT_CACHE_SIZE", cast=int, default=4096)
+PREDICT_CACHE_TTL: float = config("PREDICT_CACHE_TTL", cast=float, default=300.0)
+PREDICT_CACHE_DECIMALS: int = config("PREDICT_CACHE_DECIMALS", cast=int, default=6)
+PREDICT_CACHE_LOG_HITS: bool = config("PREDICT_CACHE_LOG_HITS", cast=bool, default=True)
 
 GEMINI_API_KEY: str = config("GEMINI_API_KEY", default="")
+# per-call timeout (seconds) and in-flight limit for async Gemini calls
+GEMINI_TIMEOUT: float = config("GEMINI_TIMEOUT", cast=float, default=30.0)
+GEMINI_MAX_CONCURRENCY: int = config("GEMINI_MAX_CONCURRENCY", cast=int, default=256)
+# cache of Gemini-parsed menu search queries; SEARCH_CACHE_PATH persists it
+SEARCH_CACHE_SIZE: int = config("SEARCH_CACHE_SIZE", cast=int, default=1024)
+SEARCH_CACHE_TTL: float = config("SEARCH_CACHE_TTL", cast=float, default=3600.0)
+SEARCH_CACHE_PATH: str = config("SEARCH_CACHE_PATH", default="")
+
+# chat context assembly: the last CHAT_CONTEXT_RECENT_MESSAGES turns are sent
+# verbatim, older turns are folded into a rolling summary (once at least
+# CHAT_SUMMARY_BATCH of them have piled up); the whole history is kept under
+# CHAT_CONTEXT_TOKEN_BUDGET estimated tokens
+CHAT_CONTEXT_RECENT_MESSAGES: int = config("CHAT_CONTEXT_RECENT_MESSAGES", cast=int, default=8)
+CHAT_CONTEXT_TOKEN_BUDGET: int = config("CHAT_CONTEXT_TOKEN_BUDGET", cast=int, default=2000)
+CHAT_SUMMARY_MAX_TOKENS: int = config("CHAT_SUMMARY_MAX_TOKENS", cast=int, default=400)
+CHAT_SUMMARY_BATCH: int = config("CHAT_SUMMARY_BATCH", cast=int, default=4)
+
+# write-behind buffering of conversation messages: inserts from all requests
+# are grouped into one transaction per CONVERSATION_FLUSH_INTERVAL seconds
+CONVERSATION_WRITE_BEHIND: bool = config("CONVERSATION_WRITE_BEHIND", cast=bool, default=False)
+CONVERSATION_FLUSH_INTERVAL: float = config("CONVERSATION_FLUSH_INTERVAL", cast=float, default=0.05)
+CONVERSATION_FLUSH_SIZE: int = config("CONVERSATION_FLUSH_SIZE", cast=int, default=500)
+# failed flushes keep their messages and are retried this many times, with
+# doubling delays, before the messages are dropped
+CONVERSATION_FLUSH_RETRIES: int = config("CONVERSATION_FLUSH_RETRIES", cast=int, default=3)
+
+# cache of active conversations (token -> id, summary state, recent
+# messages): "memory", "none", or "package.module:Class" for a shared backend
+CONVERSATION_CACHE_BACKEND: str = config("CONVERSATION_CACHE_BACKEND", default="memory")
+CONVERSATION_CACHE_SIZE: int = config("CONVERSATION_CACHE_SIZE", cast=int, default=1024)
+CONVERSATION_CACHE_MAX_BYTES: int = config(
+    "CONVERSATION_CACHE_MAX_BYTES", cast=int, default=32 * 1024 * 1024
+)
+CONVERSATION_CACHE_TTL: float = config("CONVERSATION_CACHE_TTL", cast=float, default=600.0)
+
+# response cache for menu reads (GET /menu, /menu/{id}, /menu/group-by-category);
+# invalidated by menu writes in this process, MENU_CACHE_TTL bounds staleness
+# across workers
+MENU_CACHE_ENABLED: bool = config("MENU_CACHE_ENABLED", cast=bool, default=True)
+MENU_CACHE_SIZE: int = config("MENU_CACHE_SIZE", cast=int, default=512)
+MENU_CACHE_TTL: float = config("MENU_CACHE_TTL", cast=float, default=60.0)
+
+# POST /menu/bulk: rows validated and committed per transaction; uploads are
+# spooled to disk above MENU_BULK_SPOOL_BYTES
+MENU_BULK_BATCH_SIZE: int = config("MENU_BULK_BATCH_SIZE", cast=int, default=1000)
+MENU_BULK_SPOOL_BYTES: int = config("MENU_BULK_SPOOL_BYTES", cast=int, default=8 * 1024 * 1024)
+# rows fetched per round-trip when streaming menus (export, NDJSON listings)
+MENU_STREAM_CHUNK_SIZE: int = config("MENU_STREAM_CHUNK_SIZE", cast=int, default=500)
@@ -1,30 +1,86 @@
+import os
 from typing import Callable
 
-import joblib
 from fastapi import FastAPI
 from loguru import logger
+from sqlalchemy import select
 from sqlalchemy.exc import OperationalError
 
-from .config import MEMOIZATION_FLAG
-from ..db import Base, engine
+from .config import INPUT_EXAMPLE, MEMOIZATION_FLAG, MENU_SEARCH_BACKEND
+from ..db import Base, SessionLocal, async_engine, engine
+from ..models.menu import Menu
+from ..services.conversations import ensure_history_index, message_buffer
+from ..services.gemini_search import gemini_service
+from ..services.health import load_example
+from ..services.menu_fts import ensure_text_index, menu_fts
+from ..services.menu_index import menu_index
+from ..services.model_loading import memory_usage
+from ..services.model_registry import model_registry
+from ..services.request_log import request_log_writer
 
 
 def preload_model():
     """
-    In order to load model on memory to each worker
+    In order to load model on memory to each worker and pick up new versions
     """
-    from services.predict import MachineLearningModelHandlerScore
+    model_registry.start(preload=True)
+    resident, private = memory_usage()
+    logger.info(
+        "worker {} after model preload ({}): rss {:.1f} MiB, private {:.1f} MiB",
+        os.getpid(), model_registry.load_mode, resident / 2**20, private / 2**20,
+    )
 
-    MachineLearningModelHandlerScore.get_model(joblib.load)
+
+def build_menu_index():
+    """
+    In order to serve keyword search from the in-process inverted index
+    """
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(Menu.id, Menu.name, Menu.description, Menu.ingredients)
+        ).all()
+    menu_index.build(rows)
+    logger.info("menu index built: {}", menu_index.stats())
 
 
 def create_start_app_handler(app: FastAPI) -> Callable:
     def start_app() -> None:
         if MEMOIZATION_FLAG:
             preload_model()
+        else:
+            model_registry.start(preload=False)
+        try:
+            # health checks score this; parse it once instead of per probe
+            load_example(INPUT_EXAMPLE)
+        except (OSError, ValueError):
+            logger.warning("example input {} could not be loaded", INPUT_EXAMPLE)
         try:
             Base.metadata.create_all(bind=engine)
+            with engine.begin() as conn:
+                # requests use the async engine on the same database
+                menu_fts.record(async_engine, ensure_text_index(conn))
+                ensure_history_index(conn)
         except OperationalError:
             logger.exception("failed to initialize database")
+        gemini_service.load_cache()
+        if MENU_SEARCH_BACKEND == "memory":
+            try:
+                build_menu_index()
+            except OperationalError:
+                logger.exception("failed to build menu index")
 
     return start_app
+
+
+def create_stop_app_handler(app: FastAPI) -> Callable:
+    async def stop_app() -> None:
+        from ..api.routes.predictor import batcher
+
+        await batcher.close()
+        model_registry.stop()
+        await request_log_writer.close()
+        await message_buffer.close()
+        gemini_service.save_cache()
+        await async_engine.dispose()
+
+    return stop_app
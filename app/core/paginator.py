@@ -1,3 +1,8 @@
+import base64
+import binascii
+import json
+
+
 def pagenation(
     page_number=1, page_size=20, total_count=0, data=None, start_page_as_1=True
 ):
@@ -33,3 +38,21 @@ def pagenation(
         "totalCount": total_count,
         "listings": data[begin:end],
     }
+
+
+def encode_cursor(payload):
+    """Return an opaque, url-safe token for a keyset pagination position."""
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor. Raises ValueError on malformed tokens."""
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError) as err:
+        raise ValueError("malformed cursor") from err
+    if not isinstance(payload, dict):
+        raise ValueError("malformed cursor")
+    return payload
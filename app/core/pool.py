@@ -0,0 +1,159 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+
+from .config import (
+    DB_POOL_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_TIMEOUT,
+    DB_SQLITE_WAL,
+    MAX_CONNECTIONS_COUNT,
+    MIN_CONNECTIONS_COUNT,
+)
+
+
+class PoolWaitStats(object):
+    """Time spent waiting for a connection to be handed out by the pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        # time.monotonic() of the latest checkout timeout
+        self.last_timeout: Optional[float] = None
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                self.last_timeout = time.monotonic()
+            else:
+                self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "total_wait_ms": self.total_wait * 1000.0,
+                "mean_wait_ms": self.total_wait * 1000.0 / calls if calls else 0.0,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
+
+
+class _TimedPoolMixin(object):
+    @property
+    def wait_stats(self) -> PoolWaitStats:
+        return self.__dict__.setdefault("_wait_stats", PoolWaitStats())
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return conn
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def is_sqlite_memory(url: str) -> bool:
+    return is_sqlite(url) and (url.endswith("://") or ":memory:" in url)
+
+
+def get_pool_size() -> int:
+    return max(1, MIN_CONNECTIONS_COUNT)
+
+
+def get_max_overflow() -> int:
+    """Explicit DB_POOL_MAX_OVERFLOW, else the gap between MAX and MIN counts."""
+    if DB_POOL_MAX_OVERFLOW >= 0:
+        return DB_POOL_MAX_OVERFLOW
+    return max(0, MAX_CONNECTIONS_COUNT - get_pool_size())
+
+
+def get_engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for create_engine / create_async_engine."""
+    options: Dict[str, Any] = {}
+    if is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+        if is_sqlite_memory(url):
+            # one shared connection, otherwise every checkout sees an empty db
+            options["poolclass"] = StaticPool
+            return options
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_size=get_pool_size(),
+        max_overflow=get_max_overflow(),
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    return options
+
+
+def configure_sqlite(engine, url: str) -> None:
+    """Switch file-backed SQLite databases to WAL on every new connection."""
+    if not DB_SQLITE_WAL or not is_sqlite(url) or is_sqlite_memory(url):
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        finally:
+            cursor.close()
+
+
+def get_pool_stats(engine) -> Dict[str, Any]:
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    if isinstance(pool, _TimedPoolMixin):
+        stats["wait"] = pool.wait_stats.as_dict()
+    return stats
+
+
+def is_pool_healthy(engine, window: float = 30.0) -> bool:
+    """
+    False when a checkout timed out within the last `window` seconds. A pool
+    with every connection in use is only busy; it is unhealthy once callers
+    give up waiting for one.
+    """
+    pool = engine.pool
+    if not isinstance(pool, _TimedPoolMixin):
+        return True
+    last_timeout = pool.wait_stats.last_timeout
+    return last_timeout is None or time.monotonic() - last_timeout > window
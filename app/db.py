@@ -1,8 +1,38 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-from .core.config import DATABASE_URL
+from .core.config import ASYNC_DATABASE_URL, DATABASE_URL
+from .core.pool import configure_sqlite, get_engine_options
 
-engine = create_engine(DATABASE_URL)
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its asyncio driver (asyncpg / aiosqlite)."""
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+# sync engine: startup DDL and maintenance scripts
+engine = create_engine(DATABASE_URL, **get_engine_options(DATABASE_URL))
+configure_sqlite(engine, DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# async engine: everything on the request path
+ASYNC_URL = ASYNC_DATABASE_URL or get_async_database_url(DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_URL, **get_engine_options(ASYNC_URL, is_async=True)
+)
+configure_sqlite(async_engine.sync_engine, ASYNC_URL)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 Base = declarative_base()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,7 +1,7 @@
 from .api.routes.api import router as api_router
 from .api.routes.ui import router as ui_router
 from .core.config import API_PREFIX, DEBUG, MEMOIZATION_FLAG, PROJECT_NAME, VERSION
-from .core.events import create_start_app_handler
+from .core.events import create_start_app_handler, create_stop_app_handler
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
@@ -12,6 +12,7 @@ def get_application() -> FastAPI:
     application.include_router(ui_router)
     application.include_router(api_router, prefix=API_PREFIX)
     application.add_event_handler("startup", create_start_app_handler(application))
+    application.add_event_handler("shutdown", create_stop_app_handler(application))
     return application
 
 
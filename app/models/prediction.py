@@ -1,15 +1,66 @@
+from typing import Dict, List, Optional
+
 import numpy as np
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+
+FEATURE_NAMES = ("feature1", "feature2", "feature3", "feature4", "feature5")
 
 
 class MachineLearningResponse(BaseModel):
     prediction: float
     prediction_label: str
+    model_version: Optional[str] = None
+
+
+class MachineLearningBatchResponse(BaseModel):
+    predictions: List[float]
+    prediction_labels: List[str]
+    model_version: Optional[str] = None
+
+
+class MachineLearningBatcherMetrics(BaseModel):
+    enabled: bool
+    queue_depth: int
+    inflight_batches: int
+    batches_total: int
+    rows_total: int
+    last_batch_size: int
+    max_batch_size_seen: int
+    mean_batch_size: float
+    max_batch_size: int
+    max_wait_ms: float
 
 
 class HealthResponse(BaseModel):
     status: bool
+    model_version: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    status: bool
+    checks: Dict[str, bool]
+    model_version: Optional[str] = None
+
+
+class ModelLoadInfo(BaseModel):
+    load_seconds: float
+    rss_delta: int
+    private_delta: int
+    backend: Optional[str] = None
+
+
+class ModelRegistryStatus(BaseModel):
+    active: Optional[str]
+    loaded: List[str]
+    load_mode: str
+    versions: Dict[str, ModelLoadInfo]
+    process_rss: int
+    process_private: int
+    available: List[str]
+    rejected: Dict[str, str]
+    swaps: int
+    watching: bool
 
 
 class MachineLearningDataInput(BaseModel):
@@ -31,3 +82,35 @@ class MachineLearningDataInput(BaseModel):
                 ]
             ]
         )
+
+
+class MachineLearningColumnarInput(BaseModel):
+    """Batch input in columnar form: one list of values per feature."""
+
+    feature1: List[float]
+    feature2: List[float]
+    feature3: List[float]
+    feature4: List[float]
+    feature5: List[float]
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        lengths = {len(getattr(self, name)) for name in FEATURE_NAMES}
+        if len(lengths) != 1:
+            raise ValueError("all feature columns must have the same length")
+        return self
+
+    def __len__(self):
+        return len(self.feature1)
+
+    def get_np_array(self):
+        return np.column_stack(
+            [np.asarray(getattr(self, name), dtype=float) for name in FEATURE_NAMES]
+        )
+
+
+def rows_to_np_array(rows: List[MachineLearningDataInput]):
+    """Stack row inputs into a single (n, 5) matrix."""
+    return np.array(
+        [[getattr(row, name) for name in FEATURE_NAMES] for row in rows], dtype=float
+    ).reshape(len(rows), len(FEATURE_NAMES))
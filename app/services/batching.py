@@ -0,0 +1,106 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from ..core.errors import PredictException
+
+
+class MicroBatcher(object):
+    """Coalesce concurrent single-row predictions into one vectorized call.
+
+    Rows submitted within ``max_wait_ms`` of the first pending row (or until
+    ``max_batch_size`` rows are pending) are stacked into one matrix, scored
+    with a single ``predict_fn`` call in the threadpool, and each caller gets
+    back its own slice of the result. Rows submitted with a ``key`` (e.g. the
+    model version to score with) are only batched with rows of the same key
+    and scored with ``predict_fn(rows, key)``.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[Any], Any],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._pending: List[Tuple[Any, asyncio.Future, Any]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight = set()
+        self._batches_total = 0
+        self._rows_total = 0
+        self._last_batch_size = 0
+        self._max_batch_size_seen = 0
+
+    async def submit(self, data_point, key=None):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((data_point, future, key))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        groups: Dict[Any, List[Tuple[Any, asyncio.Future]]] = {}
+        for data_point, future, key in pending:
+            groups.setdefault(key, []).append((data_point, future))
+        for key, batch in groups.items():
+            task = asyncio.ensure_future(self._run(batch, key))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch, key=None):
+        size = len(batch)
+        self._batches_total += 1
+        self._rows_total += size
+        self._last_batch_size = size
+        self._max_batch_size_seen = max(self._max_batch_size_seen, size)
+        try:
+            rows = np.vstack([data_point for data_point, _ in batch])
+            if key is None:
+                predictions = await run_in_threadpool(self.predict_fn, rows)
+            else:
+                predictions = await run_in_threadpool(self.predict_fn, rows, key)
+            predictions = np.asarray(predictions).reshape(-1)
+            if predictions.shape[0] != size:
+                raise PredictException(
+                    f"model returned {predictions.shape[0]} predictions for {size} rows"
+                )
+        except (Exception, PredictException) as err:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(err)
+            return
+        for i, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(predictions[i : i + 1])
+
+    async def close(self):
+        """Score whatever is still pending and wait for in-flight batches."""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self._pending),
+            "inflight_batches": len(self._inflight),
+            "batches_total": self._batches_total,
+            "rows_total": self._rows_total,
+            "last_batch_size": self._last_batch_size,
+            "max_batch_size_seen": self._max_batch_size_seen,
+            "mean_batch_size": (
+                self._rows_total / self._batches_total if self._batches_total else 0.0
+            ),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
@@ -0,0 +1,127 @@
+import importlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from ..core.cache import LRUCache
+from ..core.config import (
+    CONVERSATION_CACHE_BACKEND,
+    CONVERSATION_CACHE_MAX_BYTES,
+    CONVERSATION_CACHE_SIZE,
+    CONVERSATION_CACHE_TTL,
+)
+
+
+class ConversationCacheBackend(ABC):
+    """Interface of the hot-conversation cache.
+
+    Entries are JSON-serializable dicts keyed by conversation token::
+
+        {"id": <conversation id>, "extra": <decoded extra_data>,
+         "messages": [{"id": ..., "role": ..., "content": ...}, ...]}
+
+    where ``messages`` is the unsummarized tail of the conversation in id
+    order. Callers never mutate an entry they got back; they ``set`` a new
+    one. A shared implementation (Redis or similar) lets several workers
+    see each other's appends; the in-process one relies on its TTL to bound
+    staleness when a conversation moves between workers.
+    """
+
+    @abstractmethod
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """The entry for `token`, or None when it is not cached."""
+
+    @abstractmethod
+    def set(self, token: str, entry: Dict[str, Any]) -> None:
+        """Store `entry`, replacing any previous one for `token`."""
+
+    @abstractmethod
+    def delete(self, token: str) -> None:
+        """Forget `token`; a missing token is not an error."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class NullConversationCache(ConversationCacheBackend):
+    """Disables caching; every turn reads the database."""
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    def set(self, token: str, entry: Dict[str, Any]) -> None:
+        pass
+
+    def delete(self, token: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "none"}
+
+
+def entry_size(entry: Dict[str, Any]) -> int:
+    """Approximate memory footprint of a cache entry in bytes."""
+    size = 200 + len(repr(entry.get("extra")))
+    for msg in entry.get("messages", ()):
+        size += 150 + len(msg.get("content") or "") + len(msg.get("role") or "")
+    return size
+
+
+class MemoryConversationCache(ConversationCacheBackend):
+    """Per-process LRU bounded by entry count and approximate bytes."""
+
+    def __init__(self, maxsize: int = 1024, maxbytes: Optional[int] = None, ttl: Optional[float] = None):
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl, maxbytes=maxbytes, sizeof=entry_size)
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        return self.cache.get(token)
+
+    def set(self, token: str, entry: Dict[str, Any]) -> None:
+        self.cache.set(token, entry)
+
+    def delete(self, token: str) -> None:
+        self.cache.pop(token)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", **self.cache.stats()}
+
+
+def load_conversation_cache(spec: str) -> ConversationCacheBackend:
+    """
+    Build the backend named by `spec`: "memory", "none", or the import path
+    of a ConversationCacheBackend subclass ("package.module:ClassName"),
+    which is constructed without arguments.
+    """
+    if spec == "memory":
+        return MemoryConversationCache(
+            maxsize=CONVERSATION_CACHE_SIZE,
+            maxbytes=CONVERSATION_CACHE_MAX_BYTES,
+            ttl=CONVERSATION_CACHE_TTL,
+        )
+    if spec in ("none", ""):
+        return NullConversationCache()
+    module_name, _, class_name = spec.partition(":")
+    try:
+        backend = getattr(importlib.import_module(module_name), class_name)()
+    except Exception:
+        logger.exception("failed to load conversation cache backend '{}'; caching disabled", spec)
+        return NullConversationCache()
+    if not isinstance(backend, ConversationCacheBackend):
+        logger.error("'{}' is not a ConversationCacheBackend; caching disabled", spec)
+        return NullConversationCache()
+    return backend
+
+
+# singleton
+conversation_cache = load_conversation_cache(CONVERSATION_CACHE_BACKEND)
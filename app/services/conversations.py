@@ -1,60 +1,497 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Tuple
 from uuid import uuid4
 import json
 
-from ..db import SessionLocal, engine, Base
+from loguru import logger
+from sqlalchemy import and_, insert, select, update
+
+from ..core.config import (
+    CHAT_CONTEXT_RECENT_MESSAGES,
+    CHAT_CONTEXT_TOKEN_BUDGET,
+    CHAT_SUMMARY_BATCH,
+    CHAT_SUMMARY_MAX_TOKENS,
+    CONVERSATION_FLUSH_INTERVAL,
+    CONVERSATION_FLUSH_RETRIES,
+    CONVERSATION_FLUSH_SIZE,
+    CONVERSATION_WRITE_BEHIND,
+)
+from ..db import AsyncSessionLocal
 from ..models.conversation import Conversation, ConversationMessage
+from .conversation_cache import conversation_cache
+
+Summarizer = Callable[[Optional[str], List[Dict[str, str]], int], Awaitable[Optional[str]]]
 
 
-def _ensure_tables():
-    Base.metadata.create_all(bind=engine)
+def ensure_history_index(conn) -> None:
+    """
+    Create the (conversation_id, id) history index on databases whose
+    tables predate it (`create_all` skips existing tables). Runs at startup.
+    """
+    for index in ConversationMessage.__table__.indexes:
+        index.create(conn, checkfirst=True)
 
 
-def create_conversation(metadata: Optional[Dict[str, Any]] = None) -> str:
-    _ensure_tables()
+async def create_conversation(metadata: Optional[Dict[str, Any]] = None) -> str:
     token = uuid4().hex
-    db = SessionLocal()
-    try:
-        conv = Conversation(token=token, metadata=json.dumps(metadata or {}))
+    async with AsyncSessionLocal() as db:
+        conv = Conversation(token=token, extra_data=json.dumps(metadata or {}))
         db.add(conv)
-        db.commit()
-        db.refresh(conv)
+        await db.commit()
+        conversation_cache.set(token, {"id": conv.id, "extra": metadata or {}, "messages": []})
         return token
-    finally:
-        db.close()
 
 
-def get_conversation_messages(token: str) -> List[Dict[str, Any]]:
-    _ensure_tables()
-    db = SessionLocal()
+async def get_conversation_messages(token: str, limit: Optional[int] = None, before_id: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Return messages of a conversation in chronological order, or None if the
+    token is unknown.
+
+    One query: the conversation is outer-joined to its messages so an empty
+    conversation still yields a row, and the (conversation_id, id) index
+    serves both the filter and the ordering. With `limit`, the newest
+    `limit` messages (older than `before_id`, if given) are returned.
+    """
+    join_on = ConversationMessage.conversation_id == Conversation.id
+    if before_id is not None:
+        join_on = and_(join_on, ConversationMessage.id < before_id)
+
+    query = (
+        select(
+            ConversationMessage.id,
+            ConversationMessage.role,
+            ConversationMessage.content,
+            ConversationMessage.created_at,
+        )
+        .select_from(Conversation)
+        .outerjoin(ConversationMessage, join_on)
+        .where(Conversation.token == token)
+        .order_by(ConversationMessage.id.desc())
+    )
+    if limit is not None:
+        query = query.limit(limit)
+
+    await message_buffer.sync(token)
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(query)).all()
+    if not rows:
+        return None
+    return [
+        {"id": r.id, "role": r.role, "content": r.content, "created_at": r.created_at.isoformat()}
+        for r in reversed(rows)
+        if r.id is not None
+    ]
+
+
+async def _insert_messages(db, items: List[Tuple[str, Dict[str, Any]]]) -> Callable[[], None]:
+    """
+    Insert `(token, message)` pairs in the caller's transaction.
+
+    Tokens are resolved through the conversation cache, and the ones not
+    cached with one query; unknown tokens get a new conversation, then every
+    message goes out in one bulk insert. Returns a callback that applies the
+    insert to the cache; call it once the transaction has committed.
+    """
+    tokens = list(dict.fromkeys(token for token, _ in items))
+    cached = {t: conversation_cache.get(t) for t in tokens}
+    ids = {t: entry["id"] for t, entry in cached.items() if entry is not None}
+    lookup = [t for t in tokens if t not in ids]
+    if lookup:
+        result = await db.execute(
+            select(Conversation.id, Conversation.token).where(Conversation.token.in_(lookup))
+        )
+        ids.update({row.token: row.id for row in result})
+
+    missing = [Conversation(token=t, extra_data=json.dumps({})) for t in tokens if t not in ids]
+    created: Dict[str, Dict[str, Any]] = {}
+    if missing:
+        # create new conversations if not found
+        db.add_all(missing)
+        await db.flush()
+        ids.update({conv.token: conv.id for conv in missing})
+        for conv in missing:
+            created[conv.token] = {"id": conv.id, "extra": {}, "messages": []}
+
+    rows = [
+        {
+            "conversation_id": ids[token],
+            "role": msg["role"],
+            "content": msg["content"],
+            "created_at": msg.get("created_at") or datetime.utcnow(),
+        }
+        for token, msg in items
+    ]
+    result = await db.execute(
+        insert(ConversationMessage).returning(ConversationMessage.id, sort_by_parameter_order=True),
+        rows,
+    )
+    message_ids = result.scalars().all()
+
+    def update_cache() -> None:
+        appended: Dict[str, List[Dict[str, Any]]] = {}
+        for (token, msg), message_id in zip(items, message_ids):
+            appended.setdefault(token, []).append(
+                {"id": message_id, "role": msg["role"], "content": msg["content"]}
+            )
+        for token, new_messages in appended.items():
+            # re-read the entry: other appends or a summary fold may have
+            # updated it while this insert was in flight
+            entry = conversation_cache.get(token) or created.get(token)
+            if entry is None:
+                # only conversations still cached (or just created) are kept
+                # current; others are loaded on their next read
+                continue
+            summarized_until = (entry["extra"].get("context") or {}).get("summarized_until", 0)
+            known = {m["id"] for m in entry["messages"]}
+            messages = entry["messages"] + [
+                m for m in new_messages if m["id"] not in known and m["id"] > summarized_until
+            ]
+            messages.sort(key=lambda m: m["id"])
+            conversation_cache.set(token, {**entry, "messages": messages})
+
+    return update_cache
+
+
+class MessageWriteBuffer(object):
+    """Write-behind buffer for conversation messages.
+
+    Messages from all requests are collected and written together, one
+    transaction per ``flush_interval`` seconds (or as soon as ``flush_size``
+    messages are pending). Reads of a conversation with pending messages call
+    ``sync`` first, so they always see their own writes; ``close`` flushes
+    whatever is left at shutdown. A failed write puts its messages back and
+    is retried up to ``max_retries`` times, with doubling delays, before they
+    are dropped. When disabled, ``append_messages`` writes straight through.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        flush_interval: float = 0.05,
+        flush_size: int = 500,
+        max_retries: int = 3,
+    ):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.flush_size = max(1, flush_size)
+        self.max_retries = max(0, max_retries)
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._timer = None
+        # strong reference: the loop only keeps weak ones to tasks
+        self._flush_task = None
+        self._lock = None
+        self._loop = None
+        # consecutive failed flushes of the pending messages
+        self._attempts = 0
+        self._flushes = 0
+        self._written = 0
+        self._retried = 0
+        self._failed = 0
+
+    def _ensure_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._timer = None
+
+    async def add(self, token: str, messages: List[Dict[str, Any]]) -> None:
+        self._ensure_loop()
+        now = datetime.utcnow()
+        self._pending.extend((token, {**msg, "created_at": msg.get("created_at") or now}) for msg in messages)
+        if len(self._pending) >= self.flush_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self.flush_interval, self._flush_later)
+
+    def _flush_later(self) -> None:
+        self._flush_task = self._loop.create_task(self.flush())
+
+    def _retry_delay(self) -> float:
+        return self.flush_interval * 2 ** self._attempts
+
+    def has_pending(self, token: str) -> bool:
+        return any(t == token for t, _ in self._pending)
+
+    async def sync(self, token: str) -> None:
+        """Flush now if `token` has messages waiting or a flush is in flight."""
+        # an in-flight flush has already taken its messages out of _pending;
+        # flush() waits for it on the lock
+        if self.has_pending(token) or (self._lock is not None and self._lock.locked()):
+            await self.flush()
+
+    async def flush(self) -> None:
+        self._ensure_loop()
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            items, self._pending = self._pending, []
+            if not items:
+                return
+            try:
+                async with AsyncSessionLocal() as db:
+                    update_cache = await _insert_messages(db, items)
+                    await db.commit()
+                update_cache()
+            except Exception:
+                self._attempts += 1
+                if self._attempts > self.max_retries:
+                    self._attempts = 0
+                    self._failed += len(items)
+                    logger.exception("failed to write {} conversation messages; dropping them", len(items))
+                    return
+                # back in front of anything added meanwhile, so order is kept
+                self._pending = items + self._pending
+                self._retried += len(items)
+                delay = self._retry_delay()
+                logger.warning(
+                    "failed to write {} conversation messages; retry {} of {} in {:.2f}s",
+                    len(items), self._attempts, self.max_retries, delay,
+                )
+                self._timer = self._loop.call_later(delay, self._flush_later)
+                return
+            self._attempts = 0
+            self._flushes += 1
+            self._written += len(items)
+
+    async def close(self) -> None:
+        """Write everything still pending; called on shutdown."""
+        # always flush: it waits for a timer-triggered flush still writing
+        await self.flush()
+        task, self._flush_task = self._flush_task, None
+        if task is not None and task is not asyncio.current_task():
+            await task
+        # a failed flush put its messages back; retry until they are written
+        # or its retries run out and they are dropped
+        while self._pending:
+            await asyncio.sleep(self._retry_delay())
+            await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            "flushes": self._flushes,
+            "written": self._written,
+            "retried": self._retried,
+            "failed": self._failed,
+        }
+
+
+message_buffer = MessageWriteBuffer(
+    enabled=CONVERSATION_WRITE_BEHIND,
+    flush_interval=CONVERSATION_FLUSH_INTERVAL,
+    flush_size=CONVERSATION_FLUSH_SIZE,
+    max_retries=CONVERSATION_FLUSH_RETRIES,
+)
+
+
+async def append_messages(token: str, messages: List[Dict[str, Any]]) -> None:
+    """
+    Append `messages` ({'role', 'content'[, 'created_at']}) to a conversation
+    in one transaction, creating the conversation if the token is unknown.
+    Goes through `message_buffer` when write-behind is enabled.
+    """
+    if not messages:
+        return
+    if message_buffer.enabled:
+        await message_buffer.add(token, messages)
+        return
+    async with AsyncSessionLocal() as db:
+        update_cache = await _insert_messages(db, [(token, msg) for msg in messages])
+        await db.commit()
+    update_cache()
+
+
+async def append_message(token: str, role: str, content: str) -> None:
+    await append_messages(token, [{"role": role, "content": content}])
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    if not text:
+        return 0
+    return (len(text) + 3) // 4
+
+
+def _fit_suffix(messages: List[Dict[str, Any]], max_messages: int, budget: int) -> int:
+    """Length of the longest suffix of `messages` within both limits."""
+    used = 0
+    kept = 0
+    for msg in reversed(messages[-max_messages:] if max_messages > 0 else []):
+        cost = estimate_tokens(msg["content"])
+        if used + cost > budget:
+            break
+        used += cost
+        kept += 1
+    return kept
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """Keep the most recent `max_tokens` worth of `text`."""
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    return "..." + text[-(limit - 3):]
+
+
+def _local_summary(previous: Optional[str], turns: List[Dict[str, str]], max_tokens: int) -> str:
+    """Extractive fallback: clipped turns appended to the previous summary."""
+    lines = [previous] if previous else []
+    for turn in turns:
+        content = " ".join(turn["content"].split())
+        if len(content) > 200:
+            content = content[:197] + "..."
+        lines.append(f"{turn['role'].upper()}: {content}")
+    return _truncate_tokens("\n".join(lines), max_tokens)
+
+
+def trim_history(messages: List[Dict[str, Any]], question: str = "") -> List[Dict[str, Any]]:
+    """Bound a client-supplied history to the recent-message and token limits."""
+    budget = max(CHAT_CONTEXT_TOKEN_BUDGET - estimate_tokens(question), 0)
+    kept = _fit_suffix(messages, CHAT_CONTEXT_RECENT_MESSAGES, budget)
+    return messages[len(messages) - kept:]
+
+
+async def _load_cache_entry(db, token: str) -> Optional[Dict[str, Any]]:
+    """Read a conversation's cache entry (see ConversationCacheBackend)."""
+    conv = await db.scalar(select(Conversation).where(Conversation.token == token))
+    if not conv:
+        return None
+
     try:
-        conv = db.query(Conversation).filter(Conversation.token == token).first()
-        if not conv:
-            return []
-        msgs = [
-            {"role": m.role, "content": m.content, "created_at": m.created_at.isoformat()}
-            for m in sorted(conv.messages, key=lambda x: x.id)
-        ]
-        return msgs
-    finally:
-        db.close()
+        extra = json.loads(conv.extra_data or "{}")
+    except ValueError:
+        extra = {}
+    summarized_until = (extra.get("context") or {}).get("summarized_until", 0)
+
+    result = await db.execute(
+        select(ConversationMessage.id, ConversationMessage.role, ConversationMessage.content)
+        .where(
+            ConversationMessage.conversation_id == conv.id,
+            ConversationMessage.id > summarized_until,
+        )
+        .order_by(ConversationMessage.id)
+    )
+    messages = [{"id": r.id, "role": r.role, "content": r.content} for r in result]
+    return {"id": conv.id, "extra": extra, "messages": messages}
 
 
-def append_message(token: str, role: str, content: str) -> None:
-    _ensure_tables()
-    db = SessionLocal()
+@dataclass
+class PendingFold:
+    conversation_id: int
+    extra: Dict[str, Any]
+    previous_summary: Optional[str]
+    overflow: List[Dict[str, Any]]
+
+
+@dataclass
+class ChatContext:
+    summary: Optional[str] = None
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    # older turns to fold into the stored summary once the reply is sent
+    pending: Optional[PendingFold] = None
+
+
+# tokens whose summary fold is running, so concurrent requests do not repeat it
+_folding: set = set()
+
+
+async def build_chat_context(token: str, question: str = "") -> ChatContext:
+    """
+    Assemble the prompt history for a stored conversation.
+
+    Recent messages are returned verbatim; older ones are folded into a
+    rolling summary kept in `Conversation.extra_data` under "context", along
+    with the id of the last summarized message. Only unsummarized messages
+    are loaded, so the work per request stays constant as the conversation
+    grows, and a conversation in the hot cache needs no reads at all.
+    Folding happens in batches: once more than CHAT_CONTEXT_RECENT_MESSAGES +
+    CHAT_SUMMARY_BATCH - 1 messages (or more than the token budget) are
+    pending, everything but the last CHAT_CONTEXT_RECENT_MESSAGES is
+    summarized.
+
+    Nothing slow runs here: the prompt gets a local extractive summary of
+    the overflow and `ChatContext.pending` describes the fold, which
+    `fold_chat_context` persists after the reply has been sent.
+    """
+    await message_buffer.sync(token)
+    entry = conversation_cache.get(token)
+    if entry is None:
+        async with AsyncSessionLocal() as db:
+            entry = await _load_cache_entry(db, token)
+        if entry is None:
+            return ChatContext()
+        conversation_cache.set(token, entry)
+
+    state = entry["extra"].get("context") or {}
+    summary = state.get("summary")
+    window = entry["messages"]
+
+    # the summary may grow up to its cap, so reserve that much up front
+    budget = max(CHAT_CONTEXT_TOKEN_BUDGET - CHAT_SUMMARY_MAX_TOKENS - estimate_tokens(question), 0)
+    slack = CHAT_CONTEXT_RECENT_MESSAGES + max(CHAT_SUMMARY_BATCH, 1) - 1
+    kept = _fit_suffix(window, slack, budget)
+    pending = None
+    if kept < len(window):
+        kept = _fit_suffix(window, CHAT_CONTEXT_RECENT_MESSAGES, budget)
+        overflow = window[:len(window) - kept]
+        pending = PendingFold(entry["id"], dict(entry["extra"]), summary, overflow)
+        turns = [{"role": m["role"], "content": m["content"]} for m in overflow]
+        summary = _local_summary(summary, turns, CHAT_SUMMARY_MAX_TOKENS)
+
+    messages = [{"role": m["role"], "content": m["content"]} for m in window[len(window) - kept:]]
+    return ChatContext(summary=summary, messages=messages, pending=pending)
+
+
+async def fold_chat_context(token: str, context: ChatContext, summarizer: Optional[Summarizer] = None) -> None:
+    """
+    Persist the fold described by `context.pending`.
+
+    `summarizer(previous_summary, turns, max_words)` produces the new
+    summary; when it is missing or returns None a local extractive summary
+    is used instead. No connection is held while it runs. Meant to run
+    after the reply, e.g. as a background task.
+    """
+    pending = context.pending
+    if pending is None or token in _folding:
+        return
+    _folding.add(token)
     try:
-        conv = db.query(Conversation).filter(Conversation.token == token).first()
-        if not conv:
-            # create new conversation if not found
-            conv = Conversation(token=token, extra_data=json.dumps({})) 
-            db.add(conv)
-            db.commit()
-            db.refresh(conv)
-
-      
-        msg = ConversationMessage(conversation_id=conv.id, role=role, content=content)
-        db.add(msg)
-        db.commit()
+        turns = [{"role": m["role"], "content": m["content"]} for m in pending.overflow]
+        summary = None
+        if summarizer is not None:
+            try:
+                summary = await summarizer(pending.previous_summary, turns, CHAT_SUMMARY_MAX_TOKENS * 3 // 4)
+            except Exception:
+                logger.exception("summarizing conversation {} failed", token)
+        if summary:
+            summary = _truncate_tokens(summary, CHAT_SUMMARY_MAX_TOKENS)
+        else:
+            summary = _local_summary(pending.previous_summary, turns, CHAT_SUMMARY_MAX_TOKENS)
+
+        until = pending.overflow[-1]["id"]
+        extra = {**pending.extra, "context": {"summary": summary, "summarized_until": until}}
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Conversation)
+                .where(Conversation.id == pending.conversation_id)
+                .values(extra_data=json.dumps(extra))
+            )
+            await db.commit()
+        logger.debug("folded {} messages into summary of conversation {}", len(pending.overflow), token)
+
+        # re-read the entry: messages may have been appended while the
+        # summarizer ran
+        current = conversation_cache.get(token)
+        if current is not None:
+            conversation_cache.set(token, {
+                **current,
+                "extra": extra,
+                "messages": [m for m in current["messages"] if m["id"] > until],
+            })
     finally:
-        db.close()
+        _folding.discard(token)
@@ -1,7 +1,8 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 from loguru import logger
 import google.generativeai as genai
 from ..core.config import GEMINI_API_KEY
+from .gemini_client import generate_content, stream_content
 
 
 class GeminiChatService:
@@ -35,7 +36,7 @@ class GeminiChatService:
                 t = parts[1]
         return t
 
-    def chat(self, question: str, user_profile: Optional[Dict[str, Any]] = None, system_prompt: Optional[str] = None, conversation: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+    def chat(self, question: str, user_profile: Optional[Dict[str, Any]] = None, system_prompt: Optional[str] = None, conversation: Optional[List[Dict[str, str]]] = None, summary: Optional[str] = None) -> Dict[str, Any]:
         """
         Perform a chat call to Gemini.
 
@@ -43,12 +44,87 @@ class GeminiChatService:
         - `user_profile`: optional dict with user info (will be included in prompt)
         - `system_prompt`: optional system instructions
         - `conversation`: optional list of previous turns: [{'role':'user'|'assistant','content':str}, ...]
+        - `summary`: optional summary of turns older than `conversation`
 
         Returns dict: { 'reply': str, 'raw': optional raw response }
         """
         if not self.is_available():
             return {"reply": "Chat unavailable (Gemini API key not configured)."}
 
+        prompt = self._build_prompt(question, user_profile, system_prompt, conversation, summary)
+
+        try:
+            response = self.model.generate_content(prompt)
+            text = self._sanitize_text(response.text or "")
+            return {"reply": text, "raw": response}
+        except Exception as e:
+            logger.exception("Gemini chat call failed: %s", e)
+            return {"reply": "Terjadi kesalahan saat menghubungi model."}
+
+    async def chat_async(self, question: str, user_profile: Optional[Dict[str, Any]] = None, system_prompt: Optional[str] = None, conversation: Optional[List[Dict[str, str]]] = None, summary: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Non-blocking variant of `chat` for async routes.
+
+        Uses the SDK's async API under the shared Gemini concurrency limit and
+        per-call timeout; a timeout is reported like any other failure.
+        """
+        if not self.is_available():
+            return {"reply": "Chat unavailable (Gemini API key not configured)."}
+
+        prompt = self._build_prompt(question, user_profile, system_prompt, conversation, summary)
+
+        try:
+            response = await generate_content(self.model, prompt)
+            text = self._sanitize_text(response.text or "")
+            return {"reply": text, "raw": response}
+        except Exception as e:
+            logger.exception("Gemini chat call failed: %s", e)
+            return {"reply": "Terjadi kesalahan saat menghubungi model."}
+
+    async def chat_stream(self, question: str, user_profile: Optional[Dict[str, Any]] = None, system_prompt: Optional[str] = None, conversation: Optional[List[Dict[str, str]]] = None, summary: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream the reply to a chat call as text deltas.
+
+        Raises on upstream failures or timeouts so the caller can report them;
+        chunks without text (e.g. safety-filtered) are skipped.
+        """
+        prompt = self._build_prompt(question, user_profile, system_prompt, conversation, summary)
+        async for chunk in stream_content(self.model, prompt):
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+
+    async def summarize_async(self, previous_summary: Optional[str], turns: List[Dict[str, str]], max_words: int) -> Optional[str]:
+        """
+        Fold `turns` into `previous_summary` and return the updated summary.
+
+        Returns None when Gemini is unavailable or the call fails, so the
+        caller can fall back to a local summary.
+        """
+        if not self.is_available():
+            return None
+
+        lines = [f"{t.get('role', 'user').upper()}: {t.get('content', '')}" for t in turns]
+        prompt = (
+            "You maintain a running summary of a chat between a USER and an ASSISTANT. "
+            "Update the summary with the new turns below. Keep facts, names, preferences "
+            f"and open questions; drop small talk. Answer with the summary only, at most {max_words} words, "
+            "in the language of the conversation.\n\n"
+            f"CURRENT SUMMARY:\n{previous_summary or '(empty)'}\n\n"
+            "NEW TURNS:\n" + "\n".join(lines)
+        )
+
+        try:
+            response = await generate_content(self.model, prompt)
+            return self._sanitize_text(response.text or "") or None
+        except Exception as e:
+            logger.exception("Gemini summary call failed: %s", e)
+            return None
+
+    def _build_prompt(self, question: str, user_profile: Optional[Dict[str, Any]] = None, system_prompt: Optional[str] = None, conversation: Optional[List[Dict[str, str]]] = None, summary: Optional[str] = None) -> str:
         # Build prompt
         pieces: List[str] = []
         if system_prompt:
@@ -64,6 +140,9 @@ class GeminiChatService:
             except Exception:
                 logger.exception("Failed to serialize user_profile for prompt")
 
+        if summary:
+            pieces.append(f"CONVERSATION SUMMARY (earlier turns):\n{summary}\n")
+
         if conversation:
             for turn in conversation:
                 role = turn.get("role", "user")
@@ -71,15 +150,7 @@ class GeminiChatService:
                 pieces.append(f"{role.upper()}: {content}\n")
 
         pieces.append(f"USER: {question}\nASSISTANT:")
-        prompt = "\n".join(pieces)
-
-        try:
-            response = self.model.generate_content(prompt)
-            text = self._sanitize_text(response.text or "")
-            return {"reply": text, "raw": response}
-        except Exception as e:
-            logger.exception("Gemini chat call failed: %s", e)
-            return {"reply": "Terjadi kesalahan saat menghubungi model."}
+        return "\n".join(pieces)
 
 
 # singleton
@@ -0,0 +1,46 @@
+import asyncio
+import weakref
+
+from ..core.config import GEMINI_MAX_CONCURRENCY, GEMINI_TIMEOUT
+
+# one limiter per event loop, shared by every Gemini-backed service
+_limiters = weakref.WeakKeyDictionary()
+
+
+def _limiter() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = _limiters[loop] = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+    return limiter
+
+
+async def generate_content(model, prompt, timeout=None, **kwargs):
+    """Await ``model.generate_content_async`` under the shared concurrency
+    limit and a per-call timeout (``asyncio.TimeoutError`` when exceeded).
+    """
+    async with _limiter():
+        return await asyncio.wait_for(
+            model.generate_content_async(prompt, **kwargs),
+            timeout if timeout is not None else GEMINI_TIMEOUT,
+        )
+
+
+async def stream_content(model, prompt, timeout=None, **kwargs):
+    """Yield response chunks of a streamed generation.
+
+    The concurrency slot is held for the whole stream; ``timeout`` bounds
+    the wait for the first response and for each following chunk.
+    """
+    timeout = timeout if timeout is not None else GEMINI_TIMEOUT
+    async with _limiter():
+        response = await asyncio.wait_for(
+            model.generate_content_async(prompt, stream=True, **kwargs), timeout
+        )
+        chunks = response.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+            except StopAsyncIteration:
+                break
+            yield chunk
@@ -1,12 +1,26 @@
+import copy
+import json
+import unicodedata
+
 import google.generativeai as genai
 from typing import List, Dict, Any, Optional
 from loguru import logger
-from ..core.config import GEMINI_API_KEY
+from ..core.cache import AsyncSingleFlight, LRUCache, SingleFlight
+from ..core.config import GEMINI_API_KEY, SEARCH_CACHE_PATH, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
+from .gemini_client import generate_content
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a search query: NFKC, lowercase, single-spaced."""
+    return " ".join(unicodedata.normalize("NFKC", query).lower().split())
 
 
 class GeminiSearchService:
     
     def __init__(self):
+        self.cache = LRUCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
         self.api_key = GEMINI_API_KEY
         if self.api_key and self.api_key != "your_gemini_api_key_here":
             genai.configure(api_key=self.api_key)
@@ -18,14 +32,74 @@ class GeminiSearchService:
     def is_available(self) -> bool:
         return self.model is not None
     
-    def parse_search_query(self, query: str, menu_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def load_cache(self) -> None:
+        if SEARCH_CACHE_PATH:
+            try:
+                loaded = self.cache.load(SEARCH_CACHE_PATH)
+                logger.info(f"Loaded {loaded} cached search queries from {SEARCH_CACHE_PATH}")
+            except (OSError, ValueError):
+                logger.exception("Failed to load search query cache")
+    
+    def save_cache(self) -> None:
+        if SEARCH_CACHE_PATH:
+            try:
+                self.cache.dump(SEARCH_CACHE_PATH)
+            except (OSError, TypeError, ValueError):
+                logger.exception("Failed to save search query cache")
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        shared = self._flight.shared + self._async_flight.shared
+        return {**self.cache.stats(), "shared_misses": shared}
+    
+    def parse_search_query(self, query: str, menu_items: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         if not self.is_available():
             logger.warning("Gemini API not available, using simple search")
             return self._simple_search(query, menu_items)
         
+        key = normalize_query(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
-            # Create prompt for Gemini
-            prompt = f"""Analyze this menu search query and return ONLY a JSON object with these fields:
+            # identical concurrent misses share one Gemini call
+            filters = self._flight.do(key, lambda: self._parse_with_gemini(query, key))
+            return copy.deepcopy(filters)
+        except Exception as e:
+            logger.exception(f"Error parsing query with Gemini: {e}")
+            return self._simple_search(query, menu_items)
+    
+    async def parse_search_query_async(self, query: str, menu_items: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Non-blocking parse_search_query for async routes."""
+        if not self.is_available():
+            logger.warning("Gemini API not available, using simple search")
+            return self._simple_search(query, menu_items)
+        
+        key = normalize_query(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
+        try:
+            filters = await self._async_flight.do(
+                key, lambda: self._parse_with_gemini_async(query, key)
+            )
+            return copy.deepcopy(filters)
+        except Exception as e:
+            logger.exception(f"Error parsing query with Gemini: {e}")
+            return self._simple_search(query, menu_items)
+    
+    def _parse_with_gemini(self, query: str, key: str) -> Dict[str, Any]:
+        response = self.model.generate_content(self._build_prompt(query))
+        return self._store_filters(query, key, response.text)
+    
+    async def _parse_with_gemini_async(self, query: str, key: str) -> Dict[str, Any]:
+        response = await generate_content(self.model, self._build_prompt(query))
+        return self._store_filters(query, key, response.text)
+    
+    def _build_prompt(self, query: str) -> str:
+        # Create prompt for Gemini
+        return f"""Analyze this menu search query and return ONLY a JSON object with these fields:
 - category: string or null (valid: "drinks", "food")
 - min_price: number or null
 - max_price: number or null  
@@ -38,30 +112,25 @@ Example menu data:
 {self._get_menu_sample()}
 
 Return ONLY the JSON object, no explanation:"""
-
-            # Call Gemini
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
-            
-            # Clean markdown code blocks if present
-            if result_text.startswith("```"):
-                result_text = result_text.split("```")[1]
-                if result_text.startswith("json"):
-                    result_text = result_text[4:]
-                result_text = result_text.strip()
-            
-            # Parse JSON
-            import json
-            filters = json.loads(result_text)
-            
-            logger.info(f"Gemini parsed query '{query}' to filters: {filters}")
-            return filters
-            
-        except Exception as e:
-            logger.exception(f"Error parsing query with Gemini: {e}")
-            return self._simple_search(query, menu_items)
     
-    def _simple_search(self, query: str, menu_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _store_filters(self, query: str, key: str, text: str) -> Dict[str, Any]:
+        result_text = text.strip()
+        
+        # Clean markdown code blocks if present
+        if result_text.startswith("```"):
+            result_text = result_text.split("```")[1]
+            if result_text.startswith("json"):
+                result_text = result_text[4:]
+            result_text = result_text.strip()
+        
+        # Parse JSON
+        filters = json.loads(result_text)
+        
+        logger.info(f"Gemini parsed query '{query}' to filters: {filters}")
+        self.cache.set(key, filters)
+        return filters
+    
+    def _simple_search(self, query: str, menu_items: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         return {
             "category": None,
             "min_price": None,
@@ -76,47 +145,6 @@ Return ONLY the JSON object, no explanation:"""
 - "Nasi Goreng" (food, 450 cal, Rp 35000)
 - "Cappuccino" (drinks, 120 cal, Rp 30000)
 """
-    
-    def filter_menu_items(self, menu_items: List[Dict[str, Any]], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """
-        Filter menu items based on parsed filters
-        """
-        results = menu_items
-        
-        # Filter by category
-        if filters.get("category"):
-            results = [item for item in results if item.get("category") == filters["category"]]
-        
-        # Filter by min price
-        if filters.get("min_price") is not None:
-            results = [item for item in results if item.get("price", 0) >= filters["min_price"]]
-        
-        # Filter by max price
-        if filters.get("max_price") is not None:
-            results = [item for item in results if item.get("price", 0) <= filters["max_price"]]
-        
-        # Filter by max calories
-        if filters.get("max_calories") is not None:
-            results = [item for item in results if item.get("calories", 0) <= filters["max_calories"]]
-        
-        # Filter by keywords
-        if filters.get("keywords"):
-            keywords = [kw.lower() for kw in filters["keywords"]]
-            filtered_results = []
-            for item in results:
-                # Search in name, description, ingredients
-                text_to_search = " ".join([
-                    item.get("name", "").lower(),
-                    item.get("description", "").lower(),
-                    " ".join(item.get("ingredients", [])).lower()
-                ])
-                
-                if any(keyword in text_to_search for keyword in keywords):
-                    filtered_results.append(item)
-            
-            results = filtered_results
-        
-        return results
 
 
 # Singleton instance
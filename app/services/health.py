@@ -0,0 +1,109 @@
+import asyncio
+import json
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from ..core.config import HEALTH_DB_TIMEOUT, HEALTH_POOL_TIMEOUT_WINDOW, HEALTH_READY_TTL
+from ..core.pool import is_pool_healthy
+from ..db import async_engine
+from ..models.prediction import MachineLearningDataInput
+from .model_registry import model_registry
+
+
+@lru_cache(maxsize=8)
+def load_example(path: str) -> np.ndarray:
+    """The example input at `path`, parsed once per path and read-only."""
+    with open(path) as f:
+        point = MachineLearningDataInput(**json.load(f)).get_np_array()
+    point.flags.writeable = False
+    return point
+
+
+class ReadinessCache(object):
+    """
+    Cheap readiness checks (model loaded, database reachable, no recent pool
+    checkout timeouts) whose result is reused for `ttl` seconds, so frequent probes
+    cost at most one database round trip per TTL. Concurrent probes on an
+    expired result wait for a single refresh. A model left to load lazily is
+    loaded by the first refresh only; later ones just read the registry.
+    """
+
+    def __init__(
+        self,
+        engine,
+        registry,
+        ttl: float = 2.0,
+        db_timeout: float = 1.0,
+        pool_timeout_window: float = 30.0,
+    ):
+        self.engine = engine
+        self.registry = registry
+        self.ttl = ttl
+        self.db_timeout = db_timeout
+        self.pool_timeout_window = pool_timeout_window
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._load_attempted = False
+        self.refreshes = 0
+
+    async def _database(self) -> bool:
+        async def ping():
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        try:
+            await asyncio.wait_for(ping(), timeout=self.db_timeout)
+        except Exception:
+            return False
+        return True
+
+    async def _refresh(self) -> Dict[str, Any]:
+        active = self.registry.active
+        if active is None and not self._load_attempted:
+            # without preloading the model is loaded on first use; do it here,
+            # otherwise a pod gated on readiness never gets that first request.
+            # Only once: loading scans and validates every model file, and
+            # after a failure the registry watcher picks up a fixed one
+            self._load_attempted = True
+            active = await run_in_threadpool(self.registry.load_initial)
+        checks = {
+            "model": active is not None,
+            "database": await self._database(),
+            "pool": is_pool_healthy(self.engine.sync_engine, self.pool_timeout_window),
+        }
+        self.refreshes += 1
+        return {
+            "status": all(checks.values()),
+            "checks": checks,
+            "model_version": active.version if active else None,
+        }
+
+    async def get(self, refresh: bool = False) -> Dict[str, Any]:
+        """The cached readiness result, re-checked when older than `ttl`."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if not refresh and self._result is not None and time.monotonic() - self._checked_at < self.ttl:
+            return self._result
+        async with self._lock:
+            # another probe may have refreshed while we waited
+            if not refresh and self._result is not None and time.monotonic() - self._checked_at < self.ttl:
+                return self._result
+            self._result = await self._refresh()
+            self._checked_at = time.monotonic()
+            return self._result
+
+
+# singleton
+readiness = ReadinessCache(
+    async_engine,
+    model_registry,
+    ttl=HEALTH_READY_TTL,
+    db_timeout=HEALTH_DB_TIMEOUT,
+    pool_timeout_window=HEALTH_POOL_TIMEOUT_WINDOW,
+)
@@ -0,0 +1,148 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+from loguru import logger
+
+from ..core.errors import ModelLoadException, PredictException
+
+
+class InferenceBackend(ABC):
+    """Runs `predict` for one loaded model."""
+
+    name = "base"
+
+    @abstractmethod
+    def predict(self, data: np.ndarray) -> np.ndarray:
+        """Predictions for the rows of `data`."""
+
+
+class SklearnBackend(InferenceBackend):
+    """Calls the unpickled estimator directly."""
+
+    name = "sklearn"
+
+    def __init__(self, model: Any, method: str = "predict"):
+        self.model = model
+        self.method = method
+
+    def predict(self, data: np.ndarray) -> np.ndarray:
+        if hasattr(self.model, self.method):
+            return getattr(self.model, self.method)(data)
+        raise PredictException(f"'{self.method}' attribute is missing")
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    ONNX Runtime (CPU) session for the model. A `<stem>.onnx` file next to the
+    model file is used when present, otherwise the estimator is converted
+    with skl2onnx. Needs the `onnx` extra (onnxruntime, skl2onnx).
+    """
+
+    name = "onnx"
+
+    def __init__(self, model: Any, path: Optional[str] = None, n_features: Optional[int] = None, threads: int = 1):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ModelLoadException("onnxruntime is not installed") from e
+        prebuilt = os.path.splitext(path)[0] + ".onnx" if path else None
+        if prebuilt and os.path.exists(prebuilt):
+            with open(prebuilt, "rb") as f:
+                serialized = f.read()
+        else:
+            serialized = self.convert(model, n_features or getattr(model, "n_features_in_", None))
+        options = onnxruntime.SessionOptions()
+        # rows are scored from the threadpool; one thread per call keeps
+        # single-row latency low without oversubscribing the CPU
+        options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            serialized, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        # classifiers also output probabilities; the label comes first
+        self.output_name = self.session.get_outputs()[0].name
+
+    @staticmethod
+    def convert(model: Any, n_features: Optional[int]) -> bytes:
+        try:
+            from skl2onnx import convert_sklearn
+            from skl2onnx.common.data_types import FloatTensorType
+        except ImportError as e:
+            raise ModelLoadException("skl2onnx is not installed") from e
+        if not n_features:
+            raise ModelLoadException("number of input features is unknown")
+        try:
+            onnx_model = convert_sklearn(
+                model, initial_types=[("input", FloatTensorType([None, n_features]))]
+            )
+        except Exception as e:
+            raise ModelLoadException(f"could not convert model to ONNX: {e}") from e
+        return onnx_model.SerializeToString()
+
+    def predict(self, data: np.ndarray) -> np.ndarray:
+        data = np.asarray(data, dtype=np.float32)
+        return self.session.run([self.output_name], {self.input_name: data})[0].reshape(-1)
+
+
+BACKENDS: Dict[str, Callable[..., InferenceBackend]] = {
+    SklearnBackend.name: SklearnBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def check_rows(example: np.ndarray, rows: int = 64, seed: int = 0) -> np.ndarray:
+    """The example plus `rows` perturbed copies of it, to compare backends on."""
+    rng = np.random.default_rng(seed)
+    example = np.asarray(example, dtype=np.float64).reshape(1, -1)
+    noise = rng.normal(size=(rows, example.shape[1])) * (np.abs(example) + 1.0)
+    return np.vstack([example, example + noise])
+
+
+def assert_equivalent(reference: np.ndarray, candidate: np.ndarray, atol: float = 1e-5) -> None:
+    """Raise ModelLoadException unless both backends gave the same outputs."""
+    reference = np.asarray(reference).reshape(-1)
+    candidate = np.asarray(candidate).reshape(-1)
+    if reference.shape != candidate.shape:
+        raise ModelLoadException(f"output shapes differ: {reference.shape} vs {candidate.shape}")
+    if np.issubdtype(reference.dtype, np.number) and np.issubdtype(candidate.dtype, np.number):
+        mismatched = ~np.isclose(reference, candidate, rtol=0.0, atol=atol)
+    else:
+        mismatched = reference.astype(str) != candidate.astype(str)
+    if mismatched.any():
+        raise ModelLoadException(
+            f"{int(mismatched.sum())} of {reference.shape[0]} outputs differ from sklearn"
+        )
+
+
+def build_backend(
+    name: str,
+    model: Any,
+    path: Optional[str] = None,
+    example: Optional[np.ndarray] = None,
+    atol: float = 1e-5,
+    threads: int = 1,
+) -> InferenceBackend:
+    """
+    The `name` backend for `model`. Anything but sklearn must reproduce the
+    sklearn outputs on the example input and perturbed copies of it; when it
+    cannot be built or does not match, sklearn is used and the reason logged.
+    """
+    reference = SklearnBackend(model)
+    if name == SklearnBackend.name:
+        return reference
+    if name not in BACKENDS:
+        raise ModelLoadException(f"unknown inference backend '{name}', expected one of {sorted(BACKENDS)}")
+    if example is None and getattr(model, "n_features_in_", None):
+        example = np.zeros((1, model.n_features_in_))
+    try:
+        if example is None:
+            raise ModelLoadException("no example input to check outputs against")
+        backend = BACKENDS[name](model, path=path, n_features=example.shape[-1], threads=threads)
+        rows = check_rows(example)
+        assert_equivalent(reference.predict(rows), backend.predict(rows), atol=atol)
+    except (Exception, ModelLoadException, PredictException) as e:
+        logger.warning("{} backend unavailable for {}, using sklearn: {}", name, path, e)
+        return reference
+    return backend
@@ -0,0 +1,170 @@
+import csv
+import io
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+
+from ..models.menu import Menu, MenuCreate, MenuResponse
+from .menu_cache import menu_response_cache
+from .menu_index import menu_index
+
+FORMATS = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/x-jsonlines": "ndjson",
+    "text/csv": "csv",
+    "application/csv": "csv",
+}
+
+CSV_COLUMNS = ["id", "name", "category", "calories", "price", "ingredients", "description", "created_at", "updated_at"]
+
+# only this many rows are itemized in an import report
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(content_type: Optional[str], explicit: Optional[str] = None) -> Optional[str]:
+    """Map a `format` value or a Content-Type to "json", "ndjson" or "csv"."""
+    if explicit:
+        explicit = explicit.strip().lower()
+        return explicit if explicit in ("json", "ndjson", "csv") else None
+    media_type = (content_type or "application/json").split(";")[0].strip().lower()
+    return FORMATS.get(media_type)
+
+
+def _csv_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    row = {key: (value if value != "" else None) for key, value in record.items() if key}
+    ingredients = row.get("ingredients")
+    if ingredients is None:
+        row["ingredients"] = []
+    elif ingredients.lstrip().startswith("["):
+        row["ingredients"] = json.loads(ingredients)
+    else:
+        row["ingredients"] = [item.strip() for item in ingredients.split(";") if item.strip()]
+    return row
+
+
+def iter_records(stream: io.TextIOBase, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield `(row_number, record)` from an uploaded file, lazily for NDJSON
+    and CSV. A record that cannot be parsed is yielded as the exception, so
+    it is reported against its row instead of aborting the import. JSON
+    arrays are parsed whole; use NDJSON or CSV for large imports.
+    """
+    if fmt == "json":
+        data = json.load(stream)
+        if not isinstance(data, list):
+            raise ValueError("JSON body must be an array of menu objects")
+        yield from enumerate(data, start=1)
+    elif fmt == "ndjson":
+        row = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                yield row, json.loads(line)
+            except ValueError as e:
+                yield row, e
+    else:
+        for row, record in enumerate(csv.DictReader(stream), start=1):
+            try:
+                yield row, _csv_record(record)
+            except ValueError as e:
+                yield row, e
+
+
+def _validation_errors(e: Exception) -> List[str]:
+    if isinstance(e, ValidationError):
+        return [
+            f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+            for err in e.errors()
+        ]
+    return [f"invalid record: {e}"]
+
+
+async def import_menus(db, records: Iterator[Tuple[int, Any]], batch_size: int) -> Dict[str, Any]:
+    """
+    Validate and insert `records` in batches of `batch_size`.
+
+    Each batch is validated with MenuCreate, its valid rows go out as one
+    multi-row INSERT, and the batch is committed on its own, so a failing
+    batch only loses its own rows. Returns counts plus a per-row error
+    report.
+    """
+    report: Dict[str, Any] = {"inserted": 0, "failed": 0, "errors": []}
+
+    def fail(row: int, messages: List[str]) -> None:
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row, "errors": messages})
+
+    async def flush(batch: List[Tuple[int, Dict[str, Any]]]) -> None:
+        try:
+            result = await db.execute(
+                insert(Menu).returning(Menu.id, sort_by_parameter_order=True),
+                [mapping for _, mapping in batch],
+            )
+            ids = result.scalars().all()
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            for row, _ in batch:
+                fail(row, [f"insert failed: {e.__class__.__name__}: {e}"])
+            return
+        report["inserted"] += len(batch)
+        menu_response_cache.bump()
+        for menu_id, (_, mapping) in zip(ids, batch):
+            menu_index.add(SimpleNamespace(id=menu_id, **mapping))
+
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+    for row, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            menu = MenuCreate.model_validate(record)
+        except (ValidationError, ValueError, TypeError) as e:
+            fail(row, _validation_errors(e))
+            continue
+        now = datetime.utcnow()
+        batch.append((row, {**menu.model_dump(), "created_at": now, "updated_at": now}))
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    return report
+
+
+def _csv_line(values: List[Any]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+async def export_chunks(menus: AsyncIterator[Menu], fmt: str, chunk_size: int = 500) -> AsyncIterator[str]:
+    """
+    Serialize menus as NDJSON or CSV (with a header row), yielding text
+    every `chunk_size` rows so memory stays flat however large the table.
+    """
+    lines: List[str] = []
+    if fmt == "csv":
+        lines.append(_csv_line(CSV_COLUMNS))
+    async for menu in menus:
+        item = MenuResponse.model_validate(menu).model_dump(mode="json")
+        if fmt == "csv":
+            item["ingredients"] = ";".join(item["ingredients"] or [])
+            lines.append(_csv_line([item[column] for column in CSV_COLUMNS]))
+        else:
+            lines.append(json.dumps(item, ensure_ascii=False) + "\n")
+        if len(lines) >= chunk_size:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
@@ -0,0 +1,68 @@
+import hashlib
+import json
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from ..core.cache import LRUCache
+from ..core.config import MENU_CACHE_ENABLED, MENU_CACHE_SIZE, MENU_CACHE_TTL
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact response bytes."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """`If-None-Match` check (weak comparison, as RFC 9110 requires for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+class MenuResponseCache(object):
+    """Serialized responses of menu read endpoints.
+
+    Keys combine the endpoint, its normalized parameters and the menu
+    version; every menu write bumps the version, so older entries are never
+    hit again (they are also dropped to free memory). The version is per
+    process: with several workers a write only invalidates its own worker's
+    cache immediately and the TTL bounds staleness elsewhere.
+    """
+
+    def __init__(self, enabled: bool = True, maxsize: int = 512, ttl: Optional[float] = 60.0):
+        self.enabled = enabled
+        self.version = 0
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def bump(self) -> None:
+        """Invalidate every cached response; call after any menu write."""
+        self.version += 1
+        self.cache.clear()
+
+    def key(self, endpoint: str, params: Dict[str, Any]) -> Hashable:
+        normalized = json.dumps(params, sort_keys=True, default=str)
+        return (self.version, endpoint, normalized)
+
+    def get(self, key: Hashable) -> Optional[Tuple[bytes, str]]:
+        if not self.enabled:
+            return None
+        return self.cache.get(key)
+
+    def set(self, key: Hashable, body: bytes) -> str:
+        """Store `body` under `key` and return its ETag."""
+        etag = make_etag(body)
+        # a write may have landed while the response was built
+        if self.enabled and key[0] == self.version:
+            self.cache.set(key, (body, etag))
+        return etag
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "version": self.version, **self.cache.stats()}
+
+
+# singleton
+menu_response_cache = MenuResponseCache(
+    enabled=MENU_CACHE_ENABLED, maxsize=MENU_CACHE_SIZE, ttl=MENU_CACHE_TTL
+)
@@ -0,0 +1,220 @@
+import re
+import weakref
+from typing import Iterable, List, Optional
+
+from loguru import logger
+from sqlalchemy import Connection, bindparam, func, inspect, literal_column, select, table, text
+from sqlalchemy.exc import DBAPIError
+
+from ..models.menu import Menu
+
+FTS_TABLE = "menus_fts"
+SEARCH_VECTOR = "search_vector"
+
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+
+_SQLITE_TRIGGERS = {
+    "menus_fts_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS menus_fts_ai AFTER INSERT ON menus BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, description, ingredients)
+            VALUES (new.id, new.name, coalesce(new.description, ''), coalesce(new.ingredients, ''));
+        END""",
+    "menus_fts_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS menus_fts_ad AFTER DELETE ON menus BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END""",
+    "menus_fts_au": f"""
+        CREATE TRIGGER IF NOT EXISTS menus_fts_au AFTER UPDATE ON menus BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            INSERT INTO {FTS_TABLE}(rowid, name, description, ingredients)
+            VALUES (new.id, new.name, coalesce(new.description, ''), coalesce(new.ingredients, ''));
+        END""",
+}
+
+# name matches weigh more than description, description more than ingredients
+_SQLITE_RANK = f"bm25({FTS_TABLE}, 3.0, 2.0, 1.0)"
+
+_POSTGRES_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(ingredients::text, '')), 'C')"
+)
+
+
+def tokenize(keywords: Iterable[str]) -> List[List[str]]:
+    """Split each keyword into lowercase alphanumeric tokens, dropping empties."""
+    groups = []
+    for keyword in keywords:
+        tokens = _TOKEN.findall(str(keyword).lower())
+        if tokens:
+            groups.append(tokens)
+    return groups
+
+
+def sqlite_match_expression(groups: List[List[str]]) -> str:
+    """Prefix-match every token of a keyword, any keyword may match."""
+    return " OR ".join(
+        "(" + " AND ".join(f'"{token}"*' for token in tokens) + ")" for tokens in groups
+    )
+
+
+def postgres_tsquery(groups: List[List[str]]) -> str:
+    return " | ".join(
+        "(" + " & ".join(f"{token}:*" for token in tokens) + ")" for tokens in groups
+    )
+
+
+def _ensure_sqlite(conn: Connection) -> bool:
+    existing = {
+        row[0]
+        for row in conn.execute(
+            text("SELECT name FROM sqlite_master WHERE name = :fts OR name LIKE 'menus_fts_a%'"),
+            {"fts": FTS_TABLE},
+        )
+    }
+    conn.execute(
+        text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            "USING fts5(name, description, ingredients, tokenize='unicode61')"
+        )
+    )
+    for statement in _SQLITE_TRIGGERS.values():
+        conn.execute(text(statement))
+    if FTS_TABLE not in existing or not set(_SQLITE_TRIGGERS) <= existing:
+        # new index, or menus was recreated without its triggers: rebuild
+        conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        conn.execute(
+            text(
+                f"INSERT INTO {FTS_TABLE}(rowid, name, description, ingredients) "
+                "SELECT id, name, coalesce(description, ''), coalesce(ingredients, '') "
+                "FROM menus"
+            )
+        )
+    return True
+
+
+def _ensure_postgres(conn: Connection) -> bool:
+    columns = {column["name"] for column in inspect(conn).get_columns(Menu.__tablename__)}
+    if SEARCH_VECTOR not in columns:
+        conn.execute(
+            text(
+                f"ALTER TABLE menus ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR} tsvector "
+                f"GENERATED ALWAYS AS ({_POSTGRES_VECTOR}) STORED"
+            )
+        )
+    conn.execute(
+        text(
+            f"CREATE INDEX IF NOT EXISTS ix_menus_{SEARCH_VECTOR} "
+            f"ON menus USING GIN ({SEARCH_VECTOR})"
+        )
+    )
+    return True
+
+
+def text_index_exists(conn: Connection) -> bool:
+    """Whether the full-text index is in place; reads the catalog only, no DDL."""
+    inspector = inspect(conn)
+    if not inspector.has_table(Menu.__tablename__):
+        return False
+    if conn.dialect.name == "sqlite":
+        names = {
+            row[0]
+            for row in conn.execute(
+                text("SELECT name FROM sqlite_master WHERE name = :fts OR name LIKE 'menus_fts_a%'"),
+                {"fts": FTS_TABLE},
+            )
+        }
+        # without its triggers the index would drift from menus
+        return FTS_TABLE in names and set(_SQLITE_TRIGGERS) <= names
+    if conn.dialect.name == "postgresql":
+        columns = {column["name"] for column in inspector.get_columns(Menu.__tablename__)}
+        return SEARCH_VECTOR in columns
+    return False
+
+
+def ensure_text_index(conn: Connection) -> bool:
+    """
+    Create the dialect's full-text index over menus. Returns availability.
+    DDL, possibly a full rebuild or table rewrite: run at startup only.
+    """
+    if not inspect(conn).has_table(Menu.__tablename__):
+        return False
+    try:
+        if conn.dialect.name == "sqlite":
+            return _ensure_sqlite(conn)
+        if conn.dialect.name == "postgresql":
+            return _ensure_postgres(conn)
+    except DBAPIError:
+        logger.exception("failed to create menu full-text index")
+    return False
+
+
+class MenuFullTextIndex(object):
+    """Ranked menu text search backed by SQLite FTS5 or Postgres tsvector/GIN.
+
+    SQLite keeps ``menus_fts`` in sync through triggers on ``menus``; Postgres
+    uses a generated ``search_vector`` column, so inserts, updates and deletes
+    through any code path are reflected without extra writes in the routes.
+
+    The index is created at startup, which ``record``s whether it is
+    available. Requests never run DDL: on an engine nothing was recorded for
+    they check once whether the index exists and otherwise fall back to
+    substring matching.
+    """
+
+    def __init__(self):
+        self._ready = weakref.WeakKeyDictionary()
+
+    def record(self, engine, available: bool) -> None:
+        """Remember the result of ``ensure_text_index`` for ``engine``."""
+        self._ready[engine] = available
+
+    async def is_ready(self, db) -> bool:
+        engine = db.bind
+        if engine not in self._ready:
+            async with engine.connect() as conn:
+                self._ready[engine] = await conn.run_sync(text_index_exists)
+        return self._ready[engine]
+
+    def mark_stale(self, engine=None) -> None:
+        """Forget cached availability, e.g. after tables were dropped."""
+        if engine is None:
+            self._ready.clear()
+        else:
+            self._ready.pop(engine, None)
+
+    def apply(self, query, dialect_name: str, keywords: Iterable[str], ranked: bool = True):
+        """Restrict ``query`` to menus matching any keyword.
+
+        Returns ``None`` when no keyword contains a searchable token. With
+        ``ranked`` the query is ordered by relevance (best first).
+        """
+        groups = tokenize(keywords)
+        if not groups:
+            return None
+        if dialect_name == "sqlite":
+            fts = table(FTS_TABLE)
+            matches = (
+                select(
+                    literal_column("rowid").label("menu_id"),
+                    literal_column(_SQLITE_RANK).label("rank"),
+                )
+                .select_from(fts)
+                .where(
+                    literal_column(FTS_TABLE).op("MATCH")(
+                        bindparam("fts_query", sqlite_match_expression(groups))
+                    )
+                )
+                .subquery()
+            )
+            query = query.join(matches, matches.c.menu_id == Menu.id)
+            return query.order_by(matches.c.rank, Menu.id) if ranked else query
+        vector = literal_column(f"menus.{SEARCH_VECTOR}")
+        tsquery = func.to_tsquery("simple", bindparam("ts_query", postgres_tsquery(groups)))
+        query = query.where(vector.op("@@")(tsquery))
+        if ranked:
+            query = query.order_by(func.ts_rank(vector, tsquery).desc(), Menu.id)
+        return query
+
+
+menu_fts = MenuFullTextIndex()
@@ -0,0 +1,137 @@
+import threading
+from array import array
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .menu_fts import tokenize
+
+# signed 64-bit ids keep postings compact while covering any primary key
+_TYPECODE = "q"
+
+
+def _document_tokens(name: Optional[str], description: Optional[str], ingredients: Any) -> Tuple[str, ...]:
+    fields = [name or "", description or ""]
+    if isinstance(ingredients, (list, tuple)):
+        fields.extend(str(ingredient) for ingredient in ingredients)
+    elif ingredients:
+        fields.append(str(ingredients))
+    return tuple(sorted({token for tokens in tokenize(fields) for token in tokens}))
+
+
+def _intersect(left: array, right: array) -> array:
+    result = array(_TYPECODE)
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if left[i] == right[j]:
+            result.append(left[i])
+            i += 1
+            j += 1
+        elif left[i] < right[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class MenuInvertedIndex(object):
+    """In-memory inverted index over menu name, description and ingredients.
+
+    Each token maps to a sorted ``array`` of menu ids. A keyword matches a menu
+    when every one of its tokens prefixes some token of the menu; any keyword
+    may match. The index lives in the worker process, so writes handled by
+    other workers are only picked up on their next rebuild.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, array] = {}
+        self._vocabulary: List[str] = []
+        self._documents: Dict[int, Tuple[str, ...]] = {}
+        self.ready = False
+
+    def build(self, rows: Iterable[Any]) -> None:
+        """Rebuild from rows exposing id, name, description and ingredients."""
+        postings: Dict[str, List[int]] = {}
+        documents: Dict[int, Tuple[str, ...]] = {}
+        for row in rows:
+            tokens = _document_tokens(row.name, row.description, row.ingredients)
+            documents[row.id] = tokens
+            for token in tokens:
+                postings.setdefault(token, []).append(row.id)
+        with self._lock:
+            self._postings = {
+                token: array(_TYPECODE, sorted(ids)) for token, ids in postings.items()
+            }
+            self._vocabulary = sorted(self._postings)
+            self._documents = documents
+            self.ready = True
+
+    def add(self, menu) -> None:
+        """Index a new or changed menu. No-op until the index has been built."""
+        if not self.ready:
+            return
+        tokens = _document_tokens(menu.name, menu.description, menu.ingredients)
+        with self._lock:
+            self._remove(menu.id)
+            self._documents[menu.id] = tokens
+            for token in tokens:
+                ids = self._postings.get(token)
+                if ids is None:
+                    self._postings[token] = array(_TYPECODE, [menu.id])
+                    insort(self._vocabulary, token)
+                else:
+                    position = bisect_left(ids, menu.id)
+                    ids.insert(position, menu.id)
+
+    update = add
+
+    def remove(self, menu_id: int) -> None:
+        with self._lock:
+            self._remove(menu_id)
+
+    def _remove(self, menu_id: int) -> None:
+        for token in self._documents.pop(menu_id, ()):
+            ids = self._postings[token]
+            position = bisect_left(ids, menu_id)
+            if position < len(ids) and ids[position] == menu_id:
+                del ids[position]
+            if not ids:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def _prefix_postings(self, prefix: str) -> array:
+        start = bisect_left(self._vocabulary, prefix)
+        matched = []
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matched.append(self._postings[token])
+        if len(matched) == 1:
+            return matched[0]
+        return array(_TYPECODE, sorted({menu_id for ids in matched for menu_id in ids}))
+
+    def search(self, keywords: Iterable[str]) -> List[int]:
+        """Sorted ids of menus matching any of ``keywords``."""
+        found = set()
+        with self._lock:
+            for tokens in tokenize(keywords):
+                # intersect the shortest posting lists first
+                lists = sorted((self._prefix_postings(token) for token in tokens), key=len)
+                result = lists[0]
+                for ids in lists[1:]:
+                    if not result:
+                        break
+                    result = _intersect(result, ids)
+                found.update(result)
+        return sorted(found)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "tokens": len(self._vocabulary),
+                "postings": sum(len(ids) for ids in self._postings.values()),
+            }
+
+
+menu_index = MenuInvertedIndex()
@@ -0,0 +1,74 @@
+import os
+import re
+from typing import Any, Optional, Tuple
+
+import joblib
+from loguru import logger
+
+LOAD_MODES = ("memory", "mmap")
+
+
+def memory_usage() -> Tuple[int, int]:
+    """
+    (resident, private) bytes of this process. Pages of a memory-mapped model
+    are file-backed and shared between workers, so they count towards
+    resident but not private memory. (0, 0) where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            fields = f.read().split()
+        page = os.sysconf("SC_PAGE_SIZE")
+        resident, shared = int(fields[1]) * page, int(fields[2]) * page
+    except (OSError, ValueError, IndexError):
+        return 0, 0
+    return resident, resident - shared
+
+
+def mmap_copy(path: str, cache_dir: str) -> str:
+    """
+    An uncompressed joblib copy of the model at `path`, written once to
+    `cache_dir` so it can be memory-mapped. The copy is keyed by the source
+    file's mtime and size; a stale copy is replaced. Workers converting at the
+    same time each write a private temp file and rename it into place.
+    """
+    stat = os.stat(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    target = os.path.join(cache_dir, f"{stem}-{stat.st_mtime_ns}-{stat.st_size}.joblib")
+    if os.path.exists(target):
+        return target
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        joblib.dump(joblib.load(path), tmp, compress=0)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    # only this stem's copies: "model-v2-<mtime>-<size>" is another version
+    own = re.compile(rf"^{re.escape(stem)}-\d+-\d+\.joblib$")
+    for name in os.listdir(cache_dir):
+        stale = os.path.join(cache_dir, name)
+        if own.match(name) and stale != target:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    logger.info("wrote memory-mappable copy of {} to {}", path, target)
+    return target
+
+
+def load_model(path: str, mode: str = "memory", cache_dir: Optional[str] = None) -> Any:
+    """
+    Load a model file. "memory" reads it into private memory; "mmap" maps its
+    NumPy arrays read-only so every worker shares one copy through the page
+    cache. mmap needs an uncompressed joblib dump: with `cache_dir` any other
+    file (compressed, plain pickle) is converted there first, without it the
+    file is mapped as-is and compressed arrays are loaded normally.
+    """
+    if mode not in LOAD_MODES:
+        raise ValueError(f"unknown model load mode '{mode}', expected one of {LOAD_MODES}")
+    if mode == "memory":
+        return joblib.load(path)
+    if cache_dir:
+        path = mmap_copy(path, cache_dir)
+    return joblib.load(path, mmap_mode="r")
@@ -0,0 +1,374 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from ..core.config import (
+    INFERENCE_ATOL,
+    INFERENCE_BACKEND,
+    INFERENCE_THREADS,
+    INPUT_EXAMPLE,
+    MODEL_LOAD_MODE,
+    MODEL_MAX_LOADED,
+    MODEL_MMAP_DIR,
+    MODEL_NAME,
+    MODEL_PATH,
+    MODEL_WATCH_INTERVAL,
+)
+from ..core.errors import ModelLoadException, ModelNotFoundException, PredictException
+from ..models.prediction import MachineLearningDataInput
+from .inference import InferenceBackend, build_backend
+from .model_loading import load_model, memory_usage
+
+MODEL_EXTENSIONS = (".pkl", ".joblib")
+
+
+@dataclass(frozen=True)
+class ModelVersion:
+    """A loaded model file. Immutable, so it can be shared across threads."""
+
+    version: str
+    path: str
+    model: Any = field(repr=False)
+    # (mtime_ns, size) of the file it was loaded from
+    signature: Tuple[int, int]
+    loaded_at: float
+    load_seconds: float
+    load_mode: str = "memory"
+    # process memory growth while loading; approximate, other threads allocate too
+    rss_delta: int = 0
+    private_delta: int = 0
+    backend: Optional[InferenceBackend] = field(default=None, repr=False)
+
+    def predict(self, data, method: str = "predict"):
+        if method == "predict" and self.backend is not None:
+            return self.backend.predict(data)
+        if hasattr(self.model, method):
+            return getattr(self.model, method)(data)
+        raise PredictException(f"'{method}' attribute is missing")
+
+
+class ModelRegistry(object):
+    """Versioned models loaded from a directory, with hot reload.
+
+    Every model file in ``model_dir`` is a version named after its file stem.
+    A watcher thread polls the directory; a new or changed file is loaded and
+    validated in the background and, if it passes, becomes the active version
+    with a single reference swap. Requests that already hold the previous
+    ``ModelVersion`` finish on it, so a swap never drops a request.
+
+    Validation scores ``example_path`` (a MachineLearningDataInput JSON
+    document) and expects one finite number back; without an example file
+    only the presence of ``predict`` is checked. Files modified less than
+    ``settle`` seconds ago are left for the next poll, so a model still being
+    copied in is not picked up half-written (an atomic rename avoids the wait).
+
+    Without a custom ``loader`` files are read with ``load_model`` in
+    ``load_mode`` ("memory" or "mmap", see model_loading). Predictions run
+    on the ``backend`` inference backend when it reproduces the model's own
+    outputs, see inference.build_backend.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        default_name: Optional[str] = None,
+        loader: Optional[Callable[[str], Any]] = None,
+        load_mode: str = "memory",
+        mmap_dir: Optional[str] = None,
+        backend: str = "sklearn",
+        backend_atol: float = 1e-5,
+        backend_threads: int = 1,
+        example_path: Optional[str] = None,
+        watch_interval: float = 5.0,
+        max_loaded: int = 3,
+        settle: float = 1.0,
+    ):
+        self.model_dir = model_dir
+        self.default_name = default_name
+        self.load_mode = load_mode
+        self.loader = loader or partial(load_model, mode=load_mode, cache_dir=mmap_dir)
+        self.backend = backend
+        self.backend_atol = backend_atol
+        self.backend_threads = backend_threads
+        self.example_path = example_path
+        self.watch_interval = watch_interval
+        self.max_loaded = max(1, max_loaded)
+        self.settle = settle
+        self._active: Optional[ModelVersion] = None
+        self._loaded: "OrderedDict[str, ModelVersion]" = OrderedDict()
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        self._errors: Dict[str, str] = {}
+        self._listeners: List[Callable[[ModelVersion], None]] = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.swaps = 0
+
+    @property
+    def active(self) -> Optional[ModelVersion]:
+        return self._active
+
+    def on_swap(self, listener: Callable[[ModelVersion], None]) -> None:
+        """Call `listener(new_version)` after every change of active version."""
+        self._listeners.append(listener)
+
+    def discover(self) -> Dict[str, Tuple[str, Tuple[int, int]]]:
+        """Model files on disk: version -> (path, (mtime_ns, size))."""
+        found = {}
+        if not os.path.isdir(self.model_dir):
+            return found
+        for entry in os.scandir(self.model_dir):
+            stem, ext = os.path.splitext(entry.name)
+            if ext in MODEL_EXTENSIONS and entry.is_file():
+                stat = entry.stat()
+                found[stem] = (entry.path, (stat.st_mtime_ns, stat.st_size))
+        return found
+
+    def _example(self):
+        if not self.example_path or not os.path.exists(self.example_path):
+            return None
+        with open(self.example_path) as f:
+            return MachineLearningDataInput(**json.load(f)).get_np_array()
+
+    def validate(self, model: Any) -> None:
+        """Raise ModelLoadException unless `model` scores the example input."""
+        if not hasattr(model, "predict"):
+            raise ModelLoadException("model has no 'predict' method")
+        example = self._example()
+        if example is None:
+            return
+        try:
+            prediction = np.asarray(model.predict(example), dtype=float).reshape(-1)
+        except Exception as e:
+            raise ModelLoadException(f"model failed on the example input: {e}") from e
+        if prediction.shape[0] != 1 or not np.isfinite(prediction[0]):
+            raise ModelLoadException(f"model returned {prediction!r} for the example input")
+
+    def load_version(self, version: str, path: str, signature: Tuple[int, int]) -> ModelVersion:
+        rss_before, private_before = memory_usage()
+        started = time.perf_counter()
+        try:
+            model = self.loader(path)
+        except Exception as e:
+            raise ModelLoadException(f"could not load {path}: {e}") from e
+        if not model:
+            raise ModelLoadException(f"Model {model} could not load!")
+        load_seconds = time.perf_counter() - started
+        # validation pages in what a prediction touches, so measure after it
+        self.validate(model)
+        backend = build_backend(
+            self.backend, model, path, self._example(),
+            atol=self.backend_atol, threads=self.backend_threads,
+        )
+        rss_after, private_after = memory_usage()
+        loaded = ModelVersion(
+            version=version,
+            path=path,
+            model=model,
+            signature=signature,
+            loaded_at=time.time(),
+            load_seconds=load_seconds,
+            load_mode=self.load_mode,
+            rss_delta=rss_after - rss_before,
+            private_delta=private_after - private_before,
+            backend=backend,
+        )
+        logger.info(
+            "loaded model version {} ({}, {}) in {:.3f}s, rss {:+.1f} MiB, private {:+.1f} MiB",
+            version, self.load_mode, backend.name, load_seconds,
+            loaded.rss_delta / 2**20, loaded.private_delta / 2**20,
+        )
+        return loaded
+
+    def _remember(self, loaded: ModelVersion) -> None:
+        self._loaded[loaded.version] = loaded
+        self._loaded.move_to_end(loaded.version)
+        while len(self._loaded) > self.max_loaded:
+            version = next(iter(self._loaded))
+            if self._active is not None and version == self._active.version:
+                self._loaded.move_to_end(version)
+                continue
+            del self._loaded[version]
+
+    def activate(self, loaded: ModelVersion) -> None:
+        with self._lock:
+            self._remember(loaded)
+            previous = self._active
+            self._active = loaded
+            self.swaps += 1
+        logger.info(
+            "active model version: {} (was {})",
+            loaded.version, previous.version if previous else None,
+        )
+        for listener in self._listeners:
+            try:
+                listener(loaded)
+            except Exception:
+                logger.exception("model swap listener failed")
+
+    def _try_load(self, version: str, path: str, signature: Tuple[int, int]) -> Optional[ModelVersion]:
+        self._seen[path] = signature
+        try:
+            loaded = self.load_version(version, path, signature)
+        except (Exception, ModelLoadException) as e:
+            self._errors[version] = str(e)
+            logger.error("rejected model version {}: {}", version, e)
+            return None
+        self._errors.pop(version, None)
+        return loaded
+
+    def load_initial(self) -> Optional[ModelVersion]:
+        """
+        Load the active version at startup: `default_name` if present,
+        otherwise the newest valid file in the directory.
+        """
+        with self._lock:
+            if self._active is not None:
+                return self._active
+            files = self.discover()
+            candidates = sorted(files.items(), key=lambda item: item[1][1][0], reverse=True)
+            if self.default_name:
+                default = os.path.splitext(self.default_name)[0]
+                candidates.sort(key=lambda item: item[0] != default)
+            # files already present are versions to pick per request, not
+            # updates: the watcher only reacts to later changes
+            for path, signature in files.values():
+                self._seen[path] = signature
+            for version, (path, signature) in candidates:
+                loaded = self._try_load(version, path, signature)
+                if loaded is not None:
+                    self.activate(loaded)
+                    return loaded
+            logger.error("no loadable model found in {}", self.model_dir)
+            return None
+
+    def scan(self) -> Optional[ModelVersion]:
+        """
+        Load files that are new or changed since the last scan; the newest
+        one that validates becomes active. Returns it, or None.
+        """
+        now_ns = time.time_ns()
+        with self._lock:
+            changed = [
+                (version, path, signature)
+                for version, (path, signature) in self.discover().items()
+                if self._seen.get(path) != signature
+                and now_ns - signature[0] >= self.settle * 1e9
+            ]
+            newest = None
+            for version, path, signature in sorted(changed, key=lambda item: item[2][0]):
+                loaded = self._try_load(version, path, signature)
+                if loaded is not None:
+                    newest = loaded
+            if newest is not None:
+                self.activate(newest)
+            return newest
+
+    def get(self, version: Optional[str] = None) -> ModelVersion:
+        """
+        The active version, or a specific one (loaded on demand, without
+        becoming active). Raises ModelNotFoundException if it is unknown.
+        """
+        if version is None:
+            active = self._active
+            if active is None:
+                active = self.load_initial()
+            if active is None:
+                raise ModelNotFoundException(f"no model available in {self.model_dir}")
+            return active
+
+        loaded = self._loaded.get(version)
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            loaded = self._loaded.get(version)
+            if loaded is not None:
+                return loaded
+            found = self.discover().get(version)
+            if found is None:
+                raise ModelNotFoundException(f"model version '{version}' not found")
+            path, signature = found
+            loaded = self._try_load(version, path, signature)
+            if loaded is None:
+                raise ModelNotFoundException(
+                    f"model version '{version}' failed to load: {self._errors.get(version)}"
+                )
+            self._remember(loaded)
+            return loaded
+
+    def start(self, preload: bool = True) -> None:
+        """
+        Start watching the directory. With `preload` the active version is
+        loaded now; otherwise on first use.
+        """
+        if preload:
+            self.load_initial()
+        else:
+            with self._lock:
+                for path, signature in self.discover().values():
+                    self._seen.setdefault(path, signature)
+        if self.watch_interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.watch_interval + 1)
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.watch_interval):
+            try:
+                self.scan()
+            except Exception:
+                logger.exception("model directory scan failed")
+
+    def stats(self) -> Dict[str, Any]:
+        active = self._active
+        resident, private = memory_usage()
+        return {
+            "active": active.version if active else None,
+            "loaded": list(self._loaded),
+            "load_mode": self.load_mode,
+            "versions": {
+                version: {
+                    "load_seconds": loaded.load_seconds,
+                    "rss_delta": loaded.rss_delta,
+                    "private_delta": loaded.private_delta,
+                    "backend": loaded.backend.name if loaded.backend else None,
+                }
+                for version, loaded in list(self._loaded.items())
+            },
+            "process_rss": resident,
+            "process_private": private,
+            "available": sorted(self.discover()),
+            "rejected": dict(self._errors),
+            "swaps": self.swaps,
+            "watching": self._thread is not None and self._thread.is_alive(),
+        }
+
+
+# singleton
+model_registry = ModelRegistry(
+    MODEL_PATH,
+    default_name=MODEL_NAME,
+    load_mode=MODEL_LOAD_MODE,
+    mmap_dir=MODEL_MMAP_DIR or None,
+    backend=INFERENCE_BACKEND,
+    backend_atol=INFERENCE_ATOL,
+    backend_threads=INFERENCE_THREADS,
+    example_path=INPUT_EXAMPLE,
+    watch_interval=MODEL_WATCH_INTERVAL,
+    max_loaded=MODEL_MAX_LOADED,
+)
@@ -0,0 +1,75 @@
+import hashlib
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+from ..core.cache import LRUCache
+from ..core.config import (
+    PREDICT_CACHE_DECIMALS,
+    PREDICT_CACHE_ENABLED,
+    PREDICT_CACHE_SIZE,
+    PREDICT_CACHE_TTL,
+)
+from .model_registry import ModelVersion, model_registry
+
+
+class PredictionCache(object):
+    """Predictions of recently seen feature vectors.
+
+    Keys hash the feature vector rounded to ``decimals`` places together with
+    the model version and the signature of its file, so a reloaded file never
+    serves an old answer. The whole cache is also dropped whenever the active
+    model changes.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        maxsize: int = 4096,
+        ttl: Optional[float] = 300.0,
+        decimals: int = 6,
+    ):
+        self.enabled = enabled
+        self.decimals = decimals
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.invalidations = 0
+
+    def key(self, data_point: np.ndarray, model_version: ModelVersion) -> Optional[Hashable]:
+        if not self.enabled:
+            return None
+        # + 0.0 folds -0.0 into 0.0 so both hash alike
+        quantized = np.round(np.asarray(data_point, dtype=np.float64), self.decimals) + 0.0
+        digest = hashlib.blake2b(quantized.tobytes(), digest_size=16).digest()
+        return (model_version.version, model_version.signature, digest)
+
+    def get(self, key: Optional[Hashable]) -> Any:
+        if key is None:
+            return None
+        return self.cache.get(key)
+
+    def set(self, key: Optional[Hashable], prediction: Any) -> None:
+        if key is not None:
+            self.cache.set(key, prediction)
+
+    def invalidate(self, model_version: Optional[ModelVersion] = None) -> None:
+        """Drop every entry; registered as a model swap listener."""
+        self.cache.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "decimals": self.decimals,
+            "invalidations": self.invalidations,
+            **self.cache.stats(),
+        }
+
+
+# singleton
+prediction_cache = PredictionCache(
+    enabled=PREDICT_CACHE_ENABLED,
+    maxsize=PREDICT_CACHE_SIZE,
+    ttl=PREDICT_CACHE_TTL,
+    decimals=PREDICT_CACHE_DECIMALS,
+)
+model_registry.on_swap(prediction_cache.invalidate)
@@ -0,0 +1,132 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from loguru import logger
+from sqlalchemy import insert
+
+from ..core.config import (
+    REQUEST_LOG_FLUSH_INTERVAL,
+    REQUEST_LOG_FLUSH_SIZE,
+    REQUEST_LOG_FULL_POLICY,
+    REQUEST_LOG_QUEUE_SIZE,
+)
+from ..db import AsyncSessionLocal
+from ..models.log import RequestLog
+
+_STOP = object()
+
+
+class RequestLogWriter(object):
+    """Background writer that bulk-inserts RequestLog rows.
+
+    Rows are queued in a bounded in-memory queue and drained by a worker task,
+    which inserts up to ``flush_size`` rows per transaction or whatever has
+    arrived after ``flush_interval`` seconds. When the queue is full,
+    ``policy="drop"`` discards the row and ``policy="block"`` waits for room.
+    The worker is started lazily on the first logged row.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        queue_size: int = 10000,
+        flush_size: int = 500,
+        flush_interval: float = 1.0,
+        policy: str = "drop",
+    ):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"unknown request log policy '{policy}'")
+        self.session_factory = session_factory
+        self.queue_size = max(1, queue_size)
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self._queue = None
+        self._task = None
+        self._loop = None
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.is_running() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = loop.create_task(self._run())
+
+    async def close(self) -> None:
+        """Flush everything queued so far and stop the worker."""
+        if not self.is_running():
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def log(self, request: Any, response: Any) -> None:
+        row = {"request": json.dumps(request), "response": json.dumps(response)}
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            if self.policy == "drop":
+                self._dropped += 1
+                return
+            await self._queue.put(row)
+        self._enqueued += 1
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch: List[Dict[str, str]] = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.flush_size:
+                try:
+                    item = await asyncio.wait_for(
+                        self._queue.get(), max(0.0, deadline - loop.time())
+                    )
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+
+    async def _write(self, rows: List[Dict[str, str]]) -> None:
+        try:
+            async with self.session_factory() as db:
+                await db.execute(insert(RequestLog), rows)
+                await db.commit()
+            self._written += len(rows)
+        except Exception:
+            self._failed += len(rows)
+            logger.exception("failed to log request")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running(),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "enqueued": self._enqueued,
+            "written": self._written,
+            "dropped": self._dropped,
+            "failed": self._failed,
+        }
+
+
+request_log_writer = RequestLogWriter(
+    queue_size=REQUEST_LOG_QUEUE_SIZE,
+    flush_size=REQUEST_LOG_FLUSH_SIZE,
+    flush_interval=REQUEST_LOG_FLUSH_INTERVAL,
+    policy=REQUEST_LOG_FULL_POLICY,
+)
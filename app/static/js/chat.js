@@ -45,21 +45,80 @@ async function send(){
   if(convToken) payload.conversation_token = convToken
 
   appendMessage('Menjawab...', 'bot')
+  const placeholder = messagesEl.querySelector('.msg.bot:last-child .msg-content')
   try{
-    const res = await fetch('/api/chat', { method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify(payload) })
-    const data = await res.json()
-    // remove last placeholder bot message
-    const last = messagesEl.querySelector('.msg.bot:last-child .msg-content')
-    if(last && last.innerText==='Menjawab...'){
-      // replace placeholder text with actual reply
-      last.innerText = data.reply || 'Tidak ada jawaban'
-    } else {
-      appendMessage(data.reply || 'Tidak ada jawaban')
+    await sendStream(payload, placeholder)
+  }catch(e){
+    // once the stream was accepted the server may already have stored the
+    // turn; asking /api/chat again would store it twice
+    if(!e.beforeStream){
+      console.error('Streaming failed', e)
+      if(!placeholder.innerText || placeholder.innerText === 'Menjawab...') placeholder.innerText = 'Koneksi terputus. Coba lagi.'
+      return
+    }
+    console.warn('Streaming unavailable, falling back to /api/chat', e)
+    try{
+      const res = await fetch('/api/chat', { method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify(payload) })
+      const data = await res.json()
+      placeholder.innerText = data.reply || 'Tidak ada jawaban'
+    }catch(e){
+      console.error(e)
+      appendMessage('Gagal menghubungi server. Cek konsol.', 'bot')
     }
+  }
+}
+
+// stream the reply from /api/chat/stream (Server-Sent Events over POST) into `target`;
+// errors raised before the stream was accepted carry `beforeStream`
+async function sendStream(payload, target){
+  let res
+  try{
+    res = await fetch('/api/chat/stream', { method: 'POST', headers: {'Content-Type':'application/json', 'Accept':'text/event-stream'}, body: JSON.stringify(payload) })
   }catch(e){
-    console.error(e)
-    appendMessage('Gagal menghubungi server. Cek konsol.', 'bot')
+    e.beforeStream = true
+    throw e
+  }
+  if(!res.ok || !res.body){
+    const err = new Error('stream unavailable: ' + res.status)
+    err.beforeStream = true
+    throw err
+  }
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  let reply = ''
+  while(true){
+    const { value, done } = await reader.read()
+    if(done) break
+    buffer += decoder.decode(value, { stream: true })
+    // SSE frames are separated by a blank line
+    let sep
+    while((sep = buffer.indexOf('\n\n')) !== -1){
+      const frame = buffer.slice(0, sep)
+      buffer = buffer.slice(sep + 2)
+      let event = 'message'
+      let data = ''
+      for(const line of frame.split('\n')){
+        if(line.startsWith('event:')) event = line.slice(6).trim()
+        else if(line.startsWith('data:')) data += line.slice(5).trim()
+      }
+      if(!data) continue
+      const msg = JSON.parse(data)
+      if(event === 'error'){
+        target.innerText = reply || msg.error
+        return
+      }
+      if(event === 'done'){
+        if(!reply) target.innerText = 'Tidak ada jawaban'
+        return
+      }
+      reply += msg.delta || ''
+      target.innerText = reply
+      messagesEl.scrollTop = messagesEl.scrollHeight
+    }
   }
+  if(!reply) target.innerText = 'Tidak ada jawaban'
 }
 
 sendBtn.addEventListener('click', send)
@@ -0,0 +1,397 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
+
+import app.services.conversations as conversations
+from app.db import Base
+from app.models.conversation import Conversation, ConversationMessage
+from app.services.conversation_cache import (
+    ConversationCacheBackend,
+    MemoryConversationCache,
+    NullConversationCache,
+    load_conversation_cache,
+)
+from app.services.conversations import (
+    build_chat_context,
+    estimate_tokens,
+    fold_chat_context,
+    trim_history,
+)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def store(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    monkeypatch.setattr(conversations, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(conversations, "conversation_cache", MemoryConversationCache(maxsize=16))
+    monkeypatch.setattr(conversations, "CHAT_CONTEXT_RECENT_MESSAGES", 4)
+    monkeypatch.setattr(conversations, "CHAT_SUMMARY_BATCH", 4)
+    monkeypatch.setattr(conversations, "CHAT_CONTEXT_TOKEN_BUDGET", 1000)
+    monkeypatch.setattr(conversations, "CHAT_SUMMARY_MAX_TOKENS", 200)
+    yield session_factory
+    await engine.dispose()
+
+
+class RecordingSummarizer:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, previous, turns, max_words):
+        self.calls.append((previous, [t["content"] for t in turns]))
+        return ((previous or "") + " " + " ".join(t["content"] for t in turns)).strip()
+
+
+async def add_turns(token, start, count):
+    for i in range(start, start + count):
+        await conversations.append_message(token, "user" if i % 2 == 0 else "assistant", f"m{i}")
+
+
+async def context_and_fold(token, question="", summarizer=None):
+    """What the chat routes do: build the prompt context, then fold after replying."""
+    context = await build_chat_context(token, question=question)
+    await fold_chat_context(token, context, summarizer)
+    return context
+
+
+async def stored_context(session_factory, token):
+    async with session_factory() as db:
+        conv = await db.scalar(select(Conversation).where(Conversation.token == token))
+        return json.loads(conv.extra_data)["context"]
+
+
+@pytest.mark.anyio
+async def test_short_conversation_is_sent_verbatim(store):
+    token = await conversations.create_conversation()
+    await add_turns(token, 0, 6)
+    summarizer = RecordingSummarizer()
+
+    context = await context_and_fold(token, summarizer=summarizer)
+
+    # within recent + batch - 1 messages nothing is folded yet
+    assert [m["content"] for m in context.messages] == [f"m{i}" for i in range(6)]
+    assert context.summary is None
+    assert context.pending is None
+    assert summarizer.calls == []
+
+
+@pytest.mark.anyio
+async def test_older_turns_are_folded_incrementally(store):
+    token = await conversations.create_conversation({"source": "test"})
+    await add_turns(token, 0, 8)
+    summarizer = RecordingSummarizer()
+
+    context = await build_chat_context(token)
+    assert [m["content"] for m in context.messages] == ["m4", "m5", "m6", "m7"]
+    # the prompt gets a local summary; the summarizer only runs in the fold
+    assert context.summary.startswith("USER: m0")
+    assert summarizer.calls == []
+
+    await fold_chat_context(token, context, summarizer)
+    state = await stored_context(store, token)
+    assert state["summary"] == "m0 m1 m2 m3"
+
+    # only the turns added since the last fold are summarized next time
+    await add_turns(token, 8, 4)
+    context = await context_and_fold(token, summarizer=summarizer)
+    assert summarizer.calls[-1] == ("m0 m1 m2 m3", ["m4", "m5", "m6", "m7"])
+    assert [m["content"] for m in context.messages] == ["m8", "m9", "m10", "m11"]
+
+    # the conversation's own metadata is preserved
+    async with store() as db:
+        conv = await db.scalar(select(Conversation).where(Conversation.token == token))
+        assert json.loads(conv.extra_data)["source"] == "test"
+
+
+@pytest.mark.anyio
+async def test_prompt_size_stays_bounded(store):
+    token = await conversations.create_conversation()
+    sizes = []
+    for turn in range(40):
+        await add_turns(token, turn * 2, 2)
+        context = await context_and_fold(token)  # local summary fallback
+        sizes.append(estimate_tokens(context.summary) + sum(estimate_tokens(m["content"]) for m in context.messages))
+        assert len(context.messages) <= 7
+    assert max(sizes) <= 1000
+    assert context.messages[-1]["content"] == "m79"
+
+
+@pytest.mark.anyio
+async def test_token_budget_folds_oversized_turns(store, monkeypatch):
+    monkeypatch.setattr(conversations, "CHAT_CONTEXT_TOKEN_BUDGET", 300)
+    token = await conversations.create_conversation()
+    await conversations.append_message(token, "user", "x" * 1000)
+    await conversations.append_message(token, "assistant", "short reply")
+
+    context = await build_chat_context(token, question="next?")
+
+    assert [m["content"] for m in context.messages] == ["short reply"]
+    assert context.summary.startswith("USER: xxx")
+    assert estimate_tokens(context.summary) <= 200
+
+
+def test_trim_history_keeps_recent_turns_under_budget(monkeypatch):
+    monkeypatch.setattr(conversations, "CHAT_CONTEXT_RECENT_MESSAGES", 3)
+    monkeypatch.setattr(conversations, "CHAT_CONTEXT_TOKEN_BUDGET", 10)
+    history = [{"role": "user", "content": c} for c in ["a" * 40, "b" * 8, "c" * 8, "d" * 8]]
+    assert [m["content"][0] for m in trim_history(history)] == ["b", "c", "d"]
+    assert [m["content"][0] for m in trim_history(history, question="q" * 20)] == ["c", "d"]
+
+
+async def message_count(session_factory):
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(ConversationMessage))
+
+
+@pytest.mark.anyio
+async def test_append_messages_writes_a_turn_in_one_transaction(store):
+    commits = []
+    async with store() as db:
+        event.listen(db.sync_session.bind, "commit", lambda conn: commits.append(1))
+    await conversations.append_messages("fresh", [
+        {"role": "user", "content": "hai"},
+        {"role": "assistant", "content": "halo"},
+    ])
+    messages = await conversations.get_conversation_messages("fresh")
+    assert [(m["role"], m["content"]) for m in messages] == [("user", "hai"), ("assistant", "halo")]
+    assert len(commits) == 1
+
+
+@pytest.mark.anyio
+async def test_write_behind_groups_turns_and_flushes_on_close(store, monkeypatch):
+    buffer = conversations.MessageWriteBuffer(enabled=True, flush_interval=60, flush_size=100)
+    monkeypatch.setattr(conversations, "message_buffer", buffer)
+
+    for token in ("a", "b", "c"):
+        await conversations.append_messages(token, [
+            {"role": "user", "content": f"{token}?"},
+            {"role": "assistant", "content": f"{token}!"},
+        ])
+    assert await message_count(store) == 0
+    assert buffer.stats()["pending"] == 6
+
+    await buffer.close()
+    assert await message_count(store) == 6
+    assert buffer.stats()["flushes"] == 1
+
+
+@pytest.mark.anyio
+async def test_write_behind_reads_see_pending_messages(store, monkeypatch):
+    buffer = conversations.MessageWriteBuffer(enabled=True, flush_interval=60, flush_size=100)
+    monkeypatch.setattr(conversations, "message_buffer", buffer)
+
+    await conversations.append_messages("mine", [{"role": "user", "content": "ingat aku"}])
+    context = await build_chat_context("mine")
+    assert [m["content"] for m in context.messages] == ["ingat aku"]
+    assert buffer.stats()["pending"] == 0
+
+
+@pytest.mark.anyio
+async def test_write_behind_flushes_after_interval(store, monkeypatch):
+    buffer = conversations.MessageWriteBuffer(enabled=True, flush_interval=0.01, flush_size=100)
+    monkeypatch.setattr(conversations, "message_buffer", buffer)
+
+    await conversations.append_message("timed", "user", "cepat")
+    await asyncio.sleep(0.1)
+    assert await message_count(store) == 1
+
+
+@pytest.mark.anyio
+async def test_close_waits_for_in_flight_flush(store, monkeypatch):
+    buffer = conversations.MessageWriteBuffer(enabled=True, flush_interval=0.001, flush_size=100)
+    monkeypatch.setattr(conversations, "message_buffer", buffer)
+    insert_messages = conversations._insert_messages
+
+    async def slow_insert(db, items):
+        await asyncio.sleep(0.05)
+        return await insert_messages(db, items)
+
+    monkeypatch.setattr(conversations, "_insert_messages", slow_insert)
+    await conversations.append_message("closing", "user", "jangan hilang")
+    await asyncio.sleep(0.01)
+    # the timer's flush has taken the message and is still writing it
+    assert buffer.stats()["pending"] == 0
+    await buffer.close()
+    assert await message_count(store) == 1
+
+
+class FlakyInsert:
+    """Fails the first `failures` inserts, then writes normally."""
+
+    def __init__(self, insert_messages, failures):
+        self.insert_messages = insert_messages
+        self.failures = failures
+
+    async def __call__(self, db, items):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database is locked")
+        return await self.insert_messages(db, items)
+
+
+@pytest.mark.anyio
+async def test_failed_flush_is_retried(store, monkeypatch):
+    buffer = conversations.MessageWriteBuffer(enabled=True, flush_interval=0.001, flush_size=100)
+    monkeypatch.setattr(conversations, "message_buffer", buffer)
+    monkeypatch.setattr(conversations, "_insert_messages", FlakyInsert(conversations._insert_messages, 1))
+
+    await conversations.append_message("retry", "user", "pertama")
+    await buffer.flush()
+    assert await message_count(store) == 0
+    assert buffer.stats()["pending"] == 1
+
+    await conversations.append_message("retry", "assistant", "kedua")
+    await asyncio.sleep(0.05)
+    messages = await conversations.get_conversation_messages("retry")
+    assert [m["content"] for m in messages] == ["pertama", "kedua"]
+    assert buffer.stats()["failed"] == 0
+
+
+@pytest.mark.anyio
+async def test_close_retries_then_gives_up(store, monkeypatch):
+    buffer = conversations.MessageWriteBuffer(enabled=True, flush_interval=0.001, flush_size=100, max_retries=2)
+    monkeypatch.setattr(conversations, "message_buffer", buffer)
+    flaky = FlakyInsert(conversations._insert_messages, 2)
+    monkeypatch.setattr(conversations, "_insert_messages", flaky)
+
+    await conversations.append_message("closing", "user", "simpan")
+    await buffer.close()
+    assert await message_count(store) == 1
+
+    flaky.failures = 10
+    await conversations.append_message("closing", "user", "hilang")
+    await buffer.close()
+    assert buffer.stats()["pending"] == 0
+    assert buffer.stats()["failed"] == 1
+
+
+def count_selects(session_factory):
+    statements = []
+    engine = session_factory.kw["bind"].sync_engine
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return lambda: sum(1 for s in statements if s.lstrip().upper().startswith("SELECT"))
+
+
+@pytest.mark.anyio
+async def test_hot_conversation_turns_need_no_reads(store):
+    token = await conversations.create_conversation()
+    selects = count_selects(store)
+
+    for turn in range(12):
+        context = await context_and_fold(token, question=f"q{turn}")
+        await conversations.append_messages(token, [
+            {"role": "user", "content": f"q{turn}"},
+            {"role": "assistant", "content": f"a{turn}"},
+        ])
+
+    assert selects() == 0
+    # folding kept the cached window in step with the database
+    assert context.messages[-1]["content"] == "a10"
+    conversations.conversation_cache.clear()
+    fresh = await build_chat_context(token)
+    assert selects() == 2
+    assert [m["content"] for m in fresh.messages][-2:] == ["q11", "a11"]
+
+
+@pytest.mark.anyio
+async def test_cold_conversation_is_loaded_once(store):
+    await conversations.append_messages("cold", [{"role": "user", "content": "hai"}])
+    conversations.conversation_cache.clear()
+    selects = count_selects(store)
+
+    await build_chat_context("cold")
+    await conversations.append_message("cold", "assistant", "halo")
+    context = await build_chat_context("cold")
+
+    assert selects() == 2
+    assert [m["content"] for m in context.messages] == ["hai", "halo"]
+
+
+@pytest.mark.anyio
+async def test_concurrent_appends_keep_the_cache_complete(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chat.db'}", poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(conversations, "AsyncSessionLocal", async_sessionmaker(bind=engine, expire_on_commit=False))
+    monkeypatch.setattr(conversations, "conversation_cache", MemoryConversationCache(maxsize=16))
+    await conversations.append_message("race", "user", "awal")
+    insert_messages = conversations._insert_messages
+
+    async def slow_insert(db, items):
+        # both appends read the cache entry before either commits
+        update_cache = await insert_messages(db, items)
+        await asyncio.sleep(0.02)
+        return update_cache
+
+    monkeypatch.setattr(conversations, "_insert_messages", slow_insert)
+    await asyncio.gather(
+        conversations.append_message("race", "user", "A"),
+        conversations.append_message("race", "user", "B"),
+    )
+    stored = [m["content"] for m in await conversations.get_conversation_messages("race")]
+    cached = [m["content"] for m in conversations.conversation_cache.get("race")["messages"]]
+    assert sorted(stored) == ["A", "B", "awal"]
+    assert cached == stored
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_null_cache_always_reads(store, monkeypatch):
+    monkeypatch.setattr(conversations, "conversation_cache", NullConversationCache())
+    await conversations.append_messages("plain", [{"role": "user", "content": "hai"}])
+    context = await build_chat_context("plain")
+    assert [m["content"] for m in context.messages] == ["hai"]
+
+
+class DictCache(ConversationCacheBackend):
+    def __init__(self):
+        self.data = {}
+
+    def get(self, token):
+        return self.data.get(token)
+
+    def set(self, token, entry):
+        self.data[token] = json.loads(json.dumps(entry))
+
+    def delete(self, token):
+        self.data.pop(token, None)
+
+    def clear(self):
+        self.data.clear()
+
+
+class GetOnlyCache(ConversationCacheBackend):
+    def get(self, token):
+        return None
+
+
+def test_cache_backend_is_pluggable():
+    assert isinstance(load_conversation_cache("memory"), MemoryConversationCache)
+    assert isinstance(load_conversation_cache("none"), NullConversationCache)
+    assert isinstance(load_conversation_cache(f"{__name__}:DictCache"), DictCache)
+    # unknown backends disable caching rather than failing startup
+    assert isinstance(load_conversation_cache("no.such.module:Cache"), NullConversationCache)
+    # so do backends missing part of the interface
+    assert isinstance(load_conversation_cache(f"{__name__}:GetOnlyCache"), NullConversationCache)
+
+
+def test_memory_cache_is_bounded_by_bytes():
+    cache = MemoryConversationCache(maxsize=100, maxbytes=5000)
+    for i in range(10):
+        cache.set(f"t{i}", {"id": i, "extra": {}, "messages": [{"id": 1, "role": "user", "content": "x" * 1000}]})
+    stats = cache.stats()
+    assert stats["bytes"] <= 5000
+    assert stats["size"] < 10
+    assert cache.get("t9") is not None
+    assert cache.get("t0") is None
@@ -0,0 +1,107 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.routes.chat as chat_routes
+from app.main import get_application
+from app.services.conversations import ChatContext
+from app.services.gemini_chat import GeminiChatService
+
+
+class FakeStreamingModel:
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    async def generate_content_async(self, prompt, stream=False):
+        assert stream
+
+        async def response():
+            for i, text in enumerate(self.chunks):
+                if self.fail_after is not None and i >= self.fail_after:
+                    raise RuntimeError("upstream dropped")
+                yield SimpleNamespace(text=text)
+
+        return response()
+
+
+def parse_events(body):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        event, data = "message", None
+        for line in frame.split("\n"):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):])
+        events.append((event, data))
+    return events
+
+
+@pytest.fixture
+def stream_client(monkeypatch):
+    stored = []
+
+    async def fake_build_context(token, question=""):
+        return ChatContext(messages=[m for m in stored if m["token"] == token])
+
+    async def fake_append(token, messages):
+        stored.extend({"token": token, "role": m["role"], "content": m["content"]} for m in messages)
+
+    service = GeminiChatService.__new__(GeminiChatService)
+    service.model = FakeStreamingModel(["Halo", ", saya ", "Rakan."])
+    monkeypatch.setattr(chat_routes, "gemini_chat", service)
+    monkeypatch.setattr(chat_routes, "build_chat_context", fake_build_context)
+    monkeypatch.setattr(chat_routes, "append_messages", fake_append)
+    return TestClient(get_application()), service, stored
+
+
+def test_chat_stream_sends_deltas_then_done(stream_client):
+    client, _, stored = stream_client
+    res = client.post("/api/chat/stream", json={"question": "siapa kamu?", "conversation_token": "abc"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_events(res.text)
+    deltas = [data["delta"] for event, data in events if event == "message"]
+    assert deltas == ["Halo", ", saya ", "Rakan."]
+    assert events[-1] == ("done", {"conversation_token": "abc"})
+
+    # the full reply is persisted once, after the stream completes
+    assert [(m["role"], m["content"]) for m in stored] == [
+        ("user", "siapa kamu?"),
+        ("assistant", "Halo, saya Rakan."),
+    ]
+
+
+def test_chat_stream_reports_upstream_errors(stream_client):
+    client, service, stored = stream_client
+    service.model = FakeStreamingModel(["Halo", "lagi"], fail_after=1)
+    res = client.post("/api/chat/stream", json={"question": "hai", "conversation_token": "abc"})
+
+    events = parse_events(res.text)
+    assert events[0] == ("message", {"delta": "Halo"})
+    assert events[-1][0] == "error"
+    # a partial reply is not persisted
+    assert [m["role"] for m in stored] == ["user"]
+
+
+def test_summary_fold_runs_after_the_stream(stream_client, monkeypatch):
+    client, _, stored = stream_client
+    folded = []
+
+    async def pending_context(token, question=""):
+        return ChatContext(messages=[], pending=object())
+
+    async def record_fold(token, context, summarizer):
+        # the whole reply was persisted before the fold started
+        folded.append((token, len(stored)))
+
+    monkeypatch.setattr(chat_routes, "build_chat_context", pending_context)
+    monkeypatch.setattr(chat_routes, "fold_chat_context", record_fold)
+    res = client.post("/api/chat/stream", json={"question": "hai", "conversation_token": "abc"})
+
+    assert parse_events(res.text)[-1][0] == "done"
+    assert folded == [("abc", 2)]
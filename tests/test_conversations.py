@@ -0,0 +1,103 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import app.services.conversations as conversations
+from app.db import Base
+from app.main import get_application
+from app.models.conversation import Conversation, ConversationMessage
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'conversations.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        for token, count in (("busy", 7), ("empty", 0)):
+            conv = Conversation(token=token, extra_data="{}")
+            db.add(conv)
+            db.flush()
+            for i in range(count):
+                db.add(ConversationMessage(conv.id, "user" if i % 2 == 0 else "assistant", f"m{i}"))
+        db.commit()
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def client(db_url, monkeypatch):
+    engine = create_async_engine(db_url.replace("sqlite://", "sqlite+aiosqlite://"), poolclass=NullPool)
+    statements = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    monkeypatch.setattr(conversations, "AsyncSessionLocal", async_sessionmaker(bind=engine, expire_on_commit=False))
+
+    test_client = TestClient(get_application())
+    test_client.statements = statements
+    return test_client
+
+
+def contents(body):
+    return [m["content"] for m in body["messages"]]
+
+
+def test_history_is_loaded_with_a_single_query(client):
+    res = client.get("/api/conversations/busy")
+    assert res.status_code == 200
+    assert contents(res.json()) == [f"m{i}" for i in range(7)]
+
+    selects = [s for s in client.statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 1
+    # no DDL on the request path
+    assert not any(s.lstrip().upper().startswith("CREATE") for s in client.statements)
+
+
+def test_history_without_limit_returns_everything(client, db_url):
+    engine = create_engine(db_url)
+    with sessionmaker(bind=engine)() as db:
+        conv_id = db.query(Conversation.id).filter(Conversation.token == "busy").scalar()
+        db.add_all(ConversationMessage(conv_id, "user", f"extra{i}") for i in range(60))
+        db.commit()
+    engine.dispose()
+
+    body = client.get("/api/conversations/busy").json()
+    assert len(body["messages"]) == 67
+    assert body["has_more"] is False
+    assert body["next_before_id"] is None
+
+
+def test_history_pages_back_with_before_id(client):
+    first = client.get("/api/conversations/busy", params={"limit": 3}).json()
+    assert contents(first) == ["m4", "m5", "m6"]
+    assert first["has_more"] is True
+
+    second = client.get(
+        "/api/conversations/busy", params={"limit": 3, "before_id": first["next_before_id"]}
+    ).json()
+    assert contents(second) == ["m1", "m2", "m3"]
+
+    last = client.get(
+        "/api/conversations/busy", params={"limit": 3, "before_id": second["next_before_id"]}
+    ).json()
+    assert contents(last) == ["m0"]
+    assert last["has_more"] is False
+    assert last["next_before_id"] is None
+
+
+def test_empty_and_unknown_conversations(client):
+    res = client.get("/api/conversations/empty")
+    assert res.status_code == 200
+    assert res.json()["messages"] == []
+
+    assert client.get("/api/conversations/missing").status_code == 404
+
+
+def test_history_index_exists(db_url):
+    indexes = inspect(create_engine(db_url)).get_indexes("conversation_messages")
+    assert any(ix["column_names"] == ["conversation_id", "id"] for ix in indexes)
@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import StaticPool
+
+from app.core import pool
+from app.main import get_application
+
+
+def test_sqlite_memory_uses_static_pool():
+    options = pool.get_engine_options("sqlite://")
+    assert options["poolclass"] is StaticPool
+    assert options["connect_args"] == {"check_same_thread": False}
+
+
+def test_server_database_maps_connection_counts(monkeypatch):
+    monkeypatch.setattr(pool, "MIN_CONNECTIONS_COUNT", 5)
+    monkeypatch.setattr(pool, "MAX_CONNECTIONS_COUNT", 12)
+    monkeypatch.setattr(pool, "DB_POOL_MAX_OVERFLOW", -1)
+    options = pool.get_engine_options("postgresql://u:p@db/app")
+    assert options["poolclass"] is pool.TimedQueuePool
+    assert options["pool_size"] == 5
+    assert options["max_overflow"] == 7
+    async_options = pool.get_engine_options("postgresql+asyncpg://u:p@db/app", is_async=True)
+    assert async_options["poolclass"] is pool.TimedAsyncAdaptedQueuePool
+
+    monkeypatch.setattr(pool, "DB_POOL_MAX_OVERFLOW", 0)
+    assert pool.get_engine_options("postgresql://u:p@db/app")["max_overflow"] == 0
+
+
+def test_sqlite_file_wal_and_stats(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **pool.get_engine_options(url))
+    pool.configure_sqlite(engine, url)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        stats = pool.get_pool_stats(engine)
+        assert stats["checked_out"] == 1
+    stats = pool.get_pool_stats(engine)
+    assert stats["pool_class"] == "TimedQueuePool"
+    assert stats["checked_out"] == 0
+    assert stats["wait"]["checkouts"] == 1
+    engine.dispose()
+
+
+def test_busy_pool_is_healthy_until_a_checkout_times_out(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, poolclass=pool.TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.01)
+    held = engine.connect()
+    # every connection checked out is only busy
+    assert pool.is_pool_healthy(engine)
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    assert not pool.is_pool_healthy(engine)
+    assert pool.is_pool_healthy(engine, window=0)
+    held.close()
+    engine.dispose()
+
+
+def test_pool_diagnostics_endpoint():
+    client = TestClient(get_application())
+    response = client.get("/api/v1/diagnostics/pool")
+    assert response.status_code == 200
+    assert set(response.json()) == {"sync", "async"}
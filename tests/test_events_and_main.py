@@ -1,24 +1,19 @@
 from fastapi import FastAPI
 from sqlalchemy.exc import OperationalError
 
-from core import events
-from main import get_application
-import services.predict as predict
+from app.core import events
+from app.main import get_application
 
 
 def test_preload_model(monkeypatch):
     called = {}
 
-    def fake_get_model(cls, loader):
-        called["called"] = True
+    def fake_start(preload=True):
+        called["preload"] = preload
 
-    monkeypatch.setattr(
-        predict.MachineLearningModelHandlerScore,
-        "get_model",
-        classmethod(fake_get_model),
-    )
+    monkeypatch.setattr(events.model_registry, "start", fake_start)
     events.preload_model()
-    assert called.get("called") is True
+    assert called.get("preload") is True
 
 
 def test_create_start_app_handler(monkeypatch):
@@ -0,0 +1,90 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import app.services.gemini_client as gemini_client
+from app.core.cache import AsyncSingleFlight, LRUCache, SingleFlight
+from app.services.gemini_chat import GeminiChatService
+from app.services.gemini_search import GeminiSearchService
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeAsyncModel:
+    def __init__(self, text, delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return SimpleNamespace(text=self.text)
+
+
+def chat_service(model):
+    service = GeminiChatService.__new__(GeminiChatService)
+    service.model = model
+    return service
+
+
+def search_service(model):
+    service = GeminiSearchService.__new__(GeminiSearchService)
+    service.cache = LRUCache(maxsize=8, ttl=60)
+    service._flight = SingleFlight()
+    service._async_flight = AsyncSingleFlight()
+    service.model = model
+    return service
+
+
+@pytest.mark.anyio
+async def test_chat_async_replies_without_blocking():
+    model = FakeAsyncModel("Halo!", delay=0.05)
+    service = chat_service(model)
+    replies = await asyncio.gather(*(service.chat_async("hai") for _ in range(10)))
+    assert [reply["reply"] for reply in replies] == ["Halo!"] * 10
+    # all ten were in flight together
+    assert model.max_active == 10
+
+
+@pytest.mark.anyio
+async def test_chat_async_timeout(monkeypatch):
+    monkeypatch.setattr(gemini_client, "GEMINI_TIMEOUT", 0.01)
+    service = chat_service(FakeAsyncModel("late", delay=1))
+    reply = await service.chat_async("hai")
+    assert reply["reply"] == "Terjadi kesalahan saat menghubungi model."
+
+
+@pytest.mark.anyio
+async def test_concurrency_limit(monkeypatch):
+    monkeypatch.setattr(gemini_client, "GEMINI_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(gemini_client, "_limiters", type(gemini_client._limiters)())
+    model = FakeAsyncModel("ok", delay=0.02)
+    service = chat_service(model)
+    await asyncio.gather(*(service.chat_async("hai") for _ in range(6)))
+    assert model.max_active == 2
+
+
+@pytest.mark.anyio
+async def test_parse_search_query_async_single_flight_and_cache():
+    model = FakeAsyncModel('{"category": null, "keywords": ["kopi"]}', delay=0.05)
+    service = search_service(model)
+    results = await asyncio.gather(
+        *(service.parse_search_query_async("Kopi  Murah") for _ in range(5))
+    )
+    assert all(result["keywords"] == ["kopi"] for result in results)
+    assert model.calls == 1
+    await service.parse_search_query_async("kopi murah")
+    assert model.calls == 1
+    assert service.cache_stats()["shared_misses"] == 4
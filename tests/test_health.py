@@ -0,0 +1,112 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.api.routes import predictor
+from app.main import get_application
+from app.services.health import ReadinessCache, load_example
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def loaded_registry(version="v1"):
+    return SimpleNamespace(active=SimpleNamespace(version=version))
+
+
+@pytest.fixture
+def memory_engine():
+    return create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+
+@pytest.mark.anyio
+async def test_readiness_is_cached_for_ttl(memory_engine):
+    cache = ReadinessCache(memory_engine, loaded_registry(), ttl=60)
+    first = await cache.get()
+    assert first == {
+        "status": True,
+        "checks": {"model": True, "database": True, "pool": True},
+        "model_version": "v1",
+    }
+    assert await cache.get() is first
+    assert cache.refreshes == 1
+
+    await cache.get(refresh=True)
+    assert cache.refreshes == 2
+    await memory_engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_readiness_reports_failing_checks(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/app.db")
+    cache = ReadinessCache(engine, SimpleNamespace(active=None, load_initial=lambda: None), ttl=0)
+    result = await cache.get()
+    assert result["status"] is False
+    assert result["checks"]["model"] is False
+    assert result["checks"]["database"] is False
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_readiness_loads_lazy_model(memory_engine):
+    registry = SimpleNamespace(active=None)
+    registry.load_initial = lambda: SimpleNamespace(version="v1")
+    result = await ReadinessCache(memory_engine, registry, ttl=0).get()
+    assert result["status"] is True
+    assert result["model_version"] == "v1"
+    await memory_engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_failed_lazy_load_is_not_retried_per_probe(memory_engine):
+    attempts = []
+    registry = SimpleNamespace(active=None, load_initial=lambda: attempts.append(1))
+    cache = ReadinessCache(memory_engine, registry, ttl=0)
+    for _ in range(3):
+        assert (await cache.get())["checks"]["model"] is False
+    assert len(attempts) == 1
+
+    # a model activated later, e.g. by the registry watcher, is reported
+    registry.active = SimpleNamespace(version="v2")
+    assert (await cache.get())["model_version"] == "v2"
+    await memory_engine.dispose()
+
+
+def test_example_is_parsed_once(tmp_path):
+    example = tmp_path / "example.json"
+    example.write_text(json.dumps({f"feature{i}": float(i) for i in range(1, 6)}))
+    first = load_example(str(example))
+    example.unlink()
+    assert load_example(str(example)) is first
+    assert not first.flags.writeable
+
+
+class FixedReadiness:
+    def __init__(self, result):
+        self.result = result
+
+    async def get(self, refresh=False):
+        return self.result
+
+
+def test_live_and_ready_endpoints(monkeypatch):
+    client = TestClient(get_application())
+    assert client.get("/api/v1/health/live").json() == {"status": True, "model_version": None}
+
+    ready = {"status": True, "checks": {"model": True}, "model_version": "v1"}
+    monkeypatch.setattr(predictor, "readiness", FixedReadiness(ready))
+    response = client.get("/api/v1/health/ready")
+    assert response.status_code == 200
+    assert response.json() == ready
+
+    not_ready = {"status": False, "checks": {"model": False}, "model_version": None}
+    monkeypatch.setattr(predictor, "readiness", FixedReadiness(not_ready))
+    response = client.get("/api/v1/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["model"] is False
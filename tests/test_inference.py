@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from app.core.errors import ModelLoadException
+from app.services import inference
+from app.services.inference import (
+    InferenceBackend,
+    SklearnBackend,
+    assert_equivalent,
+    build_backend,
+)
+from app.services.model_registry import ModelRegistry
+
+
+class SumModel:
+    n_features_in_ = 5
+
+    def predict(self, data):
+        return np.asarray(data).sum(axis=1)
+
+
+class FakeBackend(InferenceBackend):
+    name = "fake"
+    offset = 0.0
+
+    def __init__(self, model, path=None, n_features=None, threads=1):
+        self.model = model
+
+    def predict(self, data):
+        return self.model.predict(data) + self.offset
+
+
+EXAMPLE = np.array([[1.0, 2.0, 3.0, 4.0, 5.0]])
+
+
+def test_backend_without_predict_fails_on_construction():
+    class Incomplete(InferenceBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_assert_equivalent_uses_tolerance_and_compares_labels():
+    assert_equivalent(np.array([1.0, 2.0]), np.array([1.0, 2.0 + 1e-7], dtype=np.float32))
+    assert_equivalent(np.array(["ok", "nok"]), np.array(["ok", "nok"]))
+    with pytest.raises(ModelLoadException):
+        assert_equivalent(np.array([1.0, 2.0]), np.array([1.0, 2.1]))
+    with pytest.raises(ModelLoadException):
+        assert_equivalent(np.array(["ok"]), np.array(["nok"]))
+
+
+def test_sklearn_backend_is_the_default():
+    backend = build_backend("sklearn", SumModel(), example=EXAMPLE)
+    assert isinstance(backend, SklearnBackend)
+    assert backend.predict(EXAMPLE)[0] == 15.0
+
+
+def test_equivalent_backend_is_used(monkeypatch):
+    monkeypatch.setitem(inference.BACKENDS, "fake", FakeBackend)
+    assert isinstance(build_backend("fake", SumModel(), example=EXAMPLE), FakeBackend)
+
+
+def test_diverging_backend_falls_back_to_sklearn(monkeypatch):
+    monkeypatch.setitem(inference.BACKENDS, "fake", FakeBackend)
+    monkeypatch.setattr(FakeBackend, "offset", 0.5)
+    assert isinstance(build_backend("fake", SumModel(), example=EXAMPLE), SklearnBackend)
+
+
+def test_unavailable_onnx_falls_back_to_sklearn(monkeypatch):
+    def missing(*args, **kwargs):
+        raise ModelLoadException("onnxruntime is not installed")
+
+    monkeypatch.setitem(inference.BACKENDS, "onnx", missing)
+    assert isinstance(build_backend("onnx", SumModel(), example=EXAMPLE), SklearnBackend)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ModelLoadException):
+        build_backend("tensorrt", SumModel(), example=EXAMPLE)
+
+
+def test_registry_predicts_through_backend(monkeypatch, tmp_path):
+    monkeypatch.setitem(inference.BACKENDS, "fake", FakeBackend)
+    (tmp_path / "model.pkl").write_bytes(b"")
+    registry = ModelRegistry(
+        str(tmp_path), loader=lambda path: SumModel(), backend="fake", watch_interval=0
+    )
+    registry.start()
+    assert isinstance(registry.get().backend, FakeBackend)
+    assert registry.get().predict(EXAMPLE)[0] == 15.0
+    assert registry.stats()["versions"]["model"]["backend"] == "fake"
+
+
+def test_onnx_backend_matches_sklearn():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+    from sklearn.linear_model import LogisticRegression
+
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(200, 5))
+    model = LogisticRegression().fit(data, (data.sum(axis=1) > 0).astype(int))
+    backend = build_backend("onnx", model, example=EXAMPLE)
+    assert backend.name == "onnx"
+    np.testing.assert_array_equal(backend.predict(data[:10]), model.predict(data[:10]))
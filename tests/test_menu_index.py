@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.menu_index import MenuInvertedIndex
+
+
+def menu(id, name, description=None, ingredients=None):
+    return SimpleNamespace(id=id, name=name, description=description, ingredients=ingredients or [])
+
+
+@pytest.fixture
+def index():
+    index = MenuInvertedIndex()
+    index.build([
+        menu(1, "Es Kopi Susu", "Classic iced coffee", ["coffee", "milk"]),
+        menu(2, "Nasi Goreng", "Indonesian fried rice", ["rice", "egg"]),
+        menu(3, "Mie Goreng", "Indonesian fried noodles", ["noodles", "egg"]),
+    ])
+    return index
+
+
+def test_search_intersects_tokens_and_unions_keywords(index):
+    assert index.search(["goreng"]) == [2, 3]
+    assert index.search(["goreng rice"]) == [2]
+    assert index.search(["kopi", "noodles"]) == [1, 3]
+    assert index.search(["kopi noodles"]) == []
+    assert index.search(["%%"]) == []
+
+
+def test_search_matches_token_prefixes(index):
+    assert index.search(["gor"]) == [2, 3]
+    assert index.search(["indo fri"]) == [2, 3]
+
+
+def test_incremental_updates(index):
+    index.add(menu(4, "Kopi Tubruk", "", []))
+    assert index.search(["kopi"]) == [1, 4]
+    index.update(menu(1, "Teh Tarik", "", ["tea"]))
+    assert index.search(["kopi"]) == [4]
+    assert index.search(["coffee"]) == []
+    index.remove(4)
+    assert index.search(["kopi"]) == []
+    assert index.stats()["documents"] == 3
+
+
+def test_add_is_noop_until_built():
+    index = MenuInvertedIndex()
+    index.add(menu(1, "Kopi"))
+    assert index.stats()["documents"] == 0
@@ -0,0 +1,379 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base, get_async_db
+from app.main import get_application
+from app.services.menu_fts import ensure_text_index, menu_fts
+
+MENUS = [
+    {"name": "Es Kopi Susu", "category": "drinks", "calories": 180, "price": 25000,
+     "ingredients": ["coffee", "milk", "ice"], "description": "Classic iced coffee with milk"},
+    {"name": "Nasi Goreng", "category": "food", "calories": 450, "price": 35000,
+     "ingredients": ["rice", "egg", "chicken"], "description": "Indonesian fried rice"},
+    {"name": "Cappuccino", "category": "drinks", "calories": 120, "price": 30000,
+     "ingredients": ["espresso", "milk_foam"], "description": "Italian coffee"},
+    {"name": "Jus Jeruk", "category": "drinks", "calories": 110, "price": 20000,
+     "ingredients": ["orange", "sugar"], "description": "Fresh orange juice"},
+    {"name": "Mie Goreng", "category": "food", "calories": 420, "price": 30000,
+     "ingredients": ["noodles", "egg", "chili"], "description": "Indonesian fried noodles"},
+]
+
+
+def make_client(text_index=True):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    state = {"ready": False}
+
+    async def override_get_async_db():
+        if not state["ready"]:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                # what startup does
+                if text_index:
+                    menu_fts.record(engine, await conn.run_sync(ensure_text_index))
+            state["ready"] = True
+        async with session_factory() as db:
+            yield db
+
+    app = get_application()
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    test_client = TestClient(app)
+    test_client.engine = engine
+    for menu in MENUS:
+        assert test_client.post("/api/menu", json=menu).status_code == 201
+    return test_client
+
+
+@pytest.fixture
+def client():
+    return make_client()
+
+
+def walk_cursor(client, params):
+    names, cursor = [], ""
+    while cursor is not None:
+        response = client.get("/api/menu", params={**params, "cursor": cursor})
+        assert response.status_code == 200
+        body = response.json()
+        names.extend(item["name"] for item in body["data"])
+        cursor = body["pagination"]["next_cursor"]
+    return names
+
+
+def test_cursor_pagination_walks_every_row_once(client):
+    names = walk_cursor(client, {"per_page": 2, "sort": "price:asc"})
+    assert names == ["Jus Jeruk", "Es Kopi Susu", "Cappuccino", "Mie Goreng", "Nasi Goreng"]
+
+
+def test_cursor_pagination_descending_with_filter(client):
+    names = walk_cursor(client, {"per_page": 1, "sort": "price:desc", "category": "drinks"})
+    assert names == ["Cappuccino", "Es Kopi Susu", "Jus Jeruk"]
+
+
+def test_cursor_rejects_garbage_and_mismatched_sort(client):
+    assert client.get("/api/menu", params={"cursor": "!!!"}).status_code == 400
+    first = client.get("/api/menu", params={"cursor": "", "per_page": 1, "sort": "name:asc"})
+    token = first.json()["pagination"]["next_cursor"]
+    response = client.get("/api/menu", params={"cursor": token, "sort": "price:asc"})
+    assert response.status_code == 400
+
+
+def test_count_can_be_skipped_or_estimated(client):
+    body = client.get("/api/menu", params={"count": "false", "per_page": 2}).json()
+    assert body["pagination"]["total"] is None
+    assert body["pagination"]["has_more"] is True
+    body = client.get("/api/menu", params={"count": "estimate"}).json()
+    assert body["pagination"]["total"] == len(MENUS)
+    # filters and text search are counted exactly, not estimated
+    body = client.get("/api/menu", params={"count": "estimate", "category": "food"}).json()
+    assert body["pagination"]["total"] == 2
+    assert body["pagination"]["total_pages"] == 1
+    body = client.get("/api/menu", params={"count": "estimate", "q": "goreng"}).json()
+    assert body["pagination"]["total"] == 2
+    body = client.get("/api/menu", params={"per_page": 2}).json()
+    assert body["pagination"]["total"] == len(MENUS)
+    assert body["pagination"]["total_pages"] == 3
+
+
+def test_search_keyword_fallback_in_sql(client):
+    body = client.get("/api/menu/search", params={"q": "Goreng"}).json()
+    assert [item["name"] for item in body["data"]] == ["Nasi Goreng", "Mie Goreng"]
+    assert body["pagination"]["total"] == 2
+    # ingredients and description are searched too
+    body = client.get("/api/menu/search", params={"q": "orange"}).json()
+    assert [item["name"] for item in body["data"]] == ["Jus Jeruk"]
+    body = client.get("/api/menu/search", params={"q": "100%"}).json()
+    assert body["data"] == []
+
+
+def test_search_structured_filters_page_in_sql(client, monkeypatch):
+    from app.api.routes import menu
+
+    monkeypatch.setattr(menu.gemini_service, "is_available", lambda: True)
+    async def parse_search_query_async(q, menu_items=None):
+        return {
+            "category": "drinks",
+            "min_price": None,
+            "max_price": "30000",
+            "max_calories": 150,
+            "keywords": ["coffee", "juice"],
+        }
+
+    monkeypatch.setattr(menu.gemini_service, "parse_search_query_async", parse_search_query_async)
+    pages = [
+        client.get(
+            "/api/menu/search", params={"q": "minuman murah", "per_page": 1, "page": page}
+        ).json()
+        for page in (1, 2)
+    ]
+    assert pages[0]["pagination"]["total"] == 2
+    assert pages[0]["pagination"]["total_pages"] == 2
+    names = [item["name"] for body in pages for item in body["data"]]
+    assert sorted(names) == ["Cappuccino", "Jus Jeruk"]
+
+def test_search_never_runs_ddl_without_startup_index():
+    client = make_client(text_index=False)
+    statements = []
+    event.listen(
+        client.engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement.lstrip().upper()),
+    )
+    # substring fallback: "oreng" is inside "goreng", not a token prefix
+    body = client.get("/api/menu/search", params={"q": "oreng"}).json()
+    assert [item["name"] for item in body["data"]] == ["Nasi Goreng", "Mie Goreng"]
+    assert not [s for s in statements if s.startswith(("CREATE", "ALTER", "DELETE", "INSERT"))]
+
+
+def test_full_text_search_ranks_and_tracks_writes(client):
+    # a match in the name outranks matches in description or ingredients
+    created = client.post("/api/menu", json={
+        "name": "Coffee Jelly", "category": "drinks", "calories": 90, "price": 15000,
+        "ingredients": ["jelly"], "description": "Sweet dessert drink",
+    }).json()["data"]
+    names = [item["name"] for item in client.get("/api/menu/search", params={"q": "coffee"}).json()["data"]]
+    assert names[0] == "Coffee Jelly"
+    assert set(names) == {"Coffee Jelly", "Es Kopi Susu", "Cappuccino"}
+
+    client.put(f"/api/menu/{created['id']}", json={**created, "name": "Grass Jelly", "description": "Dessert"})
+    names = [item["name"] for item in client.get("/api/menu/search", params={"q": "coffee"}).json()["data"]]
+    assert "Grass Jelly" not in names
+    assert client.get("/api/menu/search", params={"q": "grass"}).json()["pagination"]["total"] == 1
+
+    client.delete(f"/api/menu/{created['id']}")
+    assert client.get("/api/menu/search", params={"q": "grass"}).json()["pagination"]["total"] == 0
+
+
+def test_list_menu_q_uses_text_search(client):
+    body = client.get("/api/menu", params={"q": "gore", "sort": "price:asc"}).json()
+    assert [item["name"] for item in body["data"]] == ["Mie Goreng", "Nasi Goreng"]
+    assert body["pagination"]["total"] == 2
+    names = walk_cursor(client, {"q": "fried", "per_page": 1})
+    assert names == ["Nasi Goreng", "Mie Goreng"]
+
+
+def test_memory_backend_tracks_writes(client, monkeypatch):
+    from app.api.routes import menu
+    from app.services.menu_index import MenuInvertedIndex
+
+    index = MenuInvertedIndex()
+    index.build([])
+    monkeypatch.setattr(menu, "menu_index", index)
+    monkeypatch.setattr(menu, "MENU_SEARCH_BACKEND", "memory")
+    created = client.post("/api/menu", json={**MENUS[0], "name": "Kopi Tubruk"}).json()["data"]
+    body = client.get("/api/menu/search", params={"q": "tubruk"}).json()
+    assert [item["id"] for item in body["data"]] == [created["id"]]
+    client.delete(f"/api/menu/{created['id']}")
+    assert client.get("/api/menu/search", params={"q": "tubruk"}).json()["data"] == []
+
+
+def test_memory_backend_large_match_uses_database_search(client, monkeypatch):
+    from app.api.routes import menu
+    from app.services.menu_index import MenuInvertedIndex
+
+    index = MenuInvertedIndex()
+    index.build([])
+    monkeypatch.setattr(menu, "menu_index", index)
+    monkeypatch.setattr(menu, "MENU_SEARCH_BACKEND", "memory")
+    monkeypatch.setattr(menu, "MENU_INDEX_MAX_IDS", 1)
+    for name in ("Kopi Tubruk", "Kopi Luwak"):
+        client.post("/api/menu", json={**MENUS[0], "name": name})
+    statements = []
+    event.listen(
+        client.engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    body = client.get("/api/menu/search", params={"q": "kopi"}).json()
+    assert {item["name"] for item in body["data"]} == {"Es Kopi Susu", "Kopi Tubruk", "Kopi Luwak"}
+    assert not [s for s in statements if "menus.id IN" in s]
+
+
+def test_menu_reads_are_cached_with_etags(client):
+    from app.services.menu_cache import menu_response_cache
+
+    first = client.get("/api/menu", params={"per_page": 2, "sort": "price:asc"})
+    etag = first.headers["etag"]
+    assert etag.startswith('"')
+
+    hits = menu_response_cache.stats()["hits"]
+    # the same page with equivalent parameters comes from the cache
+    again = client.get("/api/menu", params={"sort": " price:asc ", "per_page": "2"})
+    assert again.content == first.content
+    assert again.headers["etag"] == etag
+    assert menu_response_cache.stats()["hits"] == hits + 1
+
+    not_modified = client.get(
+        "/api/menu", params={"per_page": 2, "sort": "price:asc"}, headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    menu_id = first.json()["data"][0]["id"]
+    item = client.get(f"/api/menu/{menu_id}")
+    grouped = client.get("/api/menu/group-by-category")
+    assert grouped.json()["data"] == {"drinks": 3, "food": 2}
+
+    # a write invalidates every cached read
+    client.put(f"/api/menu/{menu_id}", json={**MENUS[3], "price": 1000})
+    changed = client.get(
+        "/api/menu", params={"per_page": 2, "sort": "price:asc"}, headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["data"][0]["price"] == 1000
+    assert client.get(f"/api/menu/{menu_id}").headers["etag"] != item.headers["etag"]
+
+    client.post("/api/menu", json={**MENUS[1], "name": "Soto Ayam"})
+    assert client.get("/api/menu/group-by-category").json()["data"] == {"drinks": 3, "food": 3}
+
+
+def test_missing_menu_is_not_cached(client):
+    assert client.get("/api/menu/999").status_code == 404
+    assert "etag" not in client.get("/api/menu/999").headers
+
+
+def test_group_by_category_list_is_one_query(client):
+    statements = []
+    event.listen(
+        client.engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    body = client.get("/api/menu/group-by-category", params={"mode": "list", "per_category": 2}).json()
+    assert {cat: [item["name"] for item in items] for cat, items in body["data"].items()} == {
+        "drinks": ["Es Kopi Susu", "Cappuccino"],
+        "food": ["Nasi Goreng", "Mie Goreng"],
+    }
+    assert len(statements) == 1
+    assert "ROW_NUMBER" in statements[0].upper()
+
+
+@pytest.mark.parametrize("sqlite_version", [(3, 40, 0), (3, 24, 0)])
+def test_group_by_category_sorts_within_category(client, monkeypatch, sqlite_version):
+    from app.api.routes import menu
+
+    monkeypatch.setattr(menu, "sqlite3", SimpleNamespace(sqlite_version_info=sqlite_version))
+    params = {"mode": "list", "per_category": 2, "sort": "price:desc"}
+    data = client.get("/api/menu/group-by-category", params=params).json()["data"]
+    assert [item["name"] for item in data["drinks"]] == ["Cappuccino", "Es Kopi Susu"]
+    assert [item["name"] for item in data["food"]] == ["Nasi Goreng", "Mie Goreng"]
+
+    params["sort"] = "calories:asc"
+    data = client.get("/api/menu/group-by-category", params=params).json()["data"]
+    assert [item["name"] for item in data["drinks"]] == ["Jus Jeruk", "Cappuccino"]
+    assert [item["name"] for item in data["food"]] == ["Mie Goreng", "Nasi Goreng"]
+
+
+def test_bulk_import_json_reports_bad_rows(client):
+    rows = [
+        {"name": "Teh Tarik", "category": "drinks", "calories": 150, "price": 15000},
+        {"name": "", "category": "drinks", "calories": 10, "price": 5000},
+        {"name": "Sate Ayam", "category": "food", "calories": -1, "price": 30000},
+        {"name": "Bakso", "category": "food", "calories": 350, "price": 25000, "ingredients": ["beef"]},
+    ]
+    res = client.post("/api/menu/bulk", json=rows)
+    assert res.status_code == 200
+    report = res.json()
+    assert report["inserted"] == 2
+    assert report["failed"] == 2
+    assert [error["row"] for error in report["errors"]] == [2, 3]
+    assert report["errors"][1]["errors"][0].startswith("calories")
+
+    names = [item["name"] for item in client.get("/api/menu", params={"per_page": 100}).json()["data"]]
+    assert "Teh Tarik" in names and "Bakso" in names and "Sate Ayam" not in names
+
+
+def test_bulk_import_ndjson_and_csv_in_batches(client):
+    ndjson = "\n".join([
+        '{"name": "Es Teh", "category": "drinks", "calories": 90, "price": 8000}',
+        "not json",
+        '{"name": "Lemon Tea", "category": "drinks", "calories": 80, "price": 12000}',
+        "",
+        '{"name": "Roti Bakar", "category": "food", "calories": 300, "price": 18000}',
+    ])
+    res = client.post(
+        "/api/menu/bulk", params={"batch_size": 2}, content=ndjson,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    report = res.json()
+    assert (report["inserted"], report["failed"]) == (3, 1)
+    assert report["errors"][0]["row"] == 2
+
+    csv_body = (
+        "name,category,calories,price,ingredients,description\n"
+        'Soto Ayam,food,320,28000,chicken;turmeric,"Chicken soup, with rice"\n'
+        "Kopi Hitam,drinks,abc,10000,,\n"
+    )
+    report = client.post("/api/menu/bulk", content=csv_body, headers={"Content-Type": "text/csv"}).json()
+    assert (report["inserted"], report["failed"]) == (1, 1)
+    soto = client.get("/api/menu", params={"q": "soto"}).json()["data"][0]
+    assert soto["ingredients"] == ["chicken", "turmeric"]
+    assert soto["description"] == "Chicken soup, with rice"
+
+    assert client.post("/api/menu/bulk", content="x", headers={"Content-Type": "text/plain"}).status_code == 415
+    assert client.post("/api/menu/bulk", content="{}", headers={"Content-Type": "application/json"}).status_code == 400
+
+
+def test_export_streams_ndjson_and_csv(client):
+    ndjson = client.get("/api/menu/export")
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [row["name"] for row in rows] == [menu["name"] for menu in MENUS]
+
+    exported = client.get("/api/menu/export", params={"format": "csv"})
+    assert exported.headers["content-type"].startswith("text/csv")
+    assert exported.text.splitlines()[0].startswith("id,name,category")
+
+    # the CSV export can be imported back as-is
+    report = client.post("/api/menu/bulk", content=exported.text, headers={"Content-Type": "text/csv"}).json()
+    assert (report["inserted"], report["failed"]) == (len(MENUS), 0)
+    copies = client.get("/api/menu", params={"q": "cappuccino"}).json()["data"]
+    assert len(copies) == 2
+    assert copies[0]["ingredients"] == copies[1]["ingredients"] == ["espresso", "milk_foam"]
+
+
+def test_list_menu_streams_ndjson(client, monkeypatch):
+    from app.api.routes import menu
+
+    monkeypatch.setattr(menu, "MENU_STREAM_CHUNK_SIZE", 2)
+    ndjson = {"Accept": "application/x-ndjson"}
+
+    res = client.get("/api/menu", headers=ndjson)
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    assert "etag" not in res.headers
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    # every row, not just the first page
+    assert [row["name"] for row in rows] == [menu["name"] for menu in MENUS]
+
+    res = client.get("/api/menu", params={"category": "drinks", "sort": "price:desc", "per_page": 1}, headers=ndjson)
+    assert [json.loads(line)["name"] for line in res.text.splitlines()] == ["Cappuccino", "Es Kopi Susu", "Jus Jeruk"]
+
+    res = client.get("/api/menu", params={"q": "goreng", "max_price": 32000}, headers=ndjson)
+    assert [json.loads(line)["name"] for line in res.text.splitlines()] == ["Mie Goreng"]
+
+    # plain JSON clients still get the paginated envelope
+    assert "pagination" in client.get("/api/menu").json()
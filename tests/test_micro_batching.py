@@ -0,0 +1,79 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.errors import PredictException
+from app.services.batching import MicroBatcher
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def row(value):
+    return np.array([[value, 0.0, 0.0, 0.0, 0.0]])
+
+
+@pytest.mark.anyio
+async def test_concurrent_rows_share_one_predict_call():
+    calls = []
+
+    def predict_fn(rows):
+        calls.append(rows.shape)
+        return rows[:, 0] * 2
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=10, max_wait_ms=50)
+    results = await asyncio.gather(*(batcher.submit(row(i)) for i in range(4)))
+    assert calls == [(4, 5)]
+    assert [float(r[0]) for r in results] == [0.0, 2.0, 4.0, 6.0]
+    stats = batcher.stats()
+    assert stats["batches_total"] == 1
+    assert stats["rows_total"] == 4
+    assert stats["queue_depth"] == 0
+
+
+@pytest.mark.anyio
+async def test_flushes_when_batch_is_full():
+    calls = []
+
+    def predict_fn(rows):
+        calls.append(len(rows))
+        return np.zeros(len(rows))
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=2, max_wait_ms=10_000)
+    await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(row(i)) for i in range(4))), timeout=5
+    )
+    assert calls == [2, 2]
+    assert batcher.stats()["max_batch_size_seen"] == 2
+
+
+@pytest.mark.anyio
+async def test_errors_propagate_to_every_caller():
+    def predict_fn(rows):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=10, max_wait_ms=1)
+    results = await asyncio.gather(
+        batcher.submit(row(1)), batcher.submit(row(2)), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+@pytest.mark.anyio
+async def test_wrong_prediction_count_is_rejected():
+    batcher = MicroBatcher(lambda rows: [1], max_batch_size=10, max_wait_ms=1)
+    with pytest.raises(PredictException):
+        await asyncio.gather(batcher.submit(row(1)), batcher.submit(row(2)))
+
+
+@pytest.mark.anyio
+async def test_close_flushes_pending_rows():
+    batcher = MicroBatcher(lambda rows: np.ones(len(rows)), max_wait_ms=10_000)
+    task = asyncio.ensure_future(batcher.submit(row(1)))
+    await asyncio.sleep(0)
+    assert batcher.stats()["queue_depth"] == 1
+    await batcher.close()
+    assert float((await task)[0]) == 1.0
@@ -0,0 +1,64 @@
+import joblib
+import numpy as np
+import pytest
+
+from app.services.model_loading import load_model, memory_usage
+
+
+@pytest.fixture
+def weights():
+    return {"coef": np.arange(1000, dtype=float)}
+
+
+def test_memory_mode_loads_private_arrays(tmp_path, weights):
+    path = tmp_path / "model.joblib"
+    joblib.dump(weights, path)
+    loaded = load_model(str(path), mode="memory")
+    assert not isinstance(loaded["coef"], np.memmap)
+
+
+def test_mmap_mode_maps_uncompressed_dump(tmp_path, weights):
+    path = tmp_path / "model.joblib"
+    joblib.dump(weights, path)
+    loaded = load_model(str(path), mode="mmap")
+    assert isinstance(loaded["coef"], np.memmap)
+    assert not loaded["coef"].flags.writeable
+    np.testing.assert_array_equal(loaded["coef"], weights["coef"])
+
+
+def test_mmap_mode_converts_compressed_file_once(tmp_path, weights):
+    path = tmp_path / "model.pkl"
+    joblib.dump(weights, path, compress=3)
+    cache = tmp_path / "mmap"
+    loaded = load_model(str(path), mode="mmap", cache_dir=str(cache))
+    assert isinstance(loaded["coef"], np.memmap)
+    copies = list(cache.iterdir())
+    assert len(copies) == 1
+
+    load_model(str(path), mode="mmap", cache_dir=str(cache))
+    assert list(cache.iterdir()) == copies
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        load_model(str(tmp_path / "model.pkl"), mode="shared")
+
+
+def test_memory_usage_reports_resident_and_private():
+    resident, private = memory_usage()
+    assert resident >= private >= 0
+
+
+def test_mmap_copies_of_prefixed_versions_are_kept_apart(tmp_path, weights):
+    cache = tmp_path / "mmap"
+    for name in ("model.pkl", "model-v2.pkl"):
+        joblib.dump(weights, tmp_path / name, compress=3)
+        load_model(str(tmp_path / name), mode="mmap", cache_dir=str(cache))
+    assert len(list(cache.iterdir())) == 2
+
+    # a changed model.pkl replaces only its own copy
+    joblib.dump({"coef": np.zeros(3)}, tmp_path / "model.pkl", compress=3)
+    load_model(str(tmp_path / "model.pkl"), mode="mmap", cache_dir=str(cache))
+    names = sorted(path.name for path in cache.iterdir())
+    assert len(names) == 2
+    assert sum(name.startswith("model-v2-") for name in names) == 1
@@ -0,0 +1,146 @@
+import json
+import os
+
+import anyio
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import predictor
+from app.core.errors import ModelNotFoundException
+from app.main import get_application
+from app.services.model_registry import ModelRegistry
+
+
+class ConstantModel:
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, data):
+        return np.full(len(data), self.value)
+
+
+def load_constant(path):
+    # model files hold the constant they predict
+    with open(path) as f:
+        return ConstantModel(float(f.read()))
+
+
+def write_model(directory, name, value, age=10):
+    path = directory / name
+    path.write_text(str(value))
+    # older than the registry's settle delay
+    stamp = path.stat().st_mtime - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+@pytest.fixture
+def registry(tmp_path):
+    example = tmp_path / "example.json"
+    example.write_text(json.dumps({f"feature{i}": float(i) for i in range(1, 6)}))
+    models = tmp_path / "models"
+    models.mkdir()
+    return ModelRegistry(
+        str(models),
+        default_name="model.pkl",
+        loader=load_constant,
+        example_path=str(example),
+        watch_interval=0,
+    )
+
+
+def test_initial_load_prefers_default_name(registry, tmp_path):
+    write_model(tmp_path / "models", "model.pkl", 1, age=20)
+    write_model(tmp_path / "models", "v2.pkl", 2, age=10)
+    registry.start()
+    assert registry.get().version == "model"
+    # files present at startup are not treated as updates
+    assert registry.scan() is None
+
+
+def test_scan_swaps_to_new_version_and_notifies(registry, tmp_path):
+    write_model(tmp_path / "models", "model.pkl", 1)
+    registry.start()
+    swapped = []
+    registry.on_swap(lambda version: swapped.append(version.version))
+    previous = registry.get()
+
+    write_model(tmp_path / "models", "v2.joblib", 2, age=5)
+    assert registry.scan().version == "v2"
+    assert registry.get().version == "v2"
+    assert swapped == ["v2"]
+    # a request holding the old version keeps scoring with it
+    assert previous.predict(np.zeros((1, 5)))[0] == 1
+
+
+def test_invalid_model_is_rejected(registry, tmp_path):
+    write_model(tmp_path / "models", "model.pkl", 1)
+    registry.start()
+    write_model(tmp_path / "models", "broken.pkl", "nan", age=5)
+    assert registry.scan() is None
+    assert registry.get().version == "model"
+    assert "broken" in registry.stats()["rejected"]
+
+
+def test_recent_file_waits_for_next_scan(registry, tmp_path):
+    write_model(tmp_path / "models", "model.pkl", 1)
+    registry.start()
+    write_model(tmp_path / "models", "v2.pkl", 2, age=0)
+    assert registry.scan() is None
+    assert registry.get().version == "model"
+
+
+def test_specific_version_loads_without_activating(registry, tmp_path):
+    write_model(tmp_path / "models", "model.pkl", 1)
+    write_model(tmp_path / "models", "v2.pkl", 2)
+    registry.start()
+    assert registry.get("v2").predict(np.zeros((1, 5)))[0] == 2
+    assert registry.get().version == "model"
+    with pytest.raises(ModelNotFoundException):
+        registry.get("missing")
+
+
+class AlwaysReady:
+    async def get(self, refresh=False):
+        return {"status": True, "checks": {}, "model_version": None}
+
+
+def test_routes_report_and_select_version(registry, tmp_path, monkeypatch):
+    async def skip_log(request, response):
+        pass
+
+    write_model(tmp_path / "models", "model.pkl", 1)
+    write_model(tmp_path / "models", "v0.pkl", 0)
+    registry.start()
+    monkeypatch.setattr(predictor, "model_registry", registry)
+    monkeypatch.setattr(predictor, "log_request", skip_log)
+    monkeypatch.setattr(predictor, "PREDICT_MICRO_BATCHING", False)
+    monkeypatch.setattr(predictor, "INPUT_EXAMPLE", registry.example_path)
+    monkeypatch.setattr(predictor, "readiness", AlwaysReady())
+    client = TestClient(get_application())
+    payload = {f"feature{i}": float(i) for i in range(1, 6)}
+
+    response = client.post("/api/v1/predict", json=payload)
+    assert response.json()["model_version"] == "model"
+    assert response.json()["prediction"] == 1
+
+    response = client.post("/api/v1/predict?version=v0", json=payload)
+    assert response.json()["model_version"] == "v0"
+    assert response.json()["prediction_label"] == "label nok"
+
+    assert client.post("/api/v1/predict?version=v9", json=payload).status_code == 404
+    assert client.get("/api/v1/health").json() == {"status": True, "model_version": "model"}
+    assert client.get("/api/v1/models").json()["active"] == "model"
+
+
+def test_active_version_resolves_without_threadpool(registry, tmp_path, monkeypatch):
+    write_model(tmp_path / "models", "model.pkl", 1)
+    registry.start()
+    monkeypatch.setattr(predictor, "model_registry", registry)
+
+    async def no_threadpool(*args, **kwargs):
+        raise AssertionError("threadpool used for the active version")
+
+    monkeypatch.setattr(predictor, "run_in_threadpool", no_threadpool)
+    assert anyio.run(predictor.resolve_model).version == "model"
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import predictor
+from app.main import get_application
+from app.services.model_registry import ModelRegistry
+
+
+async def skip_log(request, response):
+    pass
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(predictor, "log_request", skip_log)
+    (tmp_path / "v1.pkl").write_bytes(b"")
+    registry = ModelRegistry(str(tmp_path), loader=lambda path: object(), watch_interval=0)
+    registry.validate = lambda model: None
+    monkeypatch.setattr(predictor, "model_registry", registry)
+    return TestClient(get_application())
+
+
+def sample_rows():
+    return [
+        {"feature1": 1.0, "feature2": 2.0, "feature3": 3.0, "feature4": 4.0, "feature5": 5.0},
+        {"feature1": 6.0, "feature2": 7.0, "feature3": 8.0, "feature4": 9.0, "feature5": 10.0},
+    ]
+
+
+def test_predict_batch_rows_single_model_call(client, monkeypatch):
+    calls = []
+
+    def fake_prediction(data, model_version=None):
+        calls.append(data)
+        return np.array([1, 0])
+
+    monkeypatch.setattr(predictor, "get_prediction", fake_prediction)
+    response = client.post("/api/v1/predict/batch", json=sample_rows())
+    assert response.status_code == 200
+    assert response.json() == {
+        "predictions": [1.0, 0.0],
+        "prediction_labels": ["label ok", "label nok"],
+        "model_version": "v1",
+    }
+    assert len(calls) == 1
+    assert calls[0].shape == (2, 5)
+
+
+def test_predict_batch_columnar(client, monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda data, model_version=None: data[:, 0] > 3)
+    columns = {name: [row[name] for row in sample_rows()] for name in sample_rows()[0]}
+    response = client.post("/api/v1/predict/batch", json=columns)
+    assert response.status_code == 200
+    assert response.json()["prediction_labels"] == ["label nok", "label ok"]
+
+
+def test_predict_batch_columnar_length_mismatch(client):
+    columns = {f"feature{i}": [1.0, 2.0] for i in range(1, 6)}
+    columns["feature5"] = [1.0]
+    response = client.post("/api/v1/predict/batch", json=columns)
+    assert response.status_code == 422
+
+
+def test_predict_batch_empty(client):
+    response = client.post("/api/v1/predict/batch", json=[])
+    assert response.status_code == 422
+
+
+def test_predict_batch_too_large(client, monkeypatch):
+    monkeypatch.setattr(predictor, "PREDICT_BATCH_MAX_ROWS", 1)
+    response = client.post("/api/v1/predict/batch", json=sample_rows())
+    assert response.status_code == 413
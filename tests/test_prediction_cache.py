@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.api.routes import predictor
+from app.main import get_application
+from app.services.model_registry import ModelRegistry, ModelVersion
+from app.services.prediction_cache import PredictionCache
+
+
+def model_version(version="v1", signature=(1, 1)):
+    return ModelVersion(version, f"{version}.pkl", None, signature, 0.0, 0.0)
+
+
+def test_key_quantizes_features_and_includes_version():
+    cache = PredictionCache(enabled=True, decimals=6)
+    point = np.array([[1.0, 2.0, 0.0, 4.0, 5.0]])
+    close = np.array([[1.0000000001, 2.0, -0.0, 4.0, 5.0]])
+    assert cache.key(point, model_version()) == cache.key(close, model_version())
+    assert cache.key(point, model_version()) != cache.key(point, model_version("v2"))
+    assert cache.key(point, model_version()) != cache.key(point, model_version(signature=(2, 1)))
+    assert cache.key(point + 0.001, model_version()) != cache.key(point, model_version())
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PredictionCache(enabled=False)
+    key = cache.key(np.zeros((1, 5)), model_version())
+    cache.set(key, 1.0)
+    assert key is None
+    assert cache.get(key) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_model_swap_invalidates(tmp_path):
+    for name, value in (("model.pkl", "1"), ("v2.pkl", "2")):
+        path = tmp_path / name
+        path.write_text(value)
+        os.utime(path, (1, 1))
+    registry = ModelRegistry(str(tmp_path), default_name="model.pkl", loader=lambda path: object(), watch_interval=0)
+    registry.validate = lambda model: None
+    cache = PredictionCache(enabled=True)
+    registry.on_swap(cache.invalidate)
+    registry.start()
+    cache.set(cache.key(np.zeros((1, 5)), registry.get()), 1.0)
+    assert cache.stats()["size"] == 1
+
+    (tmp_path / "v3.pkl").write_text("3")
+    os.utime(tmp_path / "v3.pkl", (2, 2))
+    registry.scan()
+    assert registry.get().version == "v3"
+    assert cache.stats()["size"] == 0
+
+
+def test_repeated_predict_is_served_from_cache(monkeypatch):
+    calls, logged = [], []
+
+    def fake_prediction(data, model_version=None):
+        calls.append(data)
+        return [1]
+
+    async def fake_model(version=None):
+        return model_version()
+
+    async def record_log(request, response):
+        logged.append(request)
+
+    cache = PredictionCache(enabled=True)
+    monkeypatch.setattr(predictor, "prediction_cache", cache)
+    monkeypatch.setattr(predictor, "get_prediction", fake_prediction)
+    monkeypatch.setattr(predictor, "resolve_model", fake_model)
+    monkeypatch.setattr(predictor, "log_request", record_log)
+    monkeypatch.setattr(predictor, "PREDICT_MICRO_BATCHING", False)
+    monkeypatch.setattr(predictor, "PREDICT_CACHE_LOG_HITS", False)
+    client = TestClient(get_application())
+    payload = {f"feature{i}": float(i) for i in range(1, 6)}
+
+    first = client.post("/api/v1/predict", json=payload).json()
+    second = client.post("/api/v1/predict", json=payload).json()
+    assert first == second
+    assert len(calls) == 1
+    assert len(logged) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.models.log import RequestLog
+from app.services.request_log import RequestLogWriter
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def count_logs(session_factory):
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(RequestLog))
+
+
+@pytest.mark.anyio
+async def test_batches_rows_and_flushes_on_close(session_factory):
+    writer = RequestLogWriter(
+        session_factory=session_factory, flush_size=3, flush_interval=60
+    )
+    writes = []
+    original_write = writer._write
+
+    async def record_write(rows):
+        writes.append(len(rows))
+        await original_write(rows)
+
+    writer._write = record_write
+    for i in range(7):
+        await writer.log({"i": i}, {"ok": True})
+    await writer.close()
+    assert await count_logs(session_factory) == 7
+    assert writes == [3, 3, 1]
+    assert writer.stats()["written"] == 7
+    async with session_factory() as db:
+        log = (await db.scalars(select(RequestLog).order_by(RequestLog.id))).first()
+    assert json.loads(log.request) == {"i": 0}
+    assert json.loads(log.response) == {"ok": True}
+
+
+@pytest.mark.anyio
+async def test_flushes_after_interval(session_factory):
+    writer = RequestLogWriter(session_factory=session_factory, flush_interval=0.01)
+    await writer.log({"i": 1}, {})
+    for _ in range(100):
+        if writer.stats()["written"]:
+            break
+        await asyncio.sleep(0.01)
+    assert await count_logs(session_factory) == 1
+    await writer.close()
+
+
+@pytest.mark.anyio
+async def test_drop_policy_when_queue_full(session_factory):
+    writer = RequestLogWriter(
+        session_factory=session_factory, queue_size=2, flush_interval=60
+    )
+    for i in range(5):
+        await writer.log({"i": i}, {})
+    # the worker has not been scheduled yet, so only two rows fit
+    assert writer.stats()["dropped"] == 3
+    await writer.close()
+    assert await count_logs(session_factory) == 2
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        RequestLogWriter(policy="spill")
@@ -1,13 +1,16 @@
 import json
 
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 
 from api.routes import predictor
 from db import Base
 from models.log import RequestLog
 from models.prediction import MachineLearningDataInput
+from services.model_registry import ModelVersion
+from services.request_log import RequestLogWriter
 
 
 @pytest.fixture
@@ -16,11 +19,18 @@ def anyio_backend():
 
 @pytest.mark.anyio
 async def test_predict_logs_request_response(monkeypatch):
-    engine = create_engine("sqlite:///:memory:")
-    TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
-    Base.metadata.create_all(bind=engine)
-    monkeypatch.setattr(predictor, "SessionLocal", TestingSessionLocal)
-    monkeypatch.setattr(predictor, "get_prediction", lambda data: [1])
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    TestingSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    writer = RequestLogWriter(session_factory=TestingSessionLocal)
+    monkeypatch.setattr(predictor, "request_log_writer", writer)
+    monkeypatch.setattr(predictor, "get_prediction", lambda data, model_version=None: [1])
+
+    async def fake_model(version=None):
+        return ModelVersion("v1", "v1.pkl", None, (0, 0), 0.0, 0.0)
+
+    monkeypatch.setattr(predictor, "resolve_model", fake_model)
 
     payload = {
         "feature1": 1.0,
@@ -33,11 +43,12 @@ async def test_predict_logs_request_response(monkeypatch):
 
     response = await predictor.predict(data)
     assert response.prediction == 1.0
+    await writer.close()
 
-    db = TestingSessionLocal()
-    logs = db.query(RequestLog).all()
+    async with TestingSessionLocal() as db:
+        logs = (await db.scalars(select(RequestLog))).all()
     assert len(logs) == 1
     log = logs[0]
     assert json.loads(log.request) == data.model_dump()
     assert json.loads(log.response) == response.model_dump()
-    db.close()
+    await engine.dispose()
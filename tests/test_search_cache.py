@@ -0,0 +1,83 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.cache import AsyncSingleFlight, LRUCache, SingleFlight
+from app.services.gemini_search import GeminiSearchService, normalize_query
+
+
+class FakeModel:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        time.sleep(self.delay)
+        return SimpleNamespace(text='```json\n{"category": "drinks", "keywords": ["kopi"]}\n```')
+
+
+@pytest.fixture
+def service():
+    service = GeminiSearchService.__new__(GeminiSearchService)
+    service.cache = LRUCache(maxsize=8, ttl=60)
+    service._flight = SingleFlight()
+    service._async_flight = AsyncSingleFlight()
+    service.model = FakeModel()
+    return service
+
+
+def test_normalize_query():
+    assert normalize_query("  Kopi   MURAH ") == "kopi murah"
+
+
+def test_repeated_queries_skip_gemini(service):
+    first = service.parse_search_query("kopi murah")
+    first["keywords"].append("mutated")
+    second = service.parse_search_query("  Kopi Murah")
+    assert second == {"category": "drinks", "keywords": ["kopi"]}
+    assert service.model.calls == 1
+    assert service.cache_stats()["hits"] == 1
+
+
+def test_concurrent_misses_share_one_call(service):
+    service.model = FakeModel(delay=0.1)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.parse_search_query("teh")))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert service.model.calls == 1
+    assert len(results) == 5
+
+
+def test_failures_are_not_cached(service):
+    service.model = SimpleNamespace(generate_content=lambda prompt: SimpleNamespace(text="not json"))
+    assert service.parse_search_query("Kopi")["keywords"] == ["kopi"]
+    assert len(service.cache) == 0
+
+
+def test_lru_cache_bounds_ttl_and_persistence(tmp_path, monkeypatch):
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    path = str(tmp_path / "cache.json")
+    cache.dump(path)
+    restored = LRUCache(maxsize=2, ttl=10)
+    assert restored.load(path) == 2
+    assert restored.get("a") == 1
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert restored.get("a") is None